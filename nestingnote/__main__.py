@@ -1,27 +1,123 @@
 #!/usr/bin/python3
 from nestingnote.model import Model
 from nestingnote.linuxView import LinuxView
+from nestingnote.padView import PadView
+from nestingnote.ansiView import AnsiView
+from nestingnote.view import View
 from curses import wrapper
 from nestingnote.controller import Controller
-import sys
+from nestingnote.pager import Pager
+from nestingnote.keyLog import KeyRecorder, ReplayView, replay
+from nestingnote.watchdog import Watchdog
+from nestingnote.backgroundTasks import BackgroundTasks
+import argparse
+import tracemalloc
 import os
+import sys
 from pathlib import Path
 
 
-def main(window):
-    file_path = get_file_path()
-    view = LinuxView(window)
-    model = Model(view, file_path)
-    controller: Controller = Controller(model)
-    controller.run()
+def main(window, args):
+    view = PadView(window, args.escape_timeout) if args.pad else LinuxView(window, args.escape_timeout)
+    edit(view, args)
+
+
+def edit(view: View, args):
+    file_path = get_file_path(args)
+    if args.record is not None:
+        view = KeyRecorder(view, args.record, file_path)
+    model = Model(view, file_path, memory_budget=args.memory_budget, fold_level=args.fold_level,
+                  show_counters=args.counters, soft_wrap=args.wrap, undo_memory=args.undo_memory * 1024)
+    watchdog = None
+    if args.watchdog is not None:
+        watchdog = Watchdog(model, args.watchdog, budget=args.watchdog_budget / 1000)
+    controller: Controller = Controller(model, latency_file=args.latency_file, watchdog=watchdog,
+                                        frame_interval=args.frame_interval / 1000)
+    background = None
+    if args.asyncio or args.autosave is not None:
+        background = BackgroundTasks(model, autosave_interval=args.autosave, watch_interval=2,
+                                     latency=controller.latency, latency_file=args.latency_file, stats_interval=10)
+    try:
+        controller.run(background)
+    finally:
+        if args.record is not None:
+            view.close()
+
+
+def view_main(window, args):
+    Pager(LinuxView(window, args.escape_timeout), args.view).run()
+
+
+def memory_report(args) -> str:
+    """
+    Reads the whole file without a terminal, exits if there is none rather than creating it
+    :return: report of the memory it takes
+    """
+    if args.file is None or not os.path.exists(args.file):
+        sys.exit('nestingnote: --memory-report needs a note to read, {} does not exist'.format(args.file))
+    tracemalloc.start()
+    model = Model(ReplayView([]), args.file, fold_level=args.fold_level)
+    while model.loading:
+        model.continue_loading()
+    report = model.memory_report().format(traced=tracemalloc.get_traced_memory())
+    tracemalloc.stop()
+    return report
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog='nestingnote', description='Terminal note-taking application')
+    parser.add_argument('file', nargs='?', help='note to open, created if it does not exist')
+    parser.add_argument('--memory-budget', type=int, metavar='NODES',
+                        help='lines to keep in memory before collapsed items are spilled to a temporary file')
+    parser.add_argument('--fold-level', type=int, metavar='N',
+                        help='open with every item at level N or deeper collapsed, 0 shows only the top level')
+    parser.add_argument('--latency-file', metavar='FILE',
+                        help='on exit, write how long each kind of key took to handle to FILE as JSON')
+    parser.add_argument('--wrap', action='store_true',
+                        help='continue lines wider than the screen on the rows below instead of scrolling sideways')
+    parser.add_argument('--pad', action='store_true',
+                        help='keep the lines around the screen in a curses pad, so scrolling only draws new lines')
+    parser.add_argument('--ansi', action='store_true',
+                        help='draw with escape sequences written straight to the terminal instead of curses, '
+                             'sending only what changed on screen')
+    parser.add_argument('--frame-interval', type=int, default=16, metavar='MS',
+                        help='redraw at most once every MS milliseconds, keys typed faster are drawn together, '
+                             '16 by default')
+    parser.add_argument('--escape-timeout', type=int, default=25, metavar='MS',
+                        help='milliseconds to wait for the rest of a key after Esc before taking it as Esc, '
+                             '25 by default, raise it over slow connections')
+    parser.add_argument('--asyncio', action='store_true',
+                        help='run on an asyncio event loop that, between keys, reads the rest of the file, checks '
+                             'whether another program changed it and writes --latency-file every 10 seconds')
+    parser.add_argument('--autosave', type=float, metavar='SECONDS',
+                        help='with --asyncio, which this turns on, save unsaved edits every SECONDS')
+    parser.add_argument('--undo-memory', type=int, default=1024, metavar='KB',
+                        help='kilobytes the edits that can be undone may take before the oldest are forgotten, '
+                             '1024 by default')
+    parser.add_argument('--counters', action='store_true',
+                        help='show a line counting the internal work done by each key, Ctrl+d toggles it')
+    parser.add_argument('--watchdog', metavar='FILE',
+                        help='append the call stack to FILE whenever a key takes longer than the watchdog budget')
+    parser.add_argument('--watchdog-budget', type=int, default=50, metavar='MS',
+                        help='milliseconds a key may take before the watchdog logs it, 50 by default')
+    parser.add_argument('--record', metavar='FILE', help='write every key typed to FILE so it can be replayed')
+    parser.add_argument('--replay', metavar='FILE',
+                        help='replay the keys recorded in FILE without a terminal, against a copy of the note '
+                             'given, or of the one recorded, and report how long it took')
+    parser.add_argument('--profile', action='store_true', help='with --replay, report the functions that took longest')
+    parser.add_argument('--memory-report', action='store_true',
+                        help='print how much memory the note takes, by level and by group of siblings, and exit')
+    parser.add_argument('--view', metavar='FILE',
+                        help='page through a note read only, reading only the lines on screen')
+    return parser.parse_args(argv)
 
 
-def get_file_path():
-    if len(sys.argv) < 2:
+def get_file_path(args):
+    if args.file is None:
         home = str(Path.home())
         path = os.path.join(home, 'Documents', 'newNote.nnn')
         return add_unique_postfix(path)
-    return sys.argv[1]
+    return args.file
 
 
 def add_unique_postfix(file_name):
@@ -37,4 +133,15 @@ def add_unique_postfix(file_name):
 
 
 if __name__ == '__main__':
-    wrapper(main)
+    arguments = parse_args()
+    if arguments.memory_report:
+        print(memory_report(arguments))
+    elif arguments.replay is not None:
+        print(replay(arguments.replay, arguments.file, arguments.profile))
+    elif arguments.view is not None:
+        wrapper(view_main, arguments)
+    elif arguments.ansi:
+        with AnsiView(escape_timeout=arguments.escape_timeout) as ansi_view:
+            edit(ansi_view, arguments)
+    else:
+        wrapper(main, arguments)
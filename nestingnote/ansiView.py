@@ -0,0 +1,264 @@
+from nestingnote.screenView import ScreenView
+from nestingnote.keyDecoder import KeyDecoder
+from nestingnote.styles import Styles
+from typing import List, Optional
+import curses
+import os
+import select
+import shutil
+import signal
+import sys
+import termios
+import tty
+
+
+# style of the terminal when it isn't known
+_unknown = object()
+
+
+class AnsiView(ScreenView):
+    """
+    Terminal view that writes ANSI escape sequences itself instead of going through curses
+    Each frame is drawn into the in-memory screen, compared with what the terminal shows and sent as a single write
+    of only the cells that changed, with the shortest cursor motions between them. Made for slow links, where the
+    bytes sent per frame matter most.
+    """
+
+    __styles = {
+        None: b'\x1b[0m',
+        Styles.HEADER: b'\x1b[0;31;40m',
+        Styles.ODD: b'\x1b[0;36;40m',
+        Styles.EVEN: b'\x1b[0;37;40m',
+        Styles.COLLAPSED_HEADER: b'\x1b[0;37;41m',
+        Styles.BANNER: b'\x1b[0;37;46m',
+    }
+
+    def __init__(self, input_fd: int = None, output_fd: int = None, escape_timeout: int = 25):
+        """
+        :param escape_timeout: milliseconds to wait for the rest of an escape sequence, see KeyDecoder
+        """
+        self.__input = sys.stdin.fileno() if input_fd is None else input_fd
+        self.__output = sys.stdout.fileno() if output_fd is None else output_fd
+        rows, columns = self.__terminal_size()
+        super().__init__(rows, columns)
+        # what the terminal shows, None for cells in an unknown state
+        self.__shown_chars: List[List[Optional[str]]] = []
+        self.__shown_styles: List[List[Optional[Styles]]] = []
+        # where the terminal's cursor is and the style it writes in, None and _unknown if not known
+        self.__terminal_cursor = None
+        self.__terminal_style = _unknown
+        self.__forget_shown()
+        self.__timeout = -1
+        self.__decoder = KeyDecoder(escape_timeout)
+        self.__saved_attributes = None
+        # set when the terminal is resized, and a pipe written to then to wake up a wait for keys
+        self.__resized = False
+        self.__wake = None
+        self.__previous_handler = None
+        # bytes sent to the terminal in total and for the last frame
+        self.bytes_written = 0
+        self.frame_bytes = 0
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def start(self):
+        """
+        Takes over the terminal: keys are read as they're typed and the screen is switched to a blank one
+        """
+        if os.isatty(self.__input):
+            self.__saved_attributes = termios.tcgetattr(self.__input)
+            tty.setcbreak(self.__input)
+        self.__wake = os.pipe()
+        for end in self.__wake:
+            os.set_blocking(end, False)
+        self.__previous_handler = signal.signal(signal.SIGWINCH, self.__on_resize)
+        self.__write(b'\x1b[?1049h\x1b[0m\x1b[2J')
+
+    def stop(self):
+        self.__write(b'\x1b[0m\x1b[?1049l')
+        if self.__saved_attributes is not None:
+            termios.tcsetattr(self.__input, termios.TCSADRAIN, self.__saved_attributes)
+            self.__saved_attributes = None
+        if self.__wake is not None:
+            signal.signal(signal.SIGWINCH, self.__previous_handler)
+            for end in self.__wake:
+                os.close(end)
+            self.__wake = None
+
+    def update_size(self):
+        rows, columns = self.__terminal_size()
+        if (rows, columns) != (self.num_rows, self.num_columns):
+            self.resize(rows, columns)
+            self.__forget_shown()
+            self.__write(b'\x1b[0m\x1b[2J')
+
+    def end_frame(self):
+        self.frame_bytes = self.__write(self.frame_output())
+
+    def frame_output(self) -> bytes:
+        """
+        :return: what to send the terminal to go from what it shows to this frame, and marks the frame shown
+        """
+        output = bytearray()
+        cursor = self.__terminal_cursor
+        style = self.__terminal_style
+        for row in range(self.num_rows):
+            chars, styles = self._cells(row)
+            shown_chars = self.__shown_chars[row]
+            shown_styles = self.__shown_styles[row]
+            column = 0
+            while column < self.num_columns:
+                if chars[column] == shown_chars[column] and styles[column] == shown_styles[column]:
+                    column += 1
+                    continue
+                if cursor != (row, column):
+                    output += self.__motion(cursor, row, column, style)
+                if self.__blank_from(row, column):
+                    # clearing the rest of the line is shorter than writing blanks
+                    if style is not None:
+                        style = None
+                        output += self.__styles[None]
+                    output += b'\x1b[K'
+                    shown_chars[column:] = chars[column:]
+                    shown_styles[column:] = styles[column:]
+                    cursor = (row, column)
+                    break
+                if styles[column] != style:
+                    style = styles[column]
+                    output += self.__styles[style]
+                # write the run of changed cells in this style
+                start = column
+                while column < self.num_columns and styles[column] == style \
+                        and (chars[column] != shown_chars[column] or styles[column] != shown_styles[column]):
+                    column += 1
+                text = ''.join(chars[start:column])
+                output += text.encode('utf-8')
+                shown_chars[start:column] = chars[start:column]
+                shown_styles[start:column] = styles[start:column]
+                # the cursor stays put after writing the last column
+                cursor = (row, column) if column < self.num_columns else None
+        y, x = self.cursor
+        # terminals keep the cursor on the screen
+        y = max(0, min(y, self.num_rows - 1))
+        x = max(0, min(x, self.num_columns - 1))
+        if cursor != (y, x):
+            output += self.__motion(cursor, y, x, style)
+        self.__terminal_cursor = (y, x)
+        self.__terminal_style = style
+        return bytes(output)
+
+    @property
+    def input_char(self) -> int:
+        if self.__resized:
+            self.__resized = False
+            try:
+                os.read(self.__wake[0], 1024)
+            except BlockingIOError:
+                pass
+            return curses.KEY_RESIZE
+        key = self.__decoder.decode()
+        while key == -1:
+            # after the first byte of a key, only wait as long as the rest of it may take
+            waiting = self.__decoder.waiting
+            if self.__wait_for_input(self.__decoder.time_left if waiting else self.__timeout):
+                self.__decoder.feed(os.read(self.__input, 1024))
+            elif self.__resized:
+                return self.input_char
+            elif not waiting:
+                return -1
+            key = self.__decoder.decode()
+        return key
+
+    @property
+    def input_fds(self) -> List[int]:
+        # a resize is reported as a key
+        return [self.__input] if self.__wake is None else [self.__input, self.__wake[0]]
+
+    @property
+    def decoder(self) -> KeyDecoder:
+        return self.__decoder
+
+    @property
+    def decode_seconds(self) -> float:
+        return self.__decoder.last_latency
+
+    def set_input_timeout(self, milliseconds: int):
+        self.__timeout = milliseconds
+
+    def signal_user_error(self):
+        self.__write(b'\x07')
+
+    # Private
+
+    def __blank_from(self, row: int, column: int) -> bool:
+        """
+        :return: whether the rest of row from column is blank and unstyled in this frame
+        """
+        chars, styles = self._cells(row)
+        return all(char == self.blank for char in chars[column:]) and all(style is None for style in styles[column:])
+
+    def __wait_for_input(self, milliseconds: int) -> bool:
+        """
+        :return: whether there are keys to read, False if the wait timed out or a resize ended it
+        """
+        timeout = None if milliseconds < 0 else milliseconds / 1000
+        sources = [self.__input] if self.__wake is None else [self.__input, self.__wake[0]]
+        readable, _, _ = select.select(sources, [], [], timeout)
+        return self.__input in readable
+
+    def __on_resize(self, signal_number, frame):
+        self.__resized = True
+        try:
+            os.write(self.__wake[1], b'\0')
+        except BlockingIOError:
+            # already woken up
+            pass
+
+    def __motion(self, cursor, row: int, column: int, style: Styles) -> bytes:
+        """
+        :return: the shortest way to move the cursor from cursor to row and column
+        """
+        options = [b'\x1b[%d;%dH' % (row + 1, column + 1)]
+        if cursor is not None:
+            cursor_row, cursor_column = cursor
+            if cursor_row == row:
+                if column > cursor_column:
+                    distance = column - cursor_column
+                    options.append(b'\x1b[%dC' % distance if distance > 1 else b'\x1b[C')
+                    # rewriting cells that already show the right thing in this style
+                    chars, styles = self._cells(row)
+                    if all(styles[index] == style for index in range(cursor_column, column)):
+                        options.append(''.join(chars[cursor_column:column]).encode('utf-8'))
+                elif column < cursor_column:
+                    distance = cursor_column - column
+                    options.append(b'\x1b[%dD' % distance if distance > 1 else b'\x08')
+                if column == 0:
+                    options.append(b'\r')
+            elif row == cursor_row + 1 and column == 0:
+                options.append(b'\r\n')
+            elif column == cursor_column and row > cursor_row:
+                distance = row - cursor_row
+                options.append(b'\x1b[%dB' % distance if distance > 1 else b'\x1b[B')
+        return min(options, key=len)
+
+    def __forget_shown(self):
+        self.__terminal_cursor = None
+        self.__terminal_style = _unknown
+        self.__shown_chars = [[None] * self.num_columns for _ in range(self.num_rows)]
+        self.__shown_styles = [[None] * self.num_columns for _ in range(self.num_rows)]
+
+    def __terminal_size(self):
+        columns, rows = shutil.get_terminal_size()
+        return rows, columns
+
+    def __write(self, output: bytes) -> int:
+        written = 0
+        while written < len(output):
+            written += os.write(self.__output, output[written:])
+        self.bytes_written += written
+        return written
@@ -0,0 +1,91 @@
+from nestingnote.model import Model
+from nestingnote.latency import LatencyStats
+from typing import Callable, Coroutine, List
+import asyncio
+
+
+class BackgroundTasks(object):
+    """
+    Work the controller's asyncio loop runs between keys, each as a task that sleeps until it's next due
+    Tasks only run while the loop waits, so they never run in the middle of a key. Long ones hand control back to
+    the loop after every chunk of work, so a key typed meanwhile is handled before the next chunk, or like autosave
+    work on a snapshot of the document on a worker thread.
+    """
+
+    def __init__(self, model: Model, autosave_interval: float = None, watch_interval: float = None,
+                 latency: LatencyStats = None, latency_file: str = None, stats_interval: float = None):
+        """
+        :param autosave_interval: seconds between saves of unsaved edits, None to only save when asked
+        :param watch_interval: seconds between checks that no other program changed the file, None to not check
+        :param latency: written to latency_file every stats_interval seconds, so it's kept if the program dies
+        """
+        self.__model = model
+        self.__autosave_interval = autosave_interval
+        self.__watch_interval = watch_interval
+        self.__latency = latency
+        self.__latency_file = latency_file
+        self.__stats_interval = stats_interval
+        self.__changed = None
+        # whether an autosave is being written, the file changes under the watch meanwhile
+        self.__saving = False
+        # times each task did its work, for tests and the curious
+        self.autosaves = 0
+        self.stats_dumps = 0
+
+    def coroutines(self, changed: Callable[[], None]) -> List[Coroutine]:
+        """
+        :param changed: called when a task changed what's on screen
+        :return: a coroutine for each task there is work for
+        """
+        self.__changed = changed
+        coroutines = [self.__load()]
+        if self.__model.file_path is not None:
+            if self.__autosave_interval is not None:
+                coroutines.append(self.__autosave())
+            if self.__watch_interval is not None:
+                coroutines.append(self.__watch())
+        if self.__latency_file is not None and self.__stats_interval is not None:
+            coroutines.append(self.__dump_stats())
+        return coroutines
+
+    # Private
+
+    async def __load(self):
+        """
+        Reads the rest of the file being opened, a chunk at a time
+        """
+        while self.__model.loading:
+            self.__model.continue_loading()
+            self.__changed()
+            await asyncio.sleep(0)
+
+    async def __autosave(self):
+        """
+        Saves on a worker thread from a snapshot taken between keys, so keys typed meanwhile are handled at once
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.__autosave_interval)
+            if self.__model.loading or not self.__model.modified:
+                continue
+            self.__saving = True
+            try:
+                await loop.run_in_executor(None, list, self.__model.save_in_steps())
+                self.__model.finish_save()
+            finally:
+                self.__saving = False
+            self.autosaves += 1
+
+    async def __watch(self):
+        while True:
+            await asyncio.sleep(self.__watch_interval)
+            if not self.__saving and self.__model.changed_on_disk():
+                self.__model.show_message('{} was changed by another program, saving will overwrite it'
+                                          .format(self.__model.file_path))
+                self.__changed()
+
+    async def __dump_stats(self):
+        while True:
+            await asyncio.sleep(self.__stats_interval)
+            self.__latency.dump(self.__latency_file)
+            self.stats_dumps += 1
@@ -0,0 +1,2 @@
+from nestingnote.benchmark.suite import Benchmark, benchmarks, run
+from nestingnote.benchmark.shapes import shapes
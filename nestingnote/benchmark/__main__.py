@@ -0,0 +1,36 @@
+from nestingnote.benchmark.suite import benchmarks, run
+from nestingnote.benchmark.shapes import shapes
+import argparse
+import json
+import sys
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog='nestingnote.benchmark',
+                                     description='Time nestingnote operations on synthetic notes')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000], metavar='LINES',
+                        help='lines in each generated note')
+    parser.add_argument('--repeat', type=int, default=5, help='timed runs of each benchmark')
+    parser.add_argument('--benchmark', action='append', choices=[benchmark.name for benchmark in benchmarks],
+                        help='only run this benchmark, can be given more than once')
+    parser.add_argument('--shape', action='append', choices=list(shapes), help='only use this shape of note')
+    parser.add_argument('--output', metavar='FILE', help='write the results as JSON to FILE instead of stdout')
+    return parser.parse_args(argv)
+
+
+def print_result(result: dict):
+    print('{benchmark:12} {shape:10} {size:>8} {best:12.6f}s'.format(**result), file=sys.stderr)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    results = run(args.sizes, args.repeat, args.benchmark, args.shape, report=print_result)
+    if args.output is None:
+        json.dump(results, sys.stdout, indent=4)
+    else:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=4)
+
+
+if __name__ == '__main__':
+    main()
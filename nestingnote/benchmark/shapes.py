@@ -0,0 +1,71 @@
+"""
+Synthetic outlines for benchmarks, each returns the first node of a document of about size lines
+"""
+from nestingnote.nestedlist import NestedList
+import random
+
+
+def deep_chain(size: int) -> NestedList:
+    """
+    Every line is the only child of the line above it
+    """
+    root = NestedList(["line 0"])
+    node = root
+    for line in range(1, size):
+        node = node.insert_child(["line {}".format(line)])
+    return root
+
+
+def wide(size: int) -> NestedList:
+    """
+    size siblings at the top level
+    """
+    root = NestedList(["line 0"])
+    node = root
+    for line in range(1, size):
+        node = node.insert_sibling(["line {}".format(line)])
+    return root
+
+
+def matrix(size: int, columns: int = 50) -> NestedList:
+    """
+    size top level lines of columns short fields each, like an imported spreadsheet
+    """
+    root = NestedList(["r0c{}".format(column) for column in range(columns)])
+    node = root
+    for line in range(1, size):
+        node = node.insert_sibling(["r{}c{}".format(line, column) for column in range(columns)])
+    return root
+
+
+def mixed(size: int, seed: int = 0) -> NestedList:
+    """
+    Notes as people write them: mostly short lines a few levels deep, some with a few fields,
+    with a few collapsed sections
+    """
+    generator = random.Random(seed)
+    root = NestedList(["heading 0"])
+    # last line at each level
+    last = [root]
+    for line in range(1, size):
+        level = generator.randint(0, min(len(last), 6))
+        fields = [generator.choice(("note", "todo", "idea", "reference")) + " {}".format(line)]
+        fields += ["detail"] * generator.choice((0, 0, 0, 1, 2, 4))
+        if level == len(last):
+            node = last[-1].insert_child(fields)
+        else:
+            node = last[level].insert_sibling(fields)
+            del last[level:]
+        last.append(node)
+    for node in root:
+        if node.has_child and generator.random() < 0.05:
+            node.toggle_collapsed()
+    return root
+
+
+shapes = {
+    'deep_chain': deep_chain,
+    'wide': wide,
+    'matrix': matrix,
+    'mixed': mixed,
+}
@@ -0,0 +1,236 @@
+from nestingnote.benchmark.shapes import shapes
+from nestingnote.model import Model
+from nestingnote.testView import TestView
+from nestingnote.screenView import ScreenView
+from nestingnote.commands import Commands
+from nestingnote.directions import VerticalDirection
+from nestingnote.key import KeyMap, Key
+from nestingnote.nestedlist import NestedList
+from nestingnote.records import RecordReader
+from typing import Callable, Dict, List
+import os
+import platform
+import statistics
+import tempfile
+import time
+
+
+class Benchmark(object):
+    """
+    One timed operation on a document
+    setup builds whatever the operation needs from a fresh document and returns a function that performs it
+    once and returns how many operations it performed, so results can be compared per operation.
+    """
+
+    def __init__(self, name: str, setup: Callable[[NestedList, str], Callable[[], int]], shapes: List[str] = None):
+        """
+        :param setup: called with the document and a scratch directory
+        :param shapes: names of the shapes the benchmark applies to, all of them if None
+        """
+        self.name = name
+        self.setup = setup
+        self.shapes = shapes
+
+    def applies_to(self, shape: str) -> bool:
+        return self.shapes is None or shape in self.shapes
+
+
+# lines of the document each benchmark looks up with get_node
+_lookups = 10
+
+# characters typed then deleted by the typing benchmark
+_typed = 20
+
+
+def _count(root: NestedList, directory: str):
+    def run():
+        root.count()
+        return 1
+    return run
+
+
+def _get_node(root: NestedList, directory: str):
+    count = root.count()
+    rows = [count * lookup // _lookups for lookup in range(_lookups)]
+
+    def run():
+        for row in rows:
+            root.get_node(row)
+        return len(rows)
+    return run
+
+
+def _display_top(root: NestedList, directory: str):
+    model = Model(TestView([]), root=root)
+
+    def run():
+        model.display()
+        return 1
+    return run
+
+
+def _display_end(root: NestedList, directory: str):
+    model = Model(TestView([]), root=root)
+    for _ in range(root.count() // TestView([]).num_rows):
+        model.page(VerticalDirection.DOWN)
+
+    def run():
+        model.display()
+        return 1
+    return run
+
+
+def _render(root: NestedList, directory: str):
+    """
+    Display into an in-memory screen, so writing the characters is timed too, counting cells written
+    """
+    view = ScreenView(rows=50, columns=200)
+    model = Model(view, root=root)
+
+    def run():
+        model.display()
+        return view.cells_written
+    return run
+
+
+def _typing(root: NestedList, directory: str):
+    model = Model(TestView([]), root=root)
+    keys = [ord('a')] * _typed + [KeyMap.get_instance().value(Key.BACKSPACE)] * _typed
+
+    def run():
+        for key in keys:
+            Commands.execute(key, model)
+            model.display()
+        return len(keys)
+    return run
+
+
+def _indent(root: NestedList, directory: str):
+    model = Model(TestView([]), root=root)
+    model.move(VerticalDirection.DOWN)
+
+    def run():
+        model.indent_current_node()
+        model.unindent_current_node()
+        return 2
+    return run
+
+
+def _row_edit(root: NestedList, directory: str):
+    node = root.get_node(root.count() // 2)
+    original = node.get_field(0)
+    longer = original + 'x' * 40
+
+    def run():
+        node.replace_field(0, longer)
+        node.insert_field(1, longer)
+        node.delete_field(1)
+        node.replace_field(0, original)
+        return 4
+    return run
+
+
+def _save(root: NestedList, directory: str):
+    model = Model(TestView([]), root=root)
+    file_path = os.path.join(directory, 'save.nnn')
+
+    def run():
+        model.save(file_path)
+        return 1
+    return run
+
+
+def _load(root: NestedList, directory: str):
+    file_path = os.path.join(directory, 'load.nnn')
+    Model(TestView([]), root=root).save(file_path)
+
+    def run():
+        RecordReader(file_path).read()
+        return 1
+    return run
+
+
+def _open(root: NestedList, directory: str):
+    """
+    Time until the first screen is shown, the rest of the file is read between keys
+    """
+    file_path = os.path.join(directory, 'open.nnn')
+    Model(TestView([]), root=root).save(file_path)
+
+    def run():
+        Model(TestView([]), file_path).display()
+        return 1
+    return run
+
+
+benchmarks = [
+    Benchmark('count', _count),
+    Benchmark('get_node', _get_node),
+    Benchmark('display_top', _display_top),
+    Benchmark('display_end', _display_end),
+    Benchmark('render', _render),
+    Benchmark('typing', _typing),
+    # the second line of a chain is a first child, which can't be indented
+    Benchmark('indent', _indent, shapes=['wide', 'matrix']),
+    Benchmark('row_edit', _row_edit),
+    Benchmark('save', _save),
+    Benchmark('load', _load),
+    Benchmark('open', _open),
+]
+
+
+def run(sizes: List[int], repeat: int = 5, names: List[str] = None, shape_names: List[str] = None,
+        report: Callable[[dict], None] = None) -> dict:
+    """
+    Times every benchmark on every shape at every size
+    :param repeat: timed runs of each benchmark, the best is the one to compare across releases
+    :param names: benchmarks to run, all if None
+    :param shape_names: shapes to run on, all if None
+    :param report: called with each result as it's measured
+    :return: the results in a form that can be written as JSON
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for shape_name, shape in shapes.items():
+            if shape_names is not None and shape_name not in shape_names:
+                continue
+            for size in sizes:
+                for benchmark in benchmarks:
+                    if names is not None and benchmark.name not in names or not benchmark.applies_to(shape_name):
+                        continue
+                    result = _measure(benchmark, shape_name, shape, size, repeat, directory)
+                    results.append(result)
+                    if report is not None:
+                        report(result)
+    return {
+        'nestingnote_benchmark': 1,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'repeat': repeat,
+        'results': results,
+    }
+
+
+def _measure(benchmark: Benchmark, shape_name: str, shape: Callable[[int], NestedList], size: int, repeat: int,
+             directory: str) -> Dict:
+    # a fresh document each time so runs don't see each other's edits
+    root = shape(size)
+    function = benchmark.setup(root, directory)
+    operations = 0
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        operations = function()
+        runs.append(time.perf_counter() - start)
+    return {
+        'benchmark': benchmark.name,
+        'shape': shape_name,
+        'size': size,
+        'lines': root.count(),
+        'operations': operations,
+        'runs': runs,
+        'best': min(runs),
+        'median': statistics.median(runs),
+        'best_per_operation': min(runs) / max(operations, 1),
+    }
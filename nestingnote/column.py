@@ -1,4 +1,6 @@
+from nestingnote.counters import OperationCounters
 from collections import Counter
+import sys
 
 
 class Column(object):
@@ -6,18 +8,55 @@ class Column(object):
         Data communicated between sibling Rows
         """
 
+        # changes whenever the width of any column may have changed, so offsets found from the widths can be checked
+        __epoch = 0
+
         def __init__(self):
             """
             Each counter in this list is the collection of sizes of each cell for a column
             """
             self.__field_widths = Counter()
+            # widest field, None when it has to be found again
+            self.__width = None
+            # where the column starts, from the widths of the columns before it, and the epoch that was found in
+            self.__offset = 0
+            self.__offset_epoch = -1
 
         def add_field(self, width: int):
             self.__field_widths[width] += 1
+            if self.__width is not None and width > self.__width:
+                self.__width = width
+                Column.__epoch += 1
 
         def remove_field(self, width: int):
             assert self.__field_widths[width] > 0
             self.__field_widths[width] -= 1
+            if width == self.__width and self.__field_widths[width] == 0:
+                self.__width = None
+                Column.__epoch += 1
+
+        @property
+        def counter_size(self) -> int:
+            """
+            :return: number of distinct widths counted, including widths no field has anymore
+            """
+            return len(self.__field_widths)
+
+        def __sizeof__(self) -> int:
+            return object.__sizeof__(self) + sys.getsizeof(self.__dict__) + sys.getsizeof(self.__field_widths)
+
+        @property
+        def offset(self) -> int:
+            """
+            :return: where the column starts, counted from the start of the first column,
+            None if the width of a column has changed since it was set
+            """
+            return self.__offset if self.__offset_epoch == Column.__epoch else None
+
+        @offset.setter
+        def offset(self, offset: int):
+            self.__offset = offset
+            self.__offset_epoch = Column.__epoch
 
         @property
         def width(self) -> int:
@@ -25,5 +64,8 @@ class Column(object):
             :return: max width of all fields
             """
             assert len(self.__field_widths) > 0
-            return max(self.__field_widths.elements())
+            OperationCounters.get_instance().column_widths += 1
+            if self.__width is None:
+                self.__width = max(width for width, count in self.__field_widths.items() if count > 0)
+            return self.__width
 
@@ -220,6 +220,46 @@ class Save(KeyCommand):
         model.save()
 
 
+class MemoryReport(KeyCommand):
+    def is_relevant(self, key: int, model: Model):
+        return key == self.key_map.value(Key.CTRL_R)
+
+    def execute(self, key: int, model: Model):
+        model.show_memory_report()
+
+
+class ToggleCounters(KeyCommand):
+    def is_relevant(self, key: int, model: Model):
+        return key == self.key_map.value(Key.CTRL_D)
+
+    def execute(self, key: int, model: Model):
+        model.toggle_counters()
+
+
+class Undo(KeyCommand):
+    def is_relevant(self, key: int, model: Model):
+        return key == self.key_map.value(Key.CTRL_U)
+
+    def execute(self, key: int, model: Model):
+        model.undo()
+
+
+class Redo(KeyCommand):
+    def is_relevant(self, key: int, model: Model):
+        return key == self.key_map.value(Key.CTRL_Y)
+
+    def execute(self, key: int, model: Model):
+        model.redo()
+
+
+class Resize(KeyCommand):
+    def is_relevant(self, key: int, model: Model):
+        return key == self.key_map.value(Key.RESIZE)
+
+    def execute(self, key: int, model: Model):
+        model.resize()
+
+
 class UserError(KeyCommand):
     """
     Precondition: All other KeyCommand subclasses are checked (is_relevant()) before this is run
@@ -246,7 +286,10 @@ class Commands(object):
         return cls.__key_commands
 
     @classmethod
-    def __get_command(cls, key: int, model: Model) -> KeyCommand:
+    def get_command(cls, key: int, model: Model) -> KeyCommand:
+        """
+        :return: the command that handles key in the model's current state
+        """
         for command in Commands.__get_key_commands():
             if command.is_relevant(key, model):
                 return command
@@ -254,5 +297,5 @@ class Commands(object):
 
     @classmethod
     def execute(cls, key: int, model: Model):
-        command = Commands.__get_command(key, model)
+        command = Commands.get_command(key, model)
         command.execute(key, model)
@@ -1,25 +1,181 @@
 from nestingnote.commands import Commands
 from nestingnote.model import Model
+from nestingnote.latency import LatencyStats
+from nestingnote.watchdog import Watchdog
+from nestingnote.key import KeyMap, Key
+from nestingnote.counters import OperationCounters
+from nestingnote.frameScheduler import FrameScheduler
+from nestingnote.backgroundTasks import BackgroundTasks
+import asyncio
+import time
 
 
 class Controller(object):
 
-    def __init__(self, model: Model):
+    # longest wait for keys in the asyncio loop, some views only notice a resize when keys are read
+    __poll_interval = 0.25
+
+    def __init__(self, model: Model, latency_file: str = None, watchdog: Watchdog = None, frame_interval: float = 0):
+        """
+        :param latency_file: where to write the latency of each command as JSON on exit, None to not write them
+        :param watchdog: told when each key starts and finishes, started and stopped with the main loop
+        :param frame_interval: least seconds between repaints, keys arriving sooner are drawn together
+        """
         self.model = model
+        self.latency = LatencyStats()
+        self.frames = FrameScheduler(frame_interval)
+        self.__latency_file = latency_file
+        self.__watchdog = watchdog
+        # the last key handled and its command, until a frame shows what it did
+        self.__last_key = -1
+        self.__last_command = None
 
     def __input_stream(self):
         """Main loop, waiting on keyboard input"""
+        # not a command, so it can't be rebound or shadowed by one
+        latency_key = KeyMap.get_instance().value(Key.CTRL_T)
+        self.__draw()
         while True:
+            key: int = self.model.read_key(self.frames.input_timeout(idle_work=self.model.loading))
+            if key == -1:
+                if self.frames.frame_due():
+                    self.__draw()
+                elif self.model.loading:
+                    # nothing to draw and no key yet, read more of the file being opened
+                    self.model.continue_loading()
+                    self.frames.changed()
+                continue
+            self.__take_key(key, latency_key)
+
+    async def __serve(self, background: BackgroundTasks):
+        """
+        Main loop on an asyncio event loop, handling keys as they become readable and running background tasks
+        while waiting for them
+        """
+        loop = asyncio.get_running_loop()
+        ready = asyncio.Event()
+
+        def changed():
+            self.frames.changed()
+            ready.set()
+
+        def finished(task: asyncio.Task):
+            if not task.cancelled() and task.exception() is not None:
+                self.model.show_message('Background task failed: {}'.format(task.exception()))
+                changed()
+
+        latency_key = KeyMap.get_instance().value(Key.CTRL_T)
+        input_fds = self.model.input_fds
+        for fd in input_fds:
+            loop.add_reader(fd, ready.set)
+        tasks = [loop.create_task(coroutine) for coroutine in background.coroutines(changed)]
+        for task in tasks:
+            task.add_done_callback(finished)
+        try:
+            self.__draw()
+            while True:
+                key: int = self.model.read_key(0)
+                if key != -1:
+                    self.__take_key(key, latency_key)
+                    # tasks that are due run between the keys of a burst
+                    await asyncio.sleep(0)
+                    continue
+                if self.frames.frame_due():
+                    self.__draw()
+                ready.clear()
+                timeout = self.frames.input_timeout(idle_work=False)
+                timeout = self.__poll_interval if timeout < 0 else min(timeout / 1000, self.__poll_interval)
+                try:
+                    await asyncio.wait_for(ready.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            for fd in input_fds:
+                loop.remove_reader(fd)
+            for task in tasks:
+                task.cancel()
+
+    def __take_key(self, key: int, latency_key: int):
+        """
+        Handles a key read by either main loop, drawing it if a frame is due
+        """
+        if key == latency_key:
+            self.model.show_message(self.latency.summary())
+            self.frames.changed()
+        else:
+            self.__execute(key, decode=self.model.decode_seconds)
+        if self.frames.frame_due():
+            self.__draw()
+
+    def handle_key(self, key: int):
+        """
+        Runs the command for key and redraws the screen, timing each step
+        """
+        self.__execute(key)
+        self.__draw()
+
+    def __execute(self, key: int, decode: float = None):
+        """
+        Runs the command for key, timing how long it took to find and to run
+        :param decode: seconds the view took to decode key, None if it wasn't timed
+        """
+        OperationCounters.get_instance().reset()
+        if self.__watchdog is not None:
+            self.__watchdog.key_started(key)
+        try:
+            self.model.undo_checkpoint()
+            start = time.perf_counter()
+            command = Commands.get_command(key, self.model)
+            looked_up = time.perf_counter()
+            command.execute(key, self.model)
+            self.model.enforce_memory_budget()
+            executed = time.perf_counter()
+        finally:
+            if self.__watchdog is not None:
+                self.__watchdog.key_finished()
+        self.__last_key = key
+        self.__last_command = type(command).__name__
+        phases = dict(lookup=looked_up - start, execute=executed - looked_up)
+        if decode is not None:
+            phases['decode'] = decode
+        self.latency.record(self.__last_command, **phases)
+        self.frames.changed()
+
+    def __draw(self):
+        """
+        Repaints the screen, timed as the display of the last key handled
+        """
+        if self.__watchdog is not None:
+            self.__watchdog.key_started(self.__last_key)
+        try:
+            start = time.perf_counter()
             self.model.display()
-            key: int = self.model.input_char
-            Commands.execute(key, self.model)
+            displayed = time.perf_counter()
+        finally:
+            if self.__watchdog is not None:
+                self.__watchdog.key_finished()
+        self.frames.frame_drawn()
+        if self.__last_command is not None:
+            self.latency.record(self.__last_command, display=displayed - start)
+            self.__last_command = None
 
-    def run(self):
+    def run(self, background: BackgroundTasks = None):
         """
         Must be called after instantiation
         Continue running the TUI until interruption
+        :param background: tasks to run between keys on an asyncio event loop, None to wait on keys alone
         """
+        if self.__watchdog is not None:
+            self.__watchdog.start()
         try:
-            self.__input_stream()
+            if background is None:
+                self.__input_stream()
+            else:
+                asyncio.run(self.__serve(background))
         except KeyboardInterrupt:
             pass
+        finally:
+            if self.__watchdog is not None:
+                self.__watchdog.stop()
+            if self.__latency_file is not None:
+                self.latency.dump(self.__latency_file)
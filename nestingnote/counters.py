@@ -0,0 +1,52 @@
+class OperationCounters(object):
+    """
+    Counts of internal work, to see how much each key costs
+    The controller resets them before each key. Counting is a field increment, cheap enough to always be on.
+    """
+    __instance = None
+
+    # name of each counter and how the overlay labels it
+    __labels = (
+        ('get_node', 'get_node'),
+        ('count_visits', 'count visited'),
+        ('column_widths', 'widths'),
+        ('row_attaches', 'attach'),
+        ('row_detaches', 'detach'),
+        ('line_wraps', 'wraps'),
+        ('addstr', 'addstr'),
+        ('bytes_drawn', 'drawn'),
+    )
+
+    @staticmethod
+    def get_instance():
+        if OperationCounters.__instance is None:
+            OperationCounters.__instance = OperationCounters()
+        return OperationCounters.__instance
+
+    def __init__(self):
+        if OperationCounters.__instance is not None:
+            raise Exception("This class is a singleton")
+        # calls to NestedList.get_node
+        self.get_node = 0
+        # nodes visited by NestedList.count
+        self.count_visits = 0
+        # evaluations of Column.width
+        self.column_widths = 0
+        # fields added to and removed from their columns by Row
+        self.row_attaches = 0
+        self.row_detaches = 0
+        # lines whose breaks WrapLayout had to find again
+        self.line_wraps = 0
+        # calls to View.addstr and characters passed to it
+        self.addstr = 0
+        self.bytes_drawn = 0
+
+    def reset(self):
+        for name, _ in self.__labels:
+            setattr(self, name, 0)
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name, _ in self.__labels}
+
+    def summary(self) -> str:
+        return '  '.join('{} {}'.format(label, getattr(self, name)) for name, label in self.__labels)
@@ -0,0 +1,66 @@
+from typing import Callable
+import math
+import time
+
+
+class FrameScheduler(object):
+    """
+    Decides when the screen is repainted, so handling keys doesn't wait on drawing
+    A frame is drawn only when something changed, and at most once per interval. Keys that arrive before the next
+    frame is due are handled straight away and their changes are drawn together in that frame.
+    """
+
+    def __init__(self, interval: float = 0, clock: Callable[[], float] = time.monotonic):
+        """
+        :param interval: least seconds between the start of one frame and the next, 0 to draw after every change
+        :param clock: seconds from an arbitrary start, replaced in tests
+        """
+        self.__interval = interval
+        self.__clock = clock
+        self.__changed = False
+        # when the last frame was drawn, None before the first one
+        self.__last_frame = None
+        # frames drawn and changes made, more changes than frames means changes were drawn together
+        self.frames = 0
+        self.changes = 0
+
+    @property
+    def interval(self) -> float:
+        return self.__interval
+
+    def changed(self):
+        """
+        Something on screen may have changed since the last frame
+        """
+        self.__changed = True
+        self.changes += 1
+
+    def frame_due(self) -> bool:
+        """
+        :return: whether a frame should be drawn now
+        """
+        return self.__changed and self.__until_due() <= 0
+
+    def frame_drawn(self):
+        self.__changed = False
+        self.__last_frame = self.__clock()
+        self.frames += 1
+
+    def input_timeout(self, idle_work: bool) -> int:
+        """
+        :param idle_work: whether there is work to do while no key is pressed
+        :return: milliseconds to wait for a key, negative to wait until one is pressed
+        """
+        if idle_work:
+            return 0
+        if self.__changed:
+            return max(0, math.ceil(self.__until_due() * 1000))
+        return -1
+
+    def __until_due(self) -> float:
+        """
+        :return: seconds until a frame may be drawn
+        """
+        if self.__last_frame is None:
+            return 0
+        return self.__last_frame + self.__interval - self.__clock()
@@ -20,9 +20,15 @@ class Key(Enum):
     DOWN = auto()
     CTRL_RIGHT = auto()
     CTRL_LEFT = auto()
+    CTRL_D = auto()
     CTRL_K = auto()
+    CTRL_R = auto()
+    CTRL_T = auto()
+    CTRL_U = auto()
     CTRL_W = auto()
+    CTRL_Y = auto()
     ESC = auto()
+    RESIZE = auto()
 
 
 class KeyMap(object):
@@ -58,11 +64,18 @@ class KeyMap(object):
             Key.RIGHT: curses.KEY_RIGHT,
             Key.UP: curses.KEY_UP,
             Key.DOWN: curses.KEY_DOWN,
+            # no curses constant, the values ncurses gives them on xterm, KeyDecoder decodes them to these
             Key.CTRL_RIGHT: 560,
             Key.CTRL_LEFT: 545,
+            Key.CTRL_D: 4,
             Key.CTRL_K: 11,
+            Key.CTRL_R: 18,
+            Key.CTRL_T: 20,
+            Key.CTRL_U: 21,
             Key.CTRL_W: 23,
-            Key.ESC: curses.ascii.ESC
+            Key.CTRL_Y: 25,
+            Key.ESC: curses.ascii.ESC,
+            Key.RESIZE: curses.KEY_RESIZE
             }
         # Correct differences for windows
         if platform.system() == 'Windows':
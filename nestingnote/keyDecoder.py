@@ -0,0 +1,198 @@
+from nestingnote.key import KeyMap, Key
+from nestingnote.latency import LatencyHistogram
+from typing import Callable
+import curses
+import math
+import time
+
+
+class KeyDecoder(object):
+    """
+    Turns the bytes a terminal sends into keys, with the values KeyMap gives them
+    Escape sequences are looked up in a table. A sequence that has only partly arrived is waited for until the
+    escape timeout has passed since its first byte, then what has arrived is taken as it is, so a lone Esc costs
+    the timeout rather than the full second curses waits by default. Sequences that aren't in the table are dropped
+    whole instead of turning into an Esc and stray characters.
+    """
+
+    # escape sequences of keys, xterm, VT100 application mode and rxvt
+    __sequences = {
+        b'\x1b[A': Key.UP,
+        b'\x1b[B': Key.DOWN,
+        b'\x1b[C': Key.RIGHT,
+        b'\x1b[D': Key.LEFT,
+        b'\x1bOA': Key.UP,
+        b'\x1bOB': Key.DOWN,
+        b'\x1bOC': Key.RIGHT,
+        b'\x1bOD': Key.LEFT,
+        b'\x1b[H': Key.HOME,
+        b'\x1b[F': Key.END,
+        b'\x1bOH': Key.HOME,
+        b'\x1bOF': Key.END,
+        b'\x1b[1~': Key.HOME,
+        b'\x1b[4~': Key.END,
+        b'\x1b[7~': Key.HOME,
+        b'\x1b[8~': Key.END,
+        b'\x1b[3~': Key.DELETE,
+        b'\x1b[5~': Key.PAGE_UP,
+        b'\x1b[6~': Key.PAGE_DOWN,
+        b'\x1b[Z': Key.SHIFT_TAB,
+        b'\x1b[1;5C': Key.CTRL_RIGHT,
+        b'\x1b[1;5D': Key.CTRL_LEFT,
+        b'\x1b[5C': Key.CTRL_RIGHT,
+        b'\x1b[5D': Key.CTRL_LEFT,
+        b'\x1bOc': Key.CTRL_RIGHT,
+        b'\x1bOd': Key.CTRL_LEFT,
+    }
+
+    # single bytes that aren't the character they encode
+    __controls = {
+        b'\x7f': Key.BACKSPACE,
+        b'\x08': Key.BACKSPACE,
+        b'\r': Key.ENTER,
+    }
+
+    # keys curses decodes itself, by the name of the curses constant, whose code isn't the value KeyMap gives them,
+    # the names missing from this curses are skipped
+    __codes = {
+        'KEY_BACKSPACE': Key.BACKSPACE,
+        'KEY_BTAB': Key.SHIFT_TAB,
+        'KEY_ENTER': Key.ENTER,
+        # PDCurses
+        'PADENTER': Key.ENTER,
+        'CTL_LEFT': Key.CTRL_LEFT,
+        'CTL_RIGHT': Key.CTRL_RIGHT,
+    }
+
+    def __init__(self, escape_timeout: int = 25, clock: Callable[[], float] = time.monotonic):
+        """
+        :param escape_timeout: milliseconds to wait for the rest of an escape sequence before taking it as Esc
+        :param clock: seconds from an arbitrary start, replaced in tests
+        """
+        key_map = KeyMap.get_instance()
+        self.__keys = {sequence: key_map.value(key)
+                       for sequence, key in list(self.__sequences.items()) + list(self.__controls.items())}
+        self.__codes = {getattr(curses, name): key_map.value(key)
+                        for name, key in self.__codes.items() if hasattr(curses, name)}
+        self.__escape = key_map.value(Key.ESC)
+        self.__escape_timeout = escape_timeout
+        self.__clock = clock
+        self.__pending = b''
+        # when decoding the first pending key started, None if it hasn't yet
+        self.__started = None
+        # time each key took from its first byte being looked at to being decoded
+        self.latency = LatencyHistogram()
+        self.last_latency = 0.0
+        # sequences dropped because they aren't in the table
+        self.unknown = 0
+
+    @property
+    def escape_timeout(self) -> int:
+        return self.__escape_timeout
+
+    @property
+    def waiting(self) -> bool:
+        """
+        :return: whether the bytes pending are the start of a key whose rest hasn't arrived yet
+        """
+        return self.__started is not None and self.__incomplete()
+
+    @property
+    def time_left(self) -> int:
+        """
+        :return: milliseconds left to wait for the rest of the key pending, see waiting
+        """
+        elapsed = self.__clock() - self.__started
+        return max(0, math.ceil(self.__escape_timeout - elapsed * 1000))
+
+    def feed(self, data: bytes):
+        self.__pending += data
+
+    def decode(self) -> int:
+        """
+        :return: the next key, -1 if none has fully arrived
+        """
+        while len(self.__pending) > 0:
+            if self.__started is None:
+                self.__started = self.__clock()
+            incomplete = self.__incomplete()
+            if incomplete and (self.__clock() - self.__started) * 1000 < self.__escape_timeout:
+                return -1
+            key, length = self.__match(incomplete)
+            self.__pending = self.__pending[length:]
+            if key == -1:
+                self.unknown += 1
+                self.__started = None
+                continue
+            self.last_latency = self.__clock() - self.__started
+            self.latency.record(self.last_latency)
+            self.__started = None
+            return key
+        return -1
+
+    def key_code(self, code: int) -> int:
+        """
+        :param code: a key curses decoded itself, as getch returns it with keypad on
+        :return: the key, with the value KeyMap gives it
+        """
+        return self.__codes.get(code, code)
+
+    # Private
+
+    def __incomplete(self) -> bool:
+        """
+        :return: whether the bytes pending start with a key that has only partly arrived
+        """
+        pending = self.__pending
+        if pending[:1] == b'\x1b':
+            return len(pending) == 1 or pending == b'\x1bO' or self.__csi_length(pending) == 0
+        return len(pending) < self.__utf8_length(pending[0])
+
+    def __match(self, incomplete: bool):
+        """
+        :param incomplete: whether the key pending gave up waiting for the rest of its bytes
+        :return: the key at the start of the bytes pending, -1 to drop them, and how many bytes it takes
+        """
+        pending = self.__pending
+        if pending[:1] == b'\x1b':
+            length = self.__csi_length(pending)
+            if pending[1:2] == b'O':
+                length = 3
+            if incomplete or length <= 0:
+                # lone escape, or followed by a key of its own
+                return self.__escape, 1
+            return self.__keys.get(pending[:length], -1), length
+        key = self.__keys.get(pending[:1])
+        if key is not None:
+            return key, 1
+        # one character, however many bytes it takes
+        length = self.__utf8_length(pending[0])
+        try:
+            return ord(pending[:length].decode('utf-8')), length
+        except UnicodeDecodeError:
+            return pending[0], 1
+
+    @staticmethod
+    def __csi_length(pending: bytes) -> int:
+        """
+        :return: length of the control sequence pending starts with, 0 if it hasn't ended, -1 if it isn't one
+        """
+        if pending[1:2] != b'[':
+            return -1
+        for index in range(2, len(pending)):
+            byte = pending[index]
+            if 0x40 <= byte <= 0x7e:
+                return index + 1
+            if not 0x20 <= byte <= 0x3f:
+                return -1
+        return 0
+
+    @staticmethod
+    def __utf8_length(lead: int) -> int:
+        if lead >= 0xf0:
+            return 4
+        if lead >= 0xe0:
+            return 3
+        if lead >= 0xc0:
+            return 2
+        return 1
@@ -0,0 +1,202 @@
+"""
+Key logs record the keys of an editing session so it can be replayed headless and profiled
+The first line is a JSON header, then one JSON array per key: [seconds since the start, key, rows, columns]
+"""
+from nestingnote.view import View
+from nestingnote.styles import Styles
+from nestingnote.model import Model
+from nestingnote.controller import Controller
+from typing import List, Optional, Tuple
+import cProfile
+import io
+import json
+import os
+import pstats
+import shutil
+import tempfile
+import time
+
+
+_header_key = 'nestingnote_keys'
+
+
+class KeyRecorder(View):
+    """
+    Passes everything through to view, writing each key read to a key log
+    """
+
+    def __init__(self, view: View, log_path: str, file_path: str):
+        """
+        :param file_path: note being edited, recorded so the log can be replayed against it
+        """
+        self.__view = view
+        self.__log = open(log_path, 'w')
+        self.__start = time.monotonic()
+        self.__log.write(json.dumps({_header_key: 1, 'file': os.path.abspath(file_path)}) + '\n')
+        self.__log.flush()
+
+    def close(self):
+        self.__log.close()
+
+    @property
+    def num_columns(self):
+        return self.__view.num_columns
+
+    @property
+    def num_rows(self):
+        return self.__view.num_rows
+
+    def addstr(self, y: int, x: int, string: str, style: Styles):
+        self.__view.addstr(y, x, string, style)
+
+    def move_cursor(self, y: int, x: int):
+        self.__view.move_cursor(y, x)
+
+    def clear(self):
+        self.__view.clear()
+
+    @property
+    def input_char(self) -> int:
+        key = self.__view.input_char
+        if key != -1:
+            # timeouts depend on how fast the machine is, replaying them wouldn't be deterministic
+            record = [round(time.monotonic() - self.__start, 6), key, self.__view.num_rows, self.__view.num_columns]
+            self.__log.write(json.dumps(record) + '\n')
+            # flushed every key so a session that crashes is still recorded
+            self.__log.flush()
+        return key
+
+    def set_input_timeout(self, milliseconds: int):
+        self.__view.set_input_timeout(milliseconds)
+
+    def signal_user_error(self):
+        self.__view.signal_user_error()
+
+    def refresh(self):
+        self.__view.refresh()
+
+    def update_size(self):
+        self.__view.update_size()
+
+    @property
+    def decode_seconds(self) -> Optional[float]:
+        return self.__view.decode_seconds
+
+    @property
+    def input_fds(self) -> List[int]:
+        return self.__view.input_fds
+
+
+class ReplayFinished(Exception):
+    pass
+
+
+class ReplayView(View):
+    """
+    Headless view that types the keys of a key log, at the terminal size they were typed at
+    While a file is opening it reports no key until the file is read, so replays don't depend on timing.
+    """
+
+    def __init__(self, keys: List[Tuple[float, int, int, int]]):
+        self.__keys = keys
+        self.__next = 0
+        self.__timeout = -1
+
+    @property
+    def keys_replayed(self) -> int:
+        return self.__next
+
+    @property
+    def __current(self) -> Tuple[float, int, int, int]:
+        return self.__keys[min(self.__next, len(self.__keys) - 1)]
+
+    @property
+    def num_columns(self):
+        if len(self.__keys) == 0:
+            return 80
+        return self.__current[3]
+
+    @property
+    def num_rows(self):
+        if len(self.__keys) == 0:
+            return 24
+        return self.__current[2]
+
+    def addstr(self, y: int, x: int, string: str, style: Styles):
+        pass
+
+    def move_cursor(self, y: int, x: int):
+        pass
+
+    def clear(self):
+        pass
+
+    @property
+    def input_char(self) -> int:
+        if self.__timeout == 0:
+            return -1
+        if self.__next == len(self.__keys):
+            raise ReplayFinished()
+        key = self.__keys[self.__next][1]
+        self.__next += 1
+        return key
+
+    def set_input_timeout(self, milliseconds: int):
+        self.__timeout = milliseconds
+
+    def signal_user_error(self):
+        pass
+
+    def refresh(self):
+        pass
+
+
+def read_log(log_path: str) -> Tuple[dict, List[Tuple[float, int, int, int]]]:
+    """
+    :return: the header and the keys of a key log
+    """
+    with open(log_path, 'r') as log:
+        header = json.loads(log.readline())
+        if _header_key not in header:
+            raise Exception("{} is not a key log".format(log_path))
+        keys = [tuple(json.loads(line)) for line in log if line.strip() != '']
+    return header, keys
+
+
+def replay(log_path: str, file_path: str = None, profile: bool = False, hot_functions: int = 20) -> str:
+    """
+    Replays a key log against a copy of a note, so saves in the log don't change it
+    :param file_path: note to replay against, the one that was recorded if None
+    :param profile: run under cProfile and report the functions that took the most time
+    :return: report of the time taken
+    """
+    header, keys = read_log(log_path)
+    if file_path is None:
+        file_path = header['file']
+    with tempfile.TemporaryDirectory() as directory:
+        copy_path = os.path.join(directory, os.path.basename(file_path))
+        if os.path.exists(file_path):
+            shutil.copyfile(file_path, copy_path)
+        view = ReplayView(keys)
+        profiler = cProfile.Profile() if profile else None
+        start = time.perf_counter()
+        if profiler is not None:
+            profiler.enable()
+        try:
+            controller = Controller(Model(view, copy_path))
+            controller.run()
+        except (ReplayFinished, SystemExit):
+            pass
+        finally:
+            if profiler is not None:
+                profiler.disable()
+        elapsed = time.perf_counter() - start
+    recorded = keys[-1][0] if len(keys) > 0 else 0
+    report = io.StringIO()
+    report.write('Replayed {} of {} keys against {} in {:.3f}s ({:.3f}s when recorded)\n'
+                 .format(view.keys_replayed, len(keys), file_path, elapsed, recorded))
+    report.write(controller.latency.summary() + '\n')
+    if profiler is not None:
+        stats = pstats.Stats(profiler, stream=report)
+        stats.sort_stats(pstats.SortKey.TIME).print_stats(hot_functions)
+    return report.getvalue()
@@ -0,0 +1,152 @@
+from typing import Dict, List
+import json
+import math
+
+
+class LatencyHistogram(object):
+    """
+    Counts of durations in logarithmic buckets, each a quarter of a doubling wide
+    Percentiles are accurate to the width of a bucket, about 19%, and memory doesn't grow with the number of samples.
+    """
+
+    # upper bound of the first bucket, in seconds
+    __smallest = 1e-6
+
+    __buckets_per_doubling = 4
+
+    def __init__(self):
+        self.__buckets: Dict[int, int] = {}
+        self.__count = 0
+        self.__total = 0.0
+        self.__max = 0.0
+
+    @property
+    def count(self) -> int:
+        return self.__count
+
+    @property
+    def total(self) -> float:
+        return self.__total
+
+    @property
+    def max(self) -> float:
+        return self.__max
+
+    def record(self, seconds: float):
+        bucket = self.__bucket(seconds)
+        self.__buckets[bucket] = self.__buckets.get(bucket, 0) + 1
+        self.__count += 1
+        self.__total += seconds
+        self.__max = max(self.__max, seconds)
+
+    def merge(self, other):
+        for bucket, count in other.__buckets.items():
+            self.__buckets[bucket] = self.__buckets.get(bucket, 0) + count
+        self.__count += other.__count
+        self.__total += other.__total
+        self.__max = max(self.__max, other.__max)
+
+    def percentile(self, percent: float) -> float:
+        """
+        :return: seconds that percent of the samples took at most, 0 without samples
+        """
+        if self.__count == 0:
+            return 0.0
+        rank = math.ceil(self.__count * percent / 100)
+        seen = 0
+        for bucket in sorted(self.__buckets):
+            seen += self.__buckets[bucket]
+            if seen >= rank:
+                return min(self.__upper_bound(bucket), self.__max)
+        return self.__max
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            'count': self.__count,
+            'p50': self.percentile(50),
+            'p95': self.percentile(95),
+            'p99': self.percentile(99),
+            'max': self.__max,
+        }
+
+    def __bucket(self, seconds: float) -> int:
+        if seconds <= self.__smallest:
+            return 0
+        return math.ceil(math.log2(seconds / self.__smallest) * self.__buckets_per_doubling)
+
+    def __upper_bound(self, bucket: int) -> float:
+        return self.__smallest * 2 ** (bucket / self.__buckets_per_doubling)
+
+
+class LatencyStats(object):
+    """
+    Histograms of the time each key spends in each phase of the controller loop, kept per command class
+    """
+
+    phases = ('decode', 'lookup', 'execute', 'display')
+
+    def __init__(self):
+        # command class name -> phase -> histogram
+        self.__commands: Dict[str, Dict[str, LatencyHistogram]] = {}
+
+    @property
+    def commands(self) -> List[str]:
+        return sorted(self.__commands)
+
+    def record(self, command: str, **phases: float):
+        """
+        :param phases: seconds spent in each phase, keyed by phase name
+        """
+        histograms = self.__commands.get(command)
+        if histograms is None:
+            histograms = {phase: LatencyHistogram() for phase in self.phases}
+            self.__commands[command] = histograms
+        for phase, seconds in phases.items():
+            histograms[phase].record(seconds)
+
+    def histogram(self, command: str = None, phase: str = None) -> LatencyHistogram:
+        """
+        :return: the samples of command, or of every command if None, in phase, or in all phases combined if None
+        """
+        combined = LatencyHistogram()
+        for name, histograms in self.__commands.items():
+            if command is not None and name != command:
+                continue
+            for histogram_phase, histogram in histograms.items():
+                if phase is None or histogram_phase == phase:
+                    combined.merge(histogram)
+        return combined
+
+    def summary(self) -> str:
+        """
+        :return: one line for the banner: percentiles of each phase over all keys, and the slowest command
+        """
+        keys = self.histogram(phase='execute').count
+        if keys == 0:
+            return 'No keys timed yet'
+        parts = ['{} keys'.format(keys)]
+        for phase in self.phases:
+            histogram = self.histogram(phase=phase)
+            if histogram.count == 0:
+                # keys aren't decoded by every view
+                continue
+            parts.append('{} {}/{}/{}/{}'.format(phase, *(self.__format(histogram.percentile(percent))
+                                                           for percent in (50, 95, 99)),
+                                                 self.__format(histogram.max)))
+        slowest = max(self.__commands, key=lambda command: self.histogram(command).max)
+        parts.append('slowest {}'.format(slowest))
+        return 'p50/p95/p99/max  ' + '  '.join(parts)
+
+    def to_dict(self) -> dict:
+        return {command: {phase: histogram.summary() for phase, histogram in histograms.items()}
+                for command, histograms in sorted(self.__commands.items())}
+
+    def dump(self, file_path: str):
+        with open(file_path, 'w') as file:
+            json.dump(self.to_dict(), file, indent=4)
+
+    @staticmethod
+    def __format(seconds: float) -> str:
+        if seconds < 1e-3:
+            return '{:.0f}us'.format(seconds * 1e6)
+        return '{:.1f}ms'.format(seconds * 1e3)
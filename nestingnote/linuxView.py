@@ -1,32 +1,71 @@
 import curses
+import os
+import sys
 from abc import ABC
 
 from nestingnote.styles import Styles
 from nestingnote.view import View
+from nestingnote.keyDecoder import KeyDecoder
+from typing import List, Tuple
 
 
 class LinuxView(View, ABC):
 
-    def __init__(self, window):
+    def __init__(self, window, escape_timeout: int = 25, decode_bytes: bool = os.name == 'posix'):
+        """
+        :param escape_timeout: milliseconds to wait for the rest of an escape sequence, see KeyDecoder
+        :param decode_bytes: whether keys arrive as the bytes an xterm-like terminal sends, as on POSIX, rather than
+        as keys curses reads from the console, as PDCurses does on Windows
+        """
         self.__window = window
+        # keys are decoded from the bytes the terminal sends rather than by curses, which waits long after an Esc,
+        # unless there are no such bytes to decode
+        window.keypad(not decode_bytes)
+        if not decode_bytes and hasattr(curses, 'set_escdelay'):
+            curses.set_escdelay(escape_timeout)
+        self.__decoder = KeyDecoder(escape_timeout)
+        self.__timeout = -1
         curses.init_pair(Styles.ODD, curses.COLOR_CYAN, curses.COLOR_BLACK)
         curses.init_pair(Styles.EVEN, curses.COLOR_WHITE, curses.COLOR_BLACK)
         curses.init_pair(Styles.HEADER, curses.COLOR_RED, curses.COLOR_BLACK)
         curses.init_pair(Styles.COLLAPSED_HEADER, curses.COLOR_WHITE, curses.COLOR_RED)
         curses.init_pair(Styles.BANNER, curses.COLOR_WHITE, curses.COLOR_CYAN)
+        # looked up once rather than on every write
+        self.__attributes = {style: curses.color_pair(style) for style in Styles}
+        # read once rather than on every access, until the terminal is resized
+        self.__rows, self.__columns = window.getmaxyx()
 
     @property
     def num_columns(self):
-        rows, cols = self.__window.getmaxyx()
-        return cols
+        return self.__columns
 
     @property
     def num_rows(self):
-        rows, cols = self.__window.getmaxyx()
-        return rows
+        return self.__rows
+
+    def update_size(self):
+        self.__rows, self.__columns = self.__window.getmaxyx()
+
+    def _attribute(self, style: Styles) -> int:
+        return self.__attributes[style]
 
     def addstr(self, y: int, x: int, string: str, style: Styles):
-        self.__window.addstr(y, x, string, curses.color_pair(style))
+        self.__window.addstr(y, x, string, self.__attributes[style])
+
+    def draw_line(self, y: int, runs: List[Tuple[str, Styles]]):
+        x = 0
+        for text, style in runs:
+            try:
+                self.__window.addstr(y, x, text, self.__attributes[style])
+            except curses.error:
+                # writing the bottom right corner moves the cursor off the window, the text is still written
+                pass
+            x += len(text)
+
+    def end_frame(self):
+        # the whole frame goes to the terminal in one update
+        self.__window.noutrefresh()
+        curses.doupdate()
 
     def move_cursor(self, y: int, x: int):
         self.__window.move(y, x)
@@ -36,7 +75,37 @@ class LinuxView(View, ABC):
 
     @property
     def input_char(self) -> int:
-        return self.__window.getch()
+        key = self.__decoder.decode()
+        while key == -1:
+            # after the first byte of a key, only wait as long as the rest of it may take
+            waiting = self.__decoder.waiting
+            self.__window.timeout(self.__decoder.time_left if waiting else self.__timeout)
+            byte = self.__window.getch()
+            if byte > 0xff:
+                # a key curses decoded itself, with keypad on, or a resize, which curses always reports
+                return self.__decoder.key_code(byte)
+            if byte != -1:
+                self.__decoder.feed(bytes([byte]))
+            elif not waiting:
+                return -1
+            key = self.__decoder.decode()
+        return key
+
+    @property
+    def input_fds(self) -> List[int]:
+        # curses reads keys from standard input
+        return [sys.stdin.fileno()]
+
+    @property
+    def decoder(self) -> KeyDecoder:
+        return self.__decoder
+
+    @property
+    def decode_seconds(self) -> float:
+        return self.__decoder.last_latency
+
+    def set_input_timeout(self, milliseconds: int):
+        self.__timeout = milliseconds
 
     def refresh(self):
         self.__window.refresh()
@@ -0,0 +1,150 @@
+from nestingnote.nestedlist import NestedList
+from typing import Dict, List, Tuple
+import sys
+
+
+class MemoryReport(object):
+    """
+    Where the memory of a document goes: nodes, rows, field strings and the columns shared by sibling groups
+    Only what is in memory is counted, the children of nodes whose children are on disk or unread aren't loaded.
+    Sizes are from sys.getsizeof, so they leave out allocator overhead and count shared strings once per use.
+    """
+
+    def __init__(self, root: NestedList, top_groups: int = 10):
+        """
+        :param top_groups: number of sibling groups to list, largest first
+        """
+        self.nodes = 0
+        self.deferred = 0
+        self.columns = 0
+        self.counter_entries = 0
+        self.field_chars = 0
+        self.node_bytes = 0
+        self.row_bytes = 0
+        self.string_bytes = 0
+        self.column_bytes = 0
+        # level -> [nodes, field characters, bytes]
+        self.levels: Dict[int, List[int]] = {}
+        self.__top_groups = top_groups
+        # id of the shared columns list -> [first fields, level, nodes, columns, counter entries, bytes]
+        self.__groups: Dict[int, list] = {}
+        self.__walk(root)
+
+    @property
+    def total_bytes(self) -> int:
+        return self.node_bytes + self.row_bytes + self.string_bytes + self.column_bytes
+
+    @property
+    def groups(self) -> List[list]:
+        """
+        :return: [first fields, level, nodes, columns, counter entries, bytes] of the largest sibling groups
+        """
+        groups = sorted(self.__groups.values(), key=lambda group: group[5], reverse=True)
+        return groups[:self.__top_groups]
+
+    @property
+    def sibling_groups(self) -> int:
+        return len(self.__groups)
+
+    def summary(self) -> str:
+        """
+        :return: one line for the banner
+        """
+        return '{} lines, {} columns, {} in memory: nodes {}, rows {}, text {}, columns {}'.format(
+            self.nodes, self.columns, self.__format(self.total_bytes), self.__format(self.node_bytes),
+            self.__format(self.row_bytes), self.__format(self.string_bytes), self.__format(self.column_bytes))
+
+    def format(self, traced: Tuple[int, int] = None) -> str:
+        """
+        :param traced: current and peak bytes from tracemalloc.get_traced_memory, if it was tracing
+        :return: the full report
+        """
+        lines = [self.summary(),
+                 '{} sibling groups, {} width counter entries, {} field characters, {} nodes with children not loaded'
+                 .format(self.sibling_groups, self.counter_entries, self.field_chars, self.deferred)]
+        if traced is not None:
+            lines.append('tracemalloc: {} allocated, {} at peak'.format(self.__format(traced[0]),
+                                                                        self.__format(traced[1])))
+        lines.append('')
+        lines.append('{:>5} {:>10} {:>12} {:>10}'.format('level', 'lines', 'characters', 'bytes'))
+        for level, (nodes, chars, size) in sorted(self.levels.items()):
+            lines.append('{:>5} {:>10} {:>12} {:>10}'.format(level, nodes, chars, self.__format(size)))
+        lines.append('')
+        lines.append('{:>5} {:>10} {:>8} {:>9} {:>10}  {}'.format('level', 'lines', 'columns', 'counters', 'bytes',
+                                                                   'first line'))
+        for fields, level, nodes, columns, entries, size in self.groups:
+            lines.append('{:>5} {:>10} {:>8} {:>9} {:>10}  {}'.format(level, nodes, columns, entries,
+                                                                       self.__format(size), ' '.join(fields)[:40]))
+        return '\n'.join(lines)
+
+    def to_dict(self) -> dict:
+        return {
+            'nodes': self.nodes,
+            'deferred': self.deferred,
+            'columns': self.columns,
+            'counter_entries': self.counter_entries,
+            'field_chars': self.field_chars,
+            'bytes': {'nodes': self.node_bytes, 'rows': self.row_bytes, 'strings': self.string_bytes,
+                      'columns': self.column_bytes, 'total': self.total_bytes},
+            'levels': {level: {'nodes': nodes, 'chars': chars, 'bytes': size}
+                       for level, (nodes, chars, size) in sorted(self.levels.items())},
+            'groups': [{'first': fields, 'level': level, 'nodes': nodes, 'columns': columns,
+                        'counter_entries': entries, 'bytes': size}
+                       for fields, level, nodes, columns, entries, size in self.groups],
+        }
+
+    def __walk(self, root: NestedList):
+        stack = [root]
+        while len(stack) > 0:
+            node = stack.pop()
+            if node.sibling is not node.null:
+                stack.append(node.sibling)
+            if node.child_loader is not None:
+                self.deferred += 1
+            elif node.child is not node.null:
+                stack.append(node.child)
+            self.__count(node)
+
+    def __count(self, node: NestedList):
+        columns = node._columns
+        group = self.__groups.get(id(columns))
+        if group is None:
+            group = [node.fields, node.level, 0, len(columns), 0, 0]
+            self.__groups[id(columns)] = group
+            self.columns += len(columns)
+            for column in columns:
+                group[4] += column.counter_size
+                group[5] += sys.getsizeof(column)
+            group[5] += sys.getsizeof(columns)
+            self.counter_entries += group[4]
+            self.column_bytes += group[5]
+        node_bytes = sys.getsizeof(node) + sys.getsizeof(vars(node))
+        row_bytes = sys.getsizeof(node._row)
+        chars = 0
+        string_bytes = 0
+        for field in node.fields:
+            chars += len(field)
+            string_bytes += sys.getsizeof(field)
+        self.nodes += 1
+        self.field_chars += chars
+        self.node_bytes += node_bytes
+        self.row_bytes += row_bytes
+        self.string_bytes += string_bytes
+        size = node_bytes + row_bytes + string_bytes
+        group[2] += 1
+        group[5] += size
+        level = self.levels.setdefault(node.level, [0, 0, 0])
+        level[0] += 1
+        level[1] += chars
+        level[2] += size
+
+    @staticmethod
+    def __format(size: int) -> str:
+        if size < 1024:
+            return '{}B'.format(size)
+        for unit in ('KB', 'MB'):
+            size /= 1024
+            if size < 1024:
+                return '{:.1f}{}'.format(size, unit)
+        size /= 1024
+        return '{:.1f}GB'.format(size)
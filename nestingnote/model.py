@@ -3,8 +3,21 @@ from nestingnote.view import View
 from nestingnote.styles import Styles
 from nestingnote.nestedlist import NestedList, NullNestedList
 from nestingnote.oneTimeBanner import OneTimeBanner
+from nestingnote.sqliteStore import SqliteStore
+from nestingnote.spillManager import SpillManager
+from nestingnote.records import RecordFormat, RecordReader
+from nestingnote.memoryReport import MemoryReport
+from nestingnote.counters import OperationCounters
+from nestingnote.renderList import RenderLine
+from nestingnote.wrapLayout import WrapLayout
+from nestingnote.undoLog import UndoLog
+from nestingnote.snapshot import Snapshot
+from contextlib import contextmanager
+from itertools import islice
+from typing import Iterator, List, Optional, Tuple
 import json
 import os.path
+import threading
 
 
 class Model(object):
@@ -13,7 +26,14 @@ class Model(object):
 
     __file_extension = '.nnn'
 
-    def __init__(self, view: View, file_path: str = None, root: NestedList = None):
+    __database_extension = '.nndb'
+
+    # records read from the file between keys while it's opening
+    __load_chunk = 2000
+
+    def __init__(self, view: View, file_path: str = None, root: NestedList = None, memory_budget: int = None,
+                 fold_level: int = None, show_counters: bool = False, soft_wrap: bool = False,
+                 undo_memory: int = 1 << 20):
         """
         Attributes
             max_lines: Maximum visible line count for `result_window`
@@ -37,11 +57,24 @@ class Model(object):
             |                                      |
             |                                      | <- page = 1 (0 and 1)
             └--------------------------------------┘
+        :param memory_budget: nodes to keep in memory before collapsed subtrees are spilled to disk
+        :param fold_level: when opening a file, collapse every line at this level or deeper that has children
+        :param show_counters: show the line counting the internal work done by the last key
+        :param soft_wrap: continue lines wider than the screen on the rows below instead of scrolling sideways
+        :param undo_memory: bytes the edits that can be undone may take, the oldest are forgotten past it
         """
         self.__banner = OneTimeBanner()
         self.__view = view
+        self.__show_counters = show_counters
+        # whether lines may have changed since they were last displayed, and where they were displayed from
+        self.__changed = True
+        self.__displayed_left = 0
         # The y coordinate that the top of the window starts at
         self.__top = 0
+        # breaks of wrapped lines, None when lines wider than the screen scroll sideways
+        self.__wrap = WrapLayout(view.num_columns) if soft_wrap else None
+        # with wrapping, the row of the line at the top of the window that is shown first
+        self.__top_row = 0
         # The x coordinate that the left of the window starts at
         self.__left = 0
         # current cursor position on window
@@ -49,14 +82,46 @@ class Model(object):
         self.__cursor_x = 0
         # Start of Nested List
         self.__root = NestedList()
+        # incremental storage, only used for database files
+        self.__store = None
+        # reads the rest of the file while it's opening
+        self.__loader = None
+        # edits made since the document was opened, and how many of them were saved
+        self.__edits = 0
+        self.__saved_edits = 0
+        # saves to the document's own file begun, a save in steps only replaces the file if none began after it
+        self.__saves = 0
+        self.__save_lock = threading.Lock()
+        # the save in steps finish_save marks done, with the edits it writes
+        self.__pending_save = None
+        self.__undo = UndoLog(undo_memory)
+        # transactions open, see transaction
+        self.__transactions = 0
+        self.__file_path = file_path
         if file_path is not None:
-            self.__file_path = file_path
-            if os.path.exists(file_path):
+            if file_path.endswith(self.__database_extension):
+                exists = os.path.exists(file_path)
+                self.__store = SqliteStore(file_path)
+                if exists:
+                    self.__root = self.__store.load()
+                    self.__fold(fold_level)
+                else:
+                    self.save()
+            elif os.path.exists(file_path) and RecordFormat.is_record_file(file_path):
+                # folding is left to the reader so it can skip the hidden lines
+                self.__start_loading(file_path, fold_level)
+            elif os.path.exists(file_path):
                 self.__root = self.load(file_path)
+                self.__fold(fold_level)
             else:
                 self.save(file_path)
         elif root is not None:
             self.__root = root
+        self.__spill = None
+        if memory_budget is not None:
+            self.__spill = SpillManager(memory_budget)
+        # size and time of the file when it was last read or written, to notice other programs changing it
+        self.__disk_stamp = self.__stamp()
 
     @property
     def __window_rows(self):
@@ -85,20 +150,117 @@ class Model(object):
         """x axis index of cursor within text (not screen)"""
         return self.__cursor_x + self.__left
 
+    @__abs_cursor_x.setter
+    def __abs_cursor_x(self, value: int):
+        self.__cursor_x = value - self.__left
+
     @property
     def __abs_cursor_y(self):
         """y axis index of cursor within lines (not screen)"""
         return self.__cursor_y + self.__top
 
+    def __has_line(self, index: int) -> bool:
+        """
+        :return: whether there is a visible line at index, without counting the lines after it
+        """
+        try:
+            self.__root.get_node(index)
+        except IndexError:
+            return False
+        return True
+
+    def __lines_from(self, index: int) -> Iterator[NestedList]:
+        """
+        :return: the visible lines from index on
+        """
+        return islice(iter(self.__root), index, None)
+
     def __get_node(self, offset: int = 0, start: int = None):
         if start is None:
             start = self.__abs_cursor_y
         return self.__root.get_node(start + offset)
 
-    @property
-    def input_char(self) -> int:
+    def __current_path(self) -> Tuple[int, ...]:
+        return self.__root.get_path(self.__abs_cursor_y)
+
+    def __record_text(self, field: int, old: str, new: str):
+        """
+        Records the edit that changes field of the current node from new back to old, only the part that differs
+        """
+        start = 0
+        while start < min(len(old), len(new)) and old[start] == new[start]:
+            start += 1
+        end = 0
+        while end < min(len(old), len(new)) - start and old[-1 - end] == new[-1 - end]:
+            end += 1
+        self.__undo.record(('text', self.__current_path(), field, start, new[start:len(new) - end],
+                            old[start:len(old) - end]))
+
+    def read_key(self, milliseconds: int = -1) -> int:
+        """
+        :param milliseconds: how long to wait for a key, negative to wait until one is pressed
+        :return: the next key, -1 if none was pressed in time
+        """
+        self.__view.set_input_timeout(milliseconds)
         return self.__view.input_char
 
+    @property
+    def input_fds(self) -> List[int]:
+        """
+        :return: file descriptors that become readable when a key can be read, see View.input_fds
+        """
+        return self.__view.input_fds
+
+    @property
+    def decode_seconds(self) -> Optional[float]:
+        """
+        :return: seconds the view took to decode the last key read, None if it doesn't decode keys
+        """
+        return self.__view.decode_seconds
+
+    @property
+    def loading(self) -> bool:
+        """
+        :return: whether the file is still being read
+        """
+        return self.__loader is not None
+
+    def __start_loading(self, file_path: str, fold_level: int = None):
+        """
+        Reads enough of the file to show the first screen, the rest is read by continue_loading
+        """
+        self.__loader = RecordReader(file_path, fold_level)
+        self.__loader.read_chunk(self.__load_chunk)
+        self.__root = self.__loader.root
+        if self.__loader.finished:
+            self.__loader = None
+        else:
+            self.__banner.message = 'Loading {}%'.format(int(self.__loader.progress * 100))
+
+    def __fold(self, fold_level: int):
+        if fold_level is not None:
+            self.__root.fold(fold_level)
+
+    def continue_loading(self):
+        """
+        Reads the next chunk of the file being opened
+        """
+        self.__changed = True
+        if self.__loader.read_chunk(self.__load_chunk):
+            self.__root = self.__loader.root
+            self.__loader = None
+        else:
+            self.__banner.message = 'Loading {}%'.format(int(self.__loader.progress * 100))
+
+    def __finish_loading(self):
+        """
+        For edits that need the whole document, or that move nodes the file is still being read into
+        """
+        if self.__loader is not None:
+            self.__loader.read()
+            self.__loader = None
+            self.__changed = True
+
     def __correct_lateral_bounds(self):
         """
         Puts cursor back in x-axis limits if outside
@@ -119,20 +281,27 @@ class Model(object):
 
     def move(self, direction: Direction, num_spaces: int = 1):
         if isinstance(direction, LateralDirection):
-            if self.__cursor_x == 0 and direction == LateralDirection.LEFT \
-                    or self.__cursor_x == self.__window_columns - 1 and direction == LateralDirection.RIGHT:
-                #if moving past right or left limits of screen
-                self.scroll(direction)
             self.__abs_cursor_x += direction * num_spaces
         else:  # VerticalDirection
-            if self.__cursor_y == 0 and direction == VerticalDirection.UP \
+            if self.loading and direction == VerticalDirection.DOWN \
+                    and not self.__has_line(self.__abs_cursor_y + 1):
+                # moving past the end of what has been read so far
+                self.__finish_loading()
+            if self.__wrap is not None:
+                # a row of the screen, which can be on the same line
+                self.__move_rows(direction * num_spaces)
+            elif self.__cursor_y == 0 and direction == VerticalDirection.UP \
                     or self.__cursor_y == self.__window_rows - 1 and direction == VerticalDirection.DOWN:
                 # if moving past top or bottom of screen
                 self.scroll(direction)
-            elif direction == VerticalDirection.UP or self.__abs_cursor_y < self.__root.count() - 1:
+            elif direction == VerticalDirection.UP or self.__has_line(self.__abs_cursor_y + 1):
                 # not moving past bottom of buffer
                 self.__cursor_y += direction * num_spaces
         self.__correct_lateral_bounds()
+        if self.__wrap is not None:
+            self.__scroll_to_cursor()
+        else:
+            self.__scroll_to_column()
 
     def move_end(self, direction: LateralDirection):
         spaces = self.__get_node().width
@@ -146,7 +315,10 @@ class Model(object):
         """Moves the screen
         Prevents the screen moving past the top or bottom of its text
         """
-        if isinstance(direction, LateralDirection):
+        if self.__wrap is not None:
+            if isinstance(direction, VerticalDirection):
+                self.__set_top(*self.__offset_row(self.__top, self.__top_row, direction))
+        elif isinstance(direction, LateralDirection):
             # if not at absolute right or left
             if direction == LateralDirection.LEFT and self.__left > 0 \
                     or direction == LateralDirection.RIGHT and self.__get_node().width > self.__right:
@@ -154,11 +326,18 @@ class Model(object):
         else: # Vertical Direction
             # if not at absolute top or bottom of lines
             if direction == VerticalDirection.UP and self.__top > 0 \
-                    or direction == VerticalDirection.DOWN and self.__root.count() > self.__bottom:
+                    or direction == VerticalDirection.DOWN and self.__has_line(self.__bottom):
                 self.__top += direction
 
     def page(self, direction: VerticalDirection):
         """Paging the window when pressing PgUp/PgDn keys"""
+        self.__finish_loading()
+        if self.__wrap is not None:
+            # the cursor stays on the same row of the screen
+            self.__move_rows(direction * self.__window_rows)
+            self.__set_top(*self.__offset_row(self.__top, self.__top_row, direction * self.__window_rows))
+            self.__correct_lateral_bounds()
+            return
         current_page = (self.__top + self.__cursor_y) // self.__window_rows
         next_page = current_page + direction
         # The last page may have fewer items than max lines,
@@ -180,46 +359,198 @@ class Model(object):
 
     def display(self):
         """Display the items on window"""
-        self.__view.clear()
-        for abs_row_index, node in enumerate(self.__root):
-            if abs_row_index < self.__top:
-                # lines before the top of the screen
-                continue
-            row_index = abs_row_index - self.__top
-            if row_index >= self.__window_rows:
-                break   # stop at end of window
-            # Lines within visible screen
-            indent_padding = node.indent_padding
-            chars_before_start = self.__left - len(indent_padding)
-            # padding within visible screen
-            indent_padding = indent_padding[self.__left:]
-            self.__view.addstr(row_index, 0, indent_padding, Styles.EVEN)
-            printed_chars = len(indent_padding)
-            for field_index, text in enumerate(node.row_iter):
-                """
-                style changes between field
-                indent precedes first field
-                All but last field has trailing tab
-                """
-                if field_index == 0:
-                    if node.collapsed:
-                        style = Styles.COLLAPSED_HEADER
-                    else:
-                        style = Styles.HEADER
-                elif field_index % 2:
-                    style = Styles.EVEN
-                else:
-                    style = Styles.ODD
-                if chars_before_start > 0:
-                    # If we haven't crossed the lateral start of the line
-                    text = text[chars_before_start:]
-                    chars_before_start -= len(text)
-                self.__view.addstr(row_index, printed_chars, text, style)
-                printed_chars += len(text)
+        if self.__wrap is not None:
+            cursor = self.__display_wrapped()
+        else:
+            self.__view.begin_frame(self.__top, self.__changed or self.__left != self.__displayed_left)
+            self.__changed = False
+            self.__displayed_left = self.__left
+            for abs_row_index, node in enumerate(self.__root):
+                if abs_row_index < self.__top:
+                    # lines before the top of the screen
+                    continue
+                row_index = abs_row_index - self.__top
+                if row_index >= self.__window_rows:
+                    break   # stop at end of window
+                if self.__spill is not None:
+                    self.__spill.touch(node)
+                if self.__view.is_line_current(row_index):
+                    # still on screen from an earlier frame
+                    continue
+                # only the fields from the one at the left edge of the screen are rendered
+                first_field = node.get_field_index(self.__left)
+                line_start = node.get_field_start(first_field) if first_field > 0 else 0
+                line = self.__render_line(node, first_field, self.__right - line_start)
+                self.__draw_line(row_index, line.clip(self.__left - line_start, self.__window_columns))
+            cursor = (self.__cursor_y, self.__cursor_x)
         # banner
         if self.__banner.has_message:
-            self.__view.addstr(self.__window_rows - 1, 0, self.__banner.message, Styles.BANNER)
-        self.__view.move_cursor(self.__cursor_y, self.__abs_cursor_x)
+            self.__draw_line(self.__window_rows - 1, [(self.__banner.message[:self.__window_columns - 1], Styles.BANNER)])
+            overlay_row = self.__window_rows - 2
+        else:
+            overlay_row = self.__window_rows - 1
+        if self.__show_counters:
+            overlay = OperationCounters.get_instance().summary()[:self.__window_columns - 1]
+            self.__draw_line(overlay_row, [(overlay.ljust(self.__window_columns - 1), Styles.BANNER)])
+        self.__view.move_cursor(*cursor)
+        self.__view.end_frame()
+
+    def __display_wrapped(self) -> Tuple[int, int]:
+        """
+        Draws the rows of the lines from the top of the window, wrapped to its width
+        Rows don't map to lines of the document one to one, so every row is drawn
+        :return: where the cursor goes on the screen
+        """
+        self.__view.begin_frame(self.__top, True)
+        self.__changed = False
+        self.__wrap.width = self.__window_columns
+        self.__scroll_to_cursor()
+        cursor = (0, 0)
+        row_index = 0
+        for line_index, node in enumerate(self.__lines_from(self.__top), self.__top):
+            if row_index >= self.__window_rows:
+                break
+            if self.__spill is not None:
+                self.__spill.touch(node)
+            first_row = self.__top_row if line_index == self.__top else 0
+            if line_index == self.__abs_cursor_y:
+                cursor_row, cursor_column = self.__wrap.locate(node, self.__abs_cursor_x)
+                cursor = (row_index + cursor_row - first_row, cursor_column)
+            for runs in self.__wrap.render(node, self.__render_line(node))[first_row:]:
+                if row_index >= self.__window_rows:
+                    break
+                self.__draw_line(row_index, runs)
+                row_index += 1
+        return cursor
+
+    def __offset_row(self, line: int, row: int, rows: int) -> Tuple[int, int]:
+        """
+        With wrapping, counts screen rows through the document without wrapping the lines in between again
+        :return: line and row of the screen row rows below row of line, above if negative, stopping at the first and
+        last rows of the document
+        """
+        if rows < 0:
+            # every line is at least one row, so the rows above are within this many lines
+            start = max(0, line + rows)
+            line_rows = [self.__wrap.rows(node) for node in islice(self.__lines_from(start), line - start)]
+            rows = -rows
+            while rows > row:
+                if line == start:
+                    return line, 0
+                rows -= row + 1
+                line -= 1
+                row = line_rows[line - start] - 1
+            return line, row - rows
+        last = (line, row)
+        for line, node in enumerate(self.__lines_from(line), line):
+            line_rows = self.__wrap.rows(node)
+            if row + rows < line_rows:
+                return line, row + rows
+            rows -= line_rows - row
+            row = 0
+            last = (line, line_rows - 1)
+        return last
+
+    def __set_top(self, line: int, row: int = 0):
+        """
+        Moves the top of the window to row of line, leaving the cursor on the same line of the document
+        """
+        self.__cursor_y += self.__top - line
+        self.__top = line
+        self.__top_row = row
+
+    def __move_rows(self, rows: int):
+        """
+        With wrapping, moves the cursor rows screen rows down, up if negative, keeping it in the same screen column
+        """
+        row, column = self.__wrap.locate(self.__get_node(), self.__abs_cursor_x)
+        line, row = self.__offset_row(self.__abs_cursor_y, row, rows)
+        self.__cursor_y = line - self.__top
+        self.__abs_cursor_x = self.__wrap.line_x(self.__get_node(), row, column)
+
+    def __scroll_to_cursor(self):
+        """
+        With wrapping, moves the top of the window the fewest rows that bring the cursor's row onto it
+        """
+        self.__top_row = min(self.__top_row, self.__wrap.rows(self.__get_node(start=self.__top)) - 1)
+        cursor = (self.__abs_cursor_y, self.__wrap.locate(self.__get_node(), self.__abs_cursor_x)[0])
+        if cursor < (self.__top, self.__top_row):
+            self.__set_top(*cursor)
+        elif cursor > self.__offset_row(self.__top, self.__top_row, self.__window_rows - 1):
+            self.__set_top(*self.__offset_row(*cursor, 1 - self.__window_rows))
+
+    def __scroll_to_column(self):
+        """
+        Moves the left of the window the fewest columns that bring the cursor onto it
+        """
+        x = self.__abs_cursor_x
+        if x < self.__left:
+            self.__left = x
+        elif x >= self.__right:
+            self.__left = x - self.__window_columns + 1
+        self.__abs_cursor_x = x
+
+    def __render_line(self, node: NestedList, first_field: int = 0, end: int = None) -> RenderLine:
+        """
+        :param first_field: the fields before it and the indent are left out
+        :return: the line of node from the start of first_field, up to end from there, all of it if end is None
+        """
+        line = RenderLine()
+        if first_field == 0:
+            line.add(node.indent_padding, Styles.EVEN)
+        for field_index in range(first_field, node.num_fields):
+            """
+            style changes between field
+            indent precedes first field
+            All but last field has trailing tab
+            """
+            if end is not None and len(line) >= end:
+                # the rest is off screen
+                break
+            if field_index == 0:
+                if node.collapsed:
+                    style = Styles.COLLAPSED_HEADER
+                else:
+                    style = Styles.HEADER
+            elif field_index % 2:
+                style = Styles.EVEN
+            else:
+                style = Styles.ODD
+            if field_index < node.num_fields - 1:
+                line.add(node.get_padded_field(field_index), style)
+            else:
+                line.add(node.get_field(field_index), style)
+        return line
+
+    def __draw_line(self, y: int, runs: List[Tuple[str, Styles]]):
+        counters = OperationCounters.get_instance()
+        counters.addstr += len(runs)
+        counters.bytes_drawn += sum(len(text) for text, _ in runs)
+        self.__view.draw_line(y, runs)
+
+    def resize(self):
+        """
+        Takes in the new size of the window after the terminal was resized
+        The cursor is kept on screen and every line is drawn again.
+        """
+        self.__view.update_size()
+        self.__changed = True
+        if self.__wrap is not None:
+            # the breaks are found again for the new width when the lines are displayed
+            self.__wrap.width = self.__window_columns
+            return
+        if self.__cursor_y >= self.__window_rows:
+            self.__top += self.__cursor_y - self.__window_rows + 1
+            self.__cursor_y = self.__window_rows - 1
+        if self.__cursor_x >= self.__window_columns:
+            self.__left += self.__cursor_x - self.__window_columns + 1
+            self.__cursor_x = self.__window_columns - 1
+
+    def toggle_counters(self):
+        """
+        Shows or hides a line counting the internal work done by the last key
+        """
+        self.__show_counters = not self.__show_counters
 
     def at_root(self):
         return self.__get_node() is self.__root
@@ -245,7 +576,12 @@ class Model(object):
         :param insertion: The string to insert
         """
         node: NestedList = self.__get_node()
+        field = node.get_field_index(self.__abs_cursor_x)
+        text = node.get_field(field)
         node.insert(self.__abs_cursor_x, insertion)
+        self.__record_text(field, text, node.get_field(field))
+        self.__changed = True
+        self.__edits += 1
         self.__abs_cursor_x += len(insertion)
 
     def delete(self, x_coord_offset: int):
@@ -254,7 +590,12 @@ class Model(object):
         :param x_coord_offset: the offset from the x_coord of the cursor where the character to be deleted is
         """
         node: NestedList = self.__get_node()
+        field = node.get_field_index(self.__abs_cursor_x + x_coord_offset)
+        text = node.get_field(field)
         node.delete_char_at(self.__abs_cursor_x + x_coord_offset)
+        self.__record_text(field, text, node.get_field(field))
+        self.__changed = True
+        self.__edits += 1
         # self.__abs_cursor_x += x_coord_offset
         self.move(LateralDirection.LEFT, x_coord_offset)
 
@@ -277,17 +618,30 @@ class Model(object):
         """
         :precondition: current node cannot be first child or root
         """
+        self.__finish_loading()
         assert not self.is_first_child()
         assert not self.at_root()
         previous: NestedList = self.get_previous_sibling()
         node: NestedList = self.__get_node()
+        path = self.__current_path()
+        reverse = 'unindent', path[:-1] + (path[-1] - 1, previous.num_children), node.collapsed
         node.indent(previous)
+        self.__undo.record(reverse)
+        self.__changed = True
+        self.__edits += 1
         # self.__abs_cursor_x += len(self.__tab)
         self.move(LateralDirection.RIGHT, len(self.__tab))
 
     def unindent_current_node(self):
+        self.__finish_loading()
         parent: NestedList = self.get_parent()
-        self.__get_node().unindent(parent)
+        node: NestedList = self.__get_node()
+        path = self.__current_path()
+        reverse = 'indent', path[:-2] + (path[-2] + 1,), node.num_children, node.collapsed
+        node.unindent(parent)
+        self.__undo.record(reverse)
+        self.__changed = True
+        self.__edits += 1
         # self.__abs_cursor_x -= len(self.__tab)
         self.move(LateralDirection.LEFT, len(self.__tab))
 
@@ -319,18 +673,28 @@ class Model(object):
 
     def split_field(self):
         node = self.__get_node()
+        field = node.get_field_index(self.__abs_cursor_x)
         node.split_field(self.__abs_cursor_x)
+        self.__undo.record(('join_fields', self.__current_path(), field))
+        self.__changed = True
+        self.__edits += 1
         # self.__abs_cursor_x += self.get_padding_len()
         self.move(LateralDirection.RIGHT, self.get_padding_len())
 
     def split_node(self):
+        self.__finish_loading()
         if self.at_line_end() or (not self.at_field_end(LateralDirection.LEFT)
                                   and not self.at_field_end(LateralDirection.RIGHT)):
             self.split_field()
         if self.at_field_end(LateralDirection.RIGHT):
             # cursor needs to be on the first field to move over for node.split()
             self.move(LateralDirection.RIGHT, self.get_padding_len())
-        self.__get_node().split(self.__abs_cursor_x)
+        node = self.__get_node()
+        field = node.get_field_index(self.__abs_cursor_x)
+        node.split(self.__abs_cursor_x)
+        self.__undo.record(('join', self.__current_path(), field))
+        self.__changed = True
+        self.__edits += 1
         self.move(VerticalDirection.DOWN)
         self.move(LateralDirection.LEFT, self.__abs_cursor_x)
 
@@ -338,14 +702,21 @@ class Model(object):
         """
         removes this row and adds its fields onto the previous row
         """
+        self.__finish_loading()
         to_remove = self.__get_node()
         assert to_remove.level == 0
         # prev_row: not necessarily the previous_sibling
         prev_row: NestedList = self.__get_node(offset=-1)
         prev_sibling: NestedList = self.get_previous_sibling()
+        path = self.__current_path()
+        reverse = ('uncombine', path[:-1] + (path[-1] - 1,), self.__root.get_path(self.__abs_cursor_y - 1),
+                   to_remove.num_fields, to_remove.num_children, to_remove.collapsed)
         self.move(VerticalDirection.UP)
         self.move_end(LateralDirection.RIGHT)
         to_remove.combine(prev_row, prev_sibling)
+        self.__undo.record(reverse)
+        self.__changed = True
+        self.__edits += 1
         self.move(LateralDirection.RIGHT, self.get_padding_len())
 
     def get_column_width(self) -> int:
@@ -410,7 +781,12 @@ class Model(object):
         node = self.__get_node()
         # movement must be calculated before node combination, even though only used by left combine
         movement = self.get_neighbor_padding_len(direction)
+        left_field = node.get_field_index(self.__abs_cursor_x) - (direction == LateralDirection.LEFT)
+        reverse = 'split_field', self.__current_path(), left_field, len(node.get_field(left_field))
         node.combine_fields(self.__abs_cursor_x, direction)
+        self.__undo.record(reverse)
+        self.__changed = True
+        self.__edits += 1
         if direction == LateralDirection.LEFT:
             # self.__abs_cursor_x -= movement
             self.move(LateralDirection.LEFT, movement)
@@ -418,28 +794,284 @@ class Model(object):
     def signal_user_error(self):
         self.__view.signal_user_error()
 
+    def show_message(self, message: str):
+        """
+        Shows message in the banner until the next display
+        """
+        self.__banner.message = message
+
     def get_level(self) -> int:
         return self.__get_node().level
 
     def toggle_current_node_collapsed(self):
-        self.__get_node().toggle_collapsed()
+        node = self.__get_node()
+        node.toggle_collapsed()
+        self.__undo.record(('toggle', self.__current_path()))
+        self.__changed = True
+        self.__edits += 1
+        if self.__spill is not None:
+            self.__spill.touch(node)
+
+    def undo_checkpoint(self):
+        """
+        Called before each key, so the edits it makes are undone together
+        """
+        if self.__transactions == 0:
+            self.__undo.checkpoint(self.cursor_position)
+
+    @contextmanager
+    def transaction(self):
+        """
+        Makes the edits inside one, e.g. those of a paste or a macro, even if they span keys: the rows they change
+        are put back into their columns once at the end rather than after every edit (NestedList.batch), and they
+        are undone together
+        """
+        if self.__transactions == 0:
+            self.__undo.checkpoint(self.cursor_position, merge=False)
+        self.__transactions += 1
+        try:
+            with NestedList.batch():
+                yield
+        finally:
+            self.__transactions -= 1
+
+    def undo(self):
+        self.__undo_or_redo(self.__undo.undo, 'Nothing to undo')
+
+    def redo(self):
+        self.__undo_or_redo(self.__undo.redo, 'Nothing to redo')
+
+    def __undo_or_redo(self, step, nothing: str):
+        """
+        :param step: UndoLog.undo or UndoLog.redo
+        :param nothing: shown when there is nothing to step through
+        """
+        # paths count the nodes still being read
+        self.__finish_loading()
+        with self.transaction():
+            position = step(self.__root)
+        if position is None:
+            self.show_message(nothing)
+            return
+        self.__changed = True
+        self.__edits += 1
+        self.__go_to(*position)
+
+    def __go_to(self, line: int, x: int):
+        """
+        Puts the cursor at x on line of the document, scrolling the window to it if it's off screen
+        """
+        line = min(line, self.__root.count() - 1)
+        if self.__wrap is not None:
+            self.__cursor_y = line - self.__top
+            self.__abs_cursor_x = x
+            self.__correct_lateral_bounds()
+            self.__scroll_to_cursor()
+            return
+        if not self.__top <= line < self.__bottom:
+            self.__top = max(0, line - self.__window_rows // 2)
+        self.__cursor_y = line - self.__top
+        self.__abs_cursor_x = x
+        self.__correct_lateral_bounds()
+        x = self.__abs_cursor_x
+        if not self.__left <= x < self.__right:
+            self.__left = max(0, x - self.__window_columns // 2)
+            self.__abs_cursor_x = x
+
+    @property
+    def undo_memory(self) -> int:
+        """
+        :return: bytes taken by the edits that can be undone and redone
+        """
+        return self.__undo.bytes
+
+    def enforce_memory_budget(self, force: bool = False):
+        """
+        Spills collapsed subtrees to disk if there are more nodes in memory than the budget allows
+        Nodes within a page of the screen keep their children in memory
+        """
+        if self.__spill is None or self.loading or not (self.__spill.due() or force):
+            return
+        protected = set()
+        for abs_row_index, node in enumerate(self.__root):
+            if abs_row_index >= self.__bottom + self.__window_rows:
+                break
+            if abs_row_index >= self.__top - self.__window_rows:
+                protected.add(id(node))
+        self.__spill.enforce(self.__root, protected)
+
+    @property
+    def cursor_position(self) -> (int, int):
+        """
+        :return: line and column of the cursor in the document
+        """
+        return self.__abs_cursor_y, self.__abs_cursor_x
+
+    @property
+    def line_count(self) -> int:
+        """
+        :return: number of visible lines read so far
+        """
+        return self.__root.count()
+
+    @property
+    def memory_summary(self) -> str:
+        """
+        :return: how many nodes are in memory and how many are spilled, None without a memory budget
+        """
+        if self.__spill is None:
+            return None
+        return self.__spill.summary()
+
+    def memory_report(self) -> MemoryReport:
+        """
+        :return: where the memory of the lines read so far goes
+        """
+        return MemoryReport(self.__root)
+
+    def show_memory_report(self):
+        message = self.memory_report().summary()
+        if self.__spill is not None:
+            message += ', ' + self.__spill.summary()
+        self.__banner.message = message
 
     @property
     def collapsed(self) -> bool:
         return self.__get_node().collapsed
 
     def save(self, file_path: str = None):
+        self.__finish_loading()
         if file_path is None:
             file_path = self.__file_path
-        if not file_path.endswith(self.__file_extension):
-            file_path += self.__file_extension
-        pickle = self.__root.serialize()
-        with open(file_path, 'w') as file:
-            file.write(json.dumps(pickle, indent=4))
+        if self.__store is not None and file_path == self.__file_path:
+            # only the changed nodes are written
+            self.__store.save(self.__root)
+        elif file_path.endswith(self.__database_extension):
+            if os.path.exists(file_path):
+                os.remove(file_path)
+            SqliteStore.write(self.__root, file_path)
+        else:
+            if not file_path.endswith(self.__file_extension):
+                file_path += self.__file_extension
+            with self.__save_lock:
+                if file_path == self.__own_file_path:
+                    # a save in steps still being written would replace this with an older document
+                    self.__saves += 1
+                RecordFormat.write(self.__root, file_path)
+        if file_path in (self.__file_path, self.__own_file_path):
+            self.__saved_edits = self.__edits
+            self.__disk_stamp = self.__stamp()
         self.__banner.message = 'Changes saved to {}'.format(file_path)
 
+    @property
+    def file_path(self) -> str:
+        return self.__file_path
+
+    @property
+    def modified(self) -> bool:
+        """
+        :return: whether there are edits that haven't been saved
+        """
+        return self.__edits != self.__saved_edits
+
+    def snapshot(self) -> Snapshot:
+        """
+        :return: the lines read so far as they are now, kept that way while they're edited until it's released
+        """
+        return Snapshot(self.__root)
+
+    def save_in_steps(self, lines_per_step: int = __load_chunk) -> Iterator[None]:
+        """
+        Saves the document as it is now to the file it was opened from, like save, yielding every lines_per_step
+        lines so other work can run in between
+        The lines are written from a snapshot and the steps only touch the file, so they can also run on another
+        thread while edits carry on, those are left for the next save. The file is written beside the old one and
+        only replaces it once it's whole, unless save wrote it meanwhile. Call finish_save on this thread once the
+        steps are done.
+        """
+        # a snapshot of part of the file would save only that part
+        self.__finish_loading()
+        self.__pending_save = None
+        if self.__store is not None:
+            # only the changed nodes are written, no need to split them up
+            self.__store.save(self.__root)
+            self.__saved_edits = self.__edits
+            self.__disk_stamp = self.__stamp()
+            return iter(())
+        with self.__save_lock:
+            self.__saves += 1
+            save = self.__saves
+        self.__pending_save = (save, self.__edits)
+        return self.__save_snapshot(self.snapshot(), save, lines_per_step)
+
+    def finish_save(self):
+        """
+        Marks the edits written by the last save_in_steps saved, once its steps are done
+        """
+        if self.__pending_save is None:
+            return
+        save, edits = self.__pending_save
+        self.__pending_save = None
+        if save == self.__saves:
+            self.__saved_edits = edits
+            self.__disk_stamp = self.__stamp()
+
+    @property
+    def __own_file_path(self) -> Optional[str]:
+        """
+        :return: the file the document is saved to as records
+        """
+        if self.__file_path is None or self.__file_path.endswith(self.__file_extension):
+            return self.__file_path
+        return self.__file_path + self.__file_extension
+
+    def __save_snapshot(self, snapshot: Snapshot, save: int, lines_per_step: int) -> Iterator[None]:
+        """
+        :param save: the save being written, the file is left alone if another began since
+        """
+        file_path = self.__own_file_path
+        partial_path = file_path + '.saving'
+        try:
+            lines = RecordFormat.lines(snapshot.root)
+            with open(partial_path, 'w') as file:
+                while True:
+                    chunk = list(islice(lines, lines_per_step))
+                    file.writelines(chunk)
+                    if len(chunk) < lines_per_step:
+                        break
+                    yield
+        finally:
+            snapshot.release()
+        with self.__save_lock:
+            if save == self.__saves:
+                os.replace(partial_path, file_path)
+            else:
+                os.remove(partial_path)
+
+    def changed_on_disk(self) -> bool:
+        """
+        :return: whether another program changed the file since it was last checked, read or written
+        """
+        stamp = self.__stamp()
+        if stamp == self.__disk_stamp:
+            return False
+        self.__disk_stamp = stamp
+        return True
+
+    def __stamp(self) -> Optional[Tuple[int, int]]:
+        """
+        :return: size and modification time of the file, None if there's no file
+        """
+        if self.__file_path is None or not os.path.exists(self.__file_path):
+            return None
+        status = os.stat(self.__file_path)
+        return status.st_size, status.st_mtime_ns
+
     def load(self, file_path: str) -> NestedList:
         assert file_path.endswith(self.__file_extension)
+        if RecordFormat.is_record_file(file_path):
+            return RecordReader(file_path).read()
+        # written before the record format
         with open(file_path, 'r') as file:
             pickle = json.load(file)
         return NestedList.deserialize(pickle)
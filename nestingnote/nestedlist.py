@@ -1,6 +1,30 @@
-from typing import List
+from typing import List, Tuple
+from abc import ABC, abstractmethod
 from nestingnote.directions import LateralDirection
 from nestingnote.simpleNestedList import SimpleNestedList
+from nestingnote.counters import OperationCounters
+
+
+class ChildLoader(ABC):
+    """
+    Supplies the children of a NestedList node that are not held in memory
+    Attached with NestedList.defer_children and used up the first time the children are needed
+    """
+
+    @abstractmethod
+    def load(self, parent):
+        """
+        Insert the deferred children under parent
+        :param parent: the NestedList the children belong to
+        """
+        pass
+
+    @abstractmethod
+    def serialize(self) -> dict:
+        """
+        :return: the deferred children as NestedList.serialize would return them from the first child
+        """
+        pass
 
 
 class NestedList(SimpleNestedList):
@@ -9,6 +33,8 @@ class NestedList(SimpleNestedList):
         super().__init__(fields, columns)
         # are the children hidden
         self.__collapsed = False
+        # supplies the children when they are not in memory
+        self.__child_loader = None
 
     @staticmethod
     def _polymorphic_init(fields: List[str] = None, columns=None):
@@ -38,33 +64,15 @@ class NestedList(SimpleNestedList):
         :param x_coord:
         :return: index of field that the x_coordinate falls within
         """
-        x_coord -= len(self.indent_padding)
-        for index, field in enumerate(self.row_iter):
-            ext_length = len(field)
-            if x_coord < ext_length:
-                return index
-            x_coord -= ext_length
-        return self.num_fields - 1
-
-    def __get_field_start(self, field_index: int) -> int:
-        """
-        :param field_index: Which field to get the start of
-        :return: The x-coord of the start of the field at the given index
-        """
-        assert 0 <= field_index < self.num_fields
-        count = len(self.indent_padding)
-        for i, field in enumerate(self.row_iter):
-            if i == field_index:
-                return count
-            count += len(field)
-        raise Exception("Unreachable")
+        return self._row.field_index(x_coord - len(self.indent_padding))
 
     def __get_field_end(self, field_index: int, direction: LateralDirection) -> int:
         """
         :param field_index: Which field to get the end of
         :return: The x-coord of the left or right end of the field at the given index
         """
-        start = self.__get_field_start(field_index)
+        assert 0 <= field_index < self.num_fields
+        start = self.get_field_start(field_index)
         if direction == LateralDirection.LEFT:
             return start
         else:
@@ -83,14 +91,12 @@ class NestedList(SimpleNestedList):
             get_rel_field_index(3) == 3
             get_rel_field_index(12) == 1
         """
-        x_coord -= len(self.indent_padding)
-        for index, field in enumerate(self.row_iter):
-            ext_length = len(field)
-            if x_coord < ext_length:
-                return x_coord
-            x_coord -= ext_length
-        # else assume at line end
-        return len(self.get_field(-1))
+        field_index = self.get_field_index(x_coord)
+        index = x_coord - self.get_field_start(field_index)
+        if field_index == self.num_fields - 1:
+            # else assume at line end
+            index = min(index, len(self.get_field(field_index)))
+        return index
 
     @property
     def null(self):
@@ -98,42 +104,145 @@ class NestedList(SimpleNestedList):
 
     @property
     def has_child(self) -> bool:
-        return self.child != self.null
+        return self.__child_loader is not None or self.child != self.null
+
+    @property
+    def child(self):
+        if self.__child_loader is not None:
+            self.__load_children()
+        return SimpleNestedList.child.fget(self)
+
+    @child.deleter
+    def child(self):
+        self._before_write()
+        self.__child_loader = None
+        SimpleNestedList.child.fdel(self)
+
+    def insert_child(self, texts: List[str] = None):
+        if self.__child_loader is not None:
+            self.__load_children()
+        return super().insert_child(texts)
+
+    def append_child(self, texts: List[str] = None):
+        if self.__child_loader is not None:
+            self.__load_children()
+        return super().append_child(texts)
+
+    @property
+    def child_loader(self) -> ChildLoader:
+        """
+        :return: the loader holding this node's children, None if they are in memory
+        """
+        return self.__child_loader
+
+    def defer_children(self, loader: ChildLoader):
+        """
+        Drops the children from memory. They are restored by loader the next time they are needed
+        """
+        SimpleNestedList.child.fdel(self)
+        self.__child_loader = loader
+
+    def __load_children(self):
+        self._before_write()
+        loader = self.__child_loader
+        self.__child_loader = None
+        loader.load(self)
 
     @property
     def collapsed(self) -> bool:
         return self.__collapsed
 
     def toggle_collapsed(self):
+        self._before_write()
         self.__collapsed = not self.__collapsed
 
+    def _state(self) -> tuple:
+        """
+        :return: what a Snapshot keeps of this node, its fields, whether it's collapsed, its child and sibling and
+            the loader of its children, without loading them
+        """
+        return tuple(self.fields), self.__collapsed, SimpleNestedList.child.fget(self), self.sibling, \
+            self.__child_loader
+
     def get_node(self, row: int):
         """
         :param row: the row the returned NestedList starts at relative to this node
         :returns: the NestedList that starts at row. None if out of bounds
         """
-        if row == 0:
-            return self
-        row -= 1
-        if not self.collapsed:
-            child_count = self.child.count()
-            if row < child_count:
-                return self.child.get_node(row)
-            row -= child_count
-        sibling_count = self.sibling.count()
-        if row < sibling_count:
-            return self.sibling.get_node(row)
-        raise IndexError("index is {} past end of NestedList".format(row))
+        OperationCounters.get_instance().get_node += 1
+        if row >= 0:
+            # iterative so long sibling lists don't exhaust the stack
+            for index, node in enumerate(self):
+                if index == row:
+                    return node
+        raise IndexError("index {} is out of bounds of NestedList".format(row))
+
+    def get_path(self, row: int) -> Tuple[int, ...]:
+        """
+        :param row: the row of a node relative to this node, as for get_node
+        :return: the index of the node among its siblings and of each of its ancestors, outermost first,
+            counted from this node, see get_node_at
+        """
+        OperationCounters.get_instance().get_node += 1
+        if row < 0:
+            raise IndexError("index {} is out of bounds of NestedList".format(row))
+        path = [0]
+        # the nodes on the path, to step back out of the last child of one
+        nodes = [self]
+        for _ in range(row):
+            node = nodes[-1]
+            if not node.collapsed and node.child is not self.null:
+                nodes.append(node.child)
+                path.append(0)
+                continue
+            while nodes[-1].sibling is self.null:
+                nodes.pop()
+                path.pop()
+                if len(nodes) == 0:
+                    raise IndexError("index {} is out of bounds of NestedList".format(row))
+            nodes[-1] = nodes[-1].sibling
+            path[-1] += 1
+        return tuple(path)
+
+    def get_node_at(self, path: Tuple[int, ...]):
+        """
+        Reverse of get_path, collapsed nodes included
+        :return: the node at path counted from this node
+        """
+        node = self
+        for depth, index in enumerate(path):
+            if depth > 0:
+                node = node.child
+            for _ in range(index):
+                node = node.sibling
+        if node is self.null:
+            raise IndexError("no node at {}".format(path))
+        return node
+
+    @property
+    def num_children(self) -> int:
+        children = 0
+        child = self.child
+        while child is not self.null:
+            children += 1
+            child = child.sibling
+        return children
 
     def count(self) -> int:
         """
         :return: the number of NestedList nodes starting from and including this
         skipping all collapsed children
         """
-        nodes: int = 1
-        if not self.__collapsed:
-            nodes += self.child.count()
-        nodes += self.sibling.count()
+        nodes: int = 0
+        stack = [self]
+        while len(stack) > 0:
+            node = stack.pop()
+            while node is not self.null:
+                nodes += 1
+                if not node.collapsed and node.child is not self.null:
+                    stack.append(node.child)
+                node = node.sibling
+        OperationCounters.get_instance().count_visits += nodes
         return nodes
 
     """
@@ -183,13 +292,25 @@ class NestedList(SimpleNestedList):
     Edit Node
     """
 
-    def indent(self, prev_sibling: SimpleNestedList):
+    def indent(self, prev_sibling: SimpleNestedList, children_kept: int = 0):
         """
         makes this node's sibling his child, and its sibling's sibling, its sibling
+        :param children_kept: how many of this node's first children stay its children, the others follow it as
+            its siblings
         """
         assert prev_sibling is not self.null
         new_child = prev_sibling.append_child(self.fields)
-        new_child._insert_sibling_deep(self.child)
+        new_child._take_store_row(self)
+        if children_kept > 0:
+            last_kept = self.child
+            for _ in range(children_kept - 1):
+                last_kept = last_kept.sibling
+            rest = last_kept.sibling
+            last_kept.delete_sibling_deep()
+            new_child._insert_child_deep(self.child)
+            new_child._insert_sibling_deep(rest)
+        else:
+            new_child._insert_sibling_deep(self.child)
         del prev_sibling.sibling.child
         del prev_sibling.sibling
 
@@ -199,6 +320,7 @@ class NestedList(SimpleNestedList):
         """
         assert parent is not self.null
         new_self = parent.insert_sibling(self.fields)
+        new_self._take_store_row(self)
         new_self._insert_child_deep(self.child)
         # append sibling family onto child
         new_self._append_child_deep(self.sibling)
@@ -224,10 +346,11 @@ class NestedList(SimpleNestedList):
         """
         field_index = self.get_field_index(x_coord)
         split_fields: List[str] = []
-        for index in range(self.num_fields - field_index):
-            field = self.get_field(field_index)
-            split_fields.append(field)
-            self.delete_field(field_index)
+        with self.batch():
+            for index in range(self.num_fields - field_index):
+                field = self.get_field(field_index)
+                split_fields.append(field)
+                self.delete_field(field_index)
         new_sibling = self.insert_sibling(split_fields)
         new_sibling._insert_child_deep(self.child)
         del self.child
@@ -237,16 +360,48 @@ class NestedList(SimpleNestedList):
         Removes this row from its tree and adds its fields to previous_node
         :param previous_node: The row to add self's fields to
         """
-        for field in self.fields:
-            previous_node.append_field(field)
+        with self.batch():
+            for field in self.fields:
+                previous_node.append_field(field)
         del prev_sibling.sibling
 
+    def uncombine(self, previous_node: SimpleNestedList, num_fields: int, num_children: int):
+        """
+        Reverse of combine, called on the prev_sibling given to it
+        Moves the last num_fields fields of previous_node and the last num_children children of this node to a new
+        sibling of this node
+        :return: the new sibling
+        """
+        fields = previous_node.fields[previous_node.num_fields - num_fields:]
+        with self.batch():
+            for _ in range(num_fields):
+                previous_node.delete_field(previous_node.num_fields - 1)
+        new_sibling = self.insert_sibling(fields)
+        if num_children > 0:
+            kept = self.num_children - num_children
+            if kept == 0:
+                new_sibling._insert_child_deep(self.child)
+                del self.child
+            else:
+                last_kept = self.child
+                for _ in range(kept - 1):
+                    last_kept = last_kept.sibling
+                new_sibling._insert_child_deep(last_kept.sibling)
+                last_kept.delete_sibling_deep()
+        return new_sibling
+
     # Serialization
 
     def serialize(self) -> dict:
+        if self.__child_loader is not None:
+            # don't pull deferred children into memory just to write them out
+            child = self.__child_loader.serialize()
+        else:
+            child = self.child.serialize()
         return {
             "fields": self.fields,
-            "child": self.child.serialize(),
+            "collapsed": self.collapsed,
+            "child": child,
             "sibling": self.sibling.serialize()
         }
 
@@ -257,6 +412,10 @@ class NestedList(SimpleNestedList):
         return node
 
     def _deserialize_helper(self, pickle: dict):
+        # files from before collapsed was saved have no collapsed key
+        if pickle.get('collapsed', False):
+            self._before_write()
+            self.__collapsed = True
         if pickle['child'] is not None:
             child = self.insert_child(pickle['child']['fields'])
             child._deserialize_helper(pickle['child'])
@@ -264,6 +423,21 @@ class NestedList(SimpleNestedList):
             sibling = self.insert_sibling(pickle['sibling']['fields'])
             sibling._deserialize_helper(pickle['sibling'])
 
+    def fold(self, level: int):
+        """
+        Collapses every node with children at or below level, starting from this node
+        """
+        stack = [self]
+        while len(stack) > 0:
+            node = stack.pop()
+            if node.sibling is not self.null:
+                stack.append(node.sibling)
+            if node.level >= level and node.has_child:
+                node._before_write()
+                node.__collapsed = True
+            if node.child_loader is None and node.child is not self.null:
+                stack.append(node.child)
+
 
 class NestedListIterator:
     def __init__(self, root: NestedList):
@@ -287,11 +461,16 @@ class NestedListIterator:
         first = FakeNestedList(root)
         self.previous: List[NestedList] = [first]
 
+    def __iter__(self):
+        return self
+
     def __next__(self):
-        next_node = self.previous[-1].child
-        if not isinstance(next_node, NullNestedList) and not self.previous[-1].collapsed:
-            self.previous.append(next_node)
-            return next_node
+        if not self.previous[-1].collapsed:
+            # check collapsed first so hidden children aren't loaded
+            next_node = self.previous[-1].child
+            if not isinstance(next_node, NullNestedList):
+                self.previous.append(next_node)
+                return next_node
         while len(self.previous) > 0:
             next_node = self.previous.pop().sibling
             if not isinstance(next_node, NullNestedList):
@@ -352,6 +531,10 @@ class NullNestedList(NestedList):
     def level(self):
         raise Exception("Not allowed for NullRow")
 
+    @property
+    def child_loader(self):
+        return None
+
     @property
     def last_sibling(self):
         raise Exception("Should not be called on NullNestedList")
@@ -0,0 +1,101 @@
+import curses
+import os
+
+from nestingnote.linuxView import LinuxView
+from nestingnote.view import View
+from nestingnote.styles import Styles
+from typing import List, Tuple
+
+
+class PadView(LinuxView):
+    """
+    Curses view that keeps a band of lines around the screen in a pad
+    Scrolling moves the part of the pad that is shown, so only the lines that come into view are drawn.
+    The pad is redrawn when lines change. Banners are drawn over the lines and redrawn over on the next frame.
+    """
+
+    # screens of lines held in the pad
+    __band_screens = 3
+
+    def __init__(self, window, escape_timeout: int = 25, decode_bytes: bool = os.name == 'posix'):
+        super().__init__(window, escape_timeout, decode_bytes)
+        self.__window = window
+        # painted once so reading keys from the window doesn't paint over the pad
+        window.refresh()
+        self.__size = None
+        self.__pad = None
+        # index in the document of the line in the first row of the pad
+        self.__pad_top = 0
+        # index in the document of the line at the top of the screen
+        self.__top = 0
+        # indexes in the document of the lines drawn in the pad
+        self.__current = set()
+        # document lines that a banner was drawn over
+        self.__covered = set()
+        self.__cursor = (0, 0)
+
+    @property
+    def __band(self) -> int:
+        return self.num_rows * self.__band_screens
+
+    def begin_frame(self, top: int, changed: bool):
+        if self.__size != (self.num_rows, self.num_columns):
+            self.__size = (self.num_rows, self.num_columns)
+            self.__pad = curses.newpad(self.__band + 1, self.num_columns)
+            self.__pad.scrollok(True)
+            changed = True
+        self.__current -= self.__covered
+        self.__covered = set()
+        if changed:
+            self.clear()
+        self.__top = top
+        if top < self.__pad_top or top + self.num_rows > self.__pad_top + self.__band:
+            self.__move_band(max(0, top - self.num_rows))
+
+    def is_line_current(self, row: int) -> bool:
+        return self.__top + row in self.__current
+
+    def addstr(self, y: int, x: int, string: str, style: Styles):
+        line = self.__top + y
+        row = line - self.__pad_top
+        if line not in self.__current:
+            # first write to the line this frame
+            self.__pad.move(row, 0)
+            self.__pad.clrtoeol()
+            self.__current.add(line)
+        if style == Styles.BANNER:
+            self.__covered.add(line)
+        string = string[:self.num_columns - x]
+        if len(string) > 0:
+            self.__pad.addstr(row, x, string, self._attribute(style))
+
+    def draw_line(self, y: int, runs: List[Tuple[str, Styles]]):
+        # each write goes through addstr to keep track of the lines in the pad
+        View.draw_line(self, y, runs)
+
+    def move_cursor(self, y: int, x: int):
+        self.__cursor = (y, x)
+
+    def clear(self):
+        if self.__pad is not None:
+            self.__pad.erase()
+        self.__current = set()
+
+    def end_frame(self):
+        y, x = self.__cursor
+        self.__pad.move(self.__top - self.__pad_top + y, min(x, self.num_columns - 1))
+        self.__pad.noutrefresh(self.__top - self.__pad_top, 0, 0, 0, self.num_rows - 1, self.num_columns - 1)
+        curses.doupdate()
+
+    def __move_band(self, pad_top: int):
+        """
+        Moves the band of lines held so that pad_top is its first line, keeping the lines that are still in it
+        """
+        shift = pad_top - self.__pad_top
+        if abs(shift) >= self.__band:
+            self.clear()
+        else:
+            self.__pad.scroll(shift)
+            first, last = pad_top, pad_top + self.__band
+            self.__current = {line for line in self.__current if first <= line < last}
+        self.__pad_top = pad_top
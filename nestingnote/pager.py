@@ -0,0 +1,324 @@
+from nestingnote.records import RecordFormat
+from nestingnote.view import View
+from nestingnote.styles import Styles
+from nestingnote.key import KeyMap, Key
+from typing import Iterator, List, Tuple
+
+
+class RecordIndex(object):
+    """
+    Random access to the records of a .nnn file without reading the whole file
+    Only the offset of every few records is remembered, filled in as the file is read.
+    """
+
+    # records between remembered offsets
+    __spacing = 256
+
+    def __init__(self, file_path: str):
+        self.__file = open(file_path, 'rb')
+        if self.__file.readline() != RecordFormat.header.encode('utf-8'):
+            self.__file.close()
+            raise Exception("{} is not in the record format. Open and save it with nestingnote to convert it"
+                            .format(file_path))
+        # offsets[i] is where record i * spacing starts
+        self.__offsets = [self.__file.tell()]
+        # number of records, None until the end of the file has been read
+        self.__length = None
+
+    def close(self):
+        self.__file.close()
+
+    @property
+    def length(self) -> int:
+        """
+        :return: number of records, None if the end of the file hasn't been reached yet
+        """
+        return self.__length
+
+    def seek(self, record: int) -> bool:
+        """
+        Positions the file at the start of record
+        :return: False if the file has fewer records
+        """
+        block = record // self.__spacing
+        while block >= len(self.__offsets) and self.__index_next_block():
+            pass
+        block = min(block, len(self.__offsets) - 1)
+        self.__file.seek(self.__offsets[block])
+        for skipped in range(record - block * self.__spacing):
+            if self.__file.readline() == b'':
+                self.__length = block * self.__spacing + skipped
+                return False
+        if self.__at_end():
+            self.__length = record
+            return False
+        return True
+
+    def lines(self, start: int) -> Iterator[Tuple[int, bytes]]:
+        """
+        :return: (record number, raw record) from start until the end of the file
+        Seeking the index while iterating invalidates the iterator
+        """
+        if not self.seek(start):
+            return
+        record = start
+        while True:
+            line = self.__file.readline()
+            if line == b'':
+                self.__length = record
+                return
+            yield record, line
+            record += 1
+
+    def read(self, record: int) -> Tuple[int, List[str]]:
+        """
+        :return: level and fields of record, None if past the end of the file
+        """
+        if not self.seek(record):
+            return None
+        level, fields, _ = RecordFormat.parse(self.__file.readline())
+        return level, fields
+
+    def subtree_end(self, record: int) -> int:
+        """
+        :return: the first record after record that isn't one of its descendants
+        """
+        level = None
+        for index, line in self.lines(record):
+            if level is None:
+                level = RecordFormat.parse_level(line)
+            elif RecordFormat.parse_level(line) <= level:
+                return index
+        return self.__length
+
+    def __at_end(self) -> bool:
+        position = self.__file.tell()
+        at_end = self.__file.read(1) == b''
+        self.__file.seek(position)
+        return at_end
+
+    def __index_next_block(self) -> bool:
+        """
+        Reads past one more block of records to remember where the next one starts
+        :return: False if the end of the file was reached first
+        """
+        if self.__length is not None:
+            return False
+        self.__file.seek(self.__offsets[-1])
+        for line_number in range(self.__spacing):
+            if self.__file.readline() == b'':
+                self.__length = (len(self.__offsets) - 1) * self.__spacing + line_number
+                return False
+        self.__offsets.append(self.__file.tell())
+        return True
+
+
+class Pager(object):
+    """
+    Read only view of a .nnn file that never holds more than a screen of it in memory
+    Records are shown as they are read from disk, fields are separated without aligning columns.
+    """
+
+    __tab = '    '
+
+    def __init__(self, view: View, file_path: str):
+        self.__view = view
+        self.__file_path = file_path
+        self.__index = RecordIndex(file_path)
+        # record at the top of the screen
+        self.__top = 0
+        self.__cursor_y = 0
+        # first record of each collapsed subtree -> first record after it
+        self.__collapsed = {}
+        # records saved collapsed that have been expanded
+        self.__expanded = set()
+        # records on screen, in order
+        self.__screen: List[int] = []
+        # digits typed after the go to line key, None when not going to a line
+        self.__goto = None
+
+    def run(self):
+        key_map = KeyMap.get_instance()
+        try:
+            while True:
+                self.display()
+                key = self.__view.input_char
+                if self.__goto is not None:
+                    self.__goto_key(key)
+                elif key in (ord('q'), key_map.value(Key.ESC)):
+                    return
+                elif key == key_map.value(Key.DOWN):
+                    self.move(1)
+                elif key == key_map.value(Key.UP):
+                    self.move(-1)
+                elif key == key_map.value(Key.PAGE_DOWN):
+                    self.move(self.__rows)
+                elif key == key_map.value(Key.PAGE_UP):
+                    self.move(-self.__rows)
+                elif key in (key_map.value(Key.CTRL_K), key_map.value(Key.ENTER)):
+                    self.toggle_collapsed()
+                elif key == ord('g'):
+                    self.__goto = ''
+                else:
+                    self.__view.signal_user_error()
+        finally:
+            self.__index.close()
+
+    @property
+    def __rows(self) -> int:
+        """lines of the file on screen, the last line of the window is the status bar"""
+        return self.__view.num_rows - 1
+
+    @property
+    def cursor_record(self) -> int:
+        return self.__screen[self.__cursor_y]
+
+    def visible(self, start: int) -> Iterator[Tuple[int, bytes]]:
+        """
+        :return: (record number, raw record) from start onward, skipping the insides of collapsed subtrees
+        """
+        record = start
+        while True:
+            end = None
+            for record, line in self.__index.lines(record):
+                yield record, line
+                if record not in self.__collapsed and record not in self.__expanded:
+                    self.__collapse_saved(record, line)
+                end = self.__collapsed.get(record)
+                if end is not None:
+                    break
+            if end is None:
+                return
+            record = end
+
+    def previous_visible(self, record: int) -> int:
+        """
+        :return: the visible record above record, record itself if it's the first
+        """
+        if record == 0:
+            return 0
+        record -= 1
+        # move out of the collapsed subtree hiding it
+        for start, end in sorted(self.__collapsed.items()):
+            if start < record < end:
+                return start
+        return record
+
+    def move(self, lines: int):
+        """
+        Moves the cursor by lines visible lines, scrolling when it leaves the screen
+        """
+        if lines > 0:
+            # visible records from the top of the screen to the destination
+            records = []
+            for record, _ in self.visible(self.__top):
+                records.append(record)
+                if len(records) > self.__cursor_y + lines:
+                    break
+            destination = min(self.__cursor_y + lines, len(records) - 1)
+            if destination < self.__rows:
+                self.__cursor_y = destination
+            else:
+                self.__top = records[destination - self.__rows + 1]
+                self.__cursor_y = self.__rows - 1
+        elif -lines <= self.__cursor_y:
+            self.__cursor_y += lines
+        else:
+            for _ in range(-lines - self.__cursor_y):
+                self.__top = self.previous_visible(self.__top)
+            self.__cursor_y = 0
+
+    def goto(self, record: int):
+        """
+        Puts record at the top of the screen, or the last record if the file is shorter
+        """
+        if self.__index.read(record) is None:
+            record = max(0, self.__index.length - 1)
+        for start, end in sorted(self.__collapsed.items()):
+            if start < record < end:
+                record = start
+                break
+        self.__top = record
+        self.__cursor_y = 0
+
+    def toggle_collapsed(self):
+        if len(self.__screen) == 0:
+            return
+        record = self.cursor_record
+        if record in self.__collapsed:
+            del self.__collapsed[record]
+            self.__expanded.add(record)
+            return
+        self.__expanded.discard(record)
+        end = self.__index.subtree_end(record)
+        if end > record + 1:
+            # collapsed subtrees inside this one are forgotten
+            for start in [start for start in self.__collapsed if record < start < end]:
+                del self.__collapsed[start]
+            self.__collapsed[record] = end
+
+    def display(self):
+        self.__view.clear()
+        self.__screen = []
+        for row_index, (record, line) in enumerate(self.visible(self.__top)):
+            if row_index >= self.__rows:
+                break
+            self.__screen.append(record)
+            level, fields, _ = RecordFormat.parse(line)
+            self.__display_line(row_index, level, fields, record in self.__collapsed)
+        self.__cursor_y = min(self.__cursor_y, max(0, len(self.__screen) - 1))
+        self.__view.addstr(self.__rows, 0, self.__status()[:self.__view.num_columns - 1], Styles.BANNER)
+        self.__view.move_cursor(self.__cursor_y, 0)
+
+    # Private
+
+    def __collapse_saved(self, record: int, line: bytes):
+        """
+        Collapses record if it was saved collapsed, using the count of descendants saved with it
+        """
+        descendants = RecordFormat.parse_descendants(line)
+        if descendants is not None and descendants > 0:
+            self.__collapsed[record] = record + descendants + 1
+
+    def __display_line(self, row_index: int, level: int, fields: List[str], collapsed: bool):
+        columns = self.__view.num_columns - 1
+        x = 0
+        texts = [self.__tab * level] + [field + self.__tab for field in fields[:-1]] + fields[-1:]
+        for index, text in enumerate(texts):
+            if x >= columns:
+                break
+            if index == 0:
+                style = Styles.EVEN
+            elif index == 1:
+                style = Styles.COLLAPSED_HEADER if collapsed else Styles.HEADER
+            elif index % 2:
+                style = Styles.ODD
+            else:
+                style = Styles.EVEN
+            text = text[:columns - x]
+            self.__view.addstr(row_index, x, text, style)
+            x += len(text)
+
+    def __status(self) -> str:
+        if self.__goto is not None:
+            return 'Go to line: {}'.format(self.__goto)
+        if len(self.__screen) == 0:
+            return self.__file_path
+        length = self.__index.length
+        return '{}  line {} of {}  g: go to line  ^K: collapse  q: quit'.format(
+            self.__file_path, self.cursor_record + 1, '?' if length is None else length)
+
+    def __goto_key(self, key: int):
+        key_map = KeyMap.get_instance()
+        if ord('0') <= key <= ord('9'):
+            self.__goto += chr(key)
+        elif key == key_map.value(Key.BACKSPACE):
+            self.__goto = self.__goto[:-1]
+        elif key == key_map.value(Key.ENTER):
+            if len(self.__goto) > 0:
+                self.goto(max(0, int(self.__goto) - 1))
+            self.__goto = None
+        elif key == key_map.value(Key.ESC):
+            self.__goto = None
+        else:
+            self.__view.signal_user_error()
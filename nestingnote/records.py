@@ -0,0 +1,330 @@
+from nestingnote.nestedlist import NestedList, ChildLoader
+from typing import Iterator, List, Optional, Tuple
+import json
+import os
+
+
+class RecordFormat(object):
+    """
+    The .nnn file format
+    A header line followed by one line per node in display order, each a JSON array: [level, fields]
+    Collapsed nodes have a third element, the number of descendant records that follow them,
+    so readers can skip over what is hidden.
+    Files can be read a line at a time without parsing the rest of the document.
+    Files from before the header was introduced are a single JSON document of NestedList.serialize.
+    """
+
+    header = '{"nestingnote": 2}\n'
+
+    @classmethod
+    def is_record_file(cls, file_path: str) -> bool:
+        with open(file_path, 'r') as file:
+            return file.readline() == cls.header
+
+    @staticmethod
+    def parse_level(line: bytes) -> int:
+        """
+        :return: the level of a record without parsing its fields
+        """
+        return int(line[1:line.index(b',')])
+
+    @staticmethod
+    def parse_descendants(line: bytes) -> Optional[int]:
+        """
+        :return: the number of descendants of a collapsed record, else None, without parsing its fields
+        """
+        line = line.rstrip()
+        # without a count the record ends with its fields, which are always an array
+        if line.endswith(b']]'):
+            return None
+        return int(line[line.rindex(b',') + 1:-1])
+
+    @staticmethod
+    def parse(line: bytes) -> Tuple[int, List[str], int]:
+        """
+        :return: level, fields, and the number of descendants if the record is collapsed, else None
+        """
+        record = json.loads(line)
+        if len(record) > 2:
+            return record[0], record[1], record[2]
+        return record[0], record[1], None
+
+    @classmethod
+    def lines(cls, root: NestedList) -> Iterator[str]:
+        """
+        :return: the lines of the file for the document starting at root, header included
+        """
+        yield cls.header
+        # lines held back until the number of descendants of the collapsed records among them is known
+        pending = []
+        # [index in pending, level, fields] of each collapsed record still being written, innermost last
+        open_records = []
+        for level, collapsed, fields in cls.__records(root):
+            while len(open_records) > 0 and open_records[-1][1] >= level:
+                cls.__close(pending, open_records.pop())
+            if len(open_records) == 0 and len(pending) > 0:
+                yield from pending
+                pending = []
+            if collapsed:
+                open_records.append([len(pending), level, fields])
+                pending.append(None)
+            elif len(open_records) > 0:
+                pending.append(cls.__line(level, fields))
+            else:
+                yield cls.__line(level, fields)
+        while len(open_records) > 0:
+            cls.__close(pending, open_records.pop())
+        yield from pending
+
+    @classmethod
+    def write(cls, root: NestedList, file_path: str):
+        with open(file_path, 'w') as file:
+            file.writelines(cls.lines(root))
+
+    @classmethod
+    def pickle(cls, lines: List[bytes]) -> dict:
+        """
+        :param lines: records of a node's descendants
+        :return: the descendants in the format of NestedList.serialize from the first child
+        """
+        first = {'child': None}
+        # dict the next record at each depth is attached to, and under which key
+        last = [(first, 'child')]
+        top_level = None
+        for line in lines:
+            level, fields, descendants = cls.parse(line)
+            if top_level is None:
+                top_level = level
+            depth = level - top_level
+            pickle = {'fields': fields, 'collapsed': descendants is not None, 'child': None, 'sibling': None}
+            del last[depth + 1:]
+            parent, key = last[depth]
+            parent[key] = pickle
+            last[depth] = (pickle, 'sibling')
+            last.append((pickle, 'child'))
+        return first['child']
+
+    @classmethod
+    def __close(cls, pending: List[str], record: list):
+        index, level, fields = record
+        pending[index] = cls.__line(level, fields, len(pending) - index - 1)
+
+    @staticmethod
+    def __records(root: NestedList) -> Iterator[Tuple[int, bool, List[str]]]:
+        """
+        :return: level, collapsed and fields of every node in display order, collapsed or not
+        """
+        # (node or pickle of deferred children, level)
+        stack = [(root, 0)]
+        while len(stack) > 0:
+            node, level = stack.pop()
+            if isinstance(node, dict):
+                yield level, node.get('collapsed', False), node['fields']
+                for key, child_level in (('sibling', level), ('child', level + 1)):
+                    if node[key] is not None:
+                        stack.append((node[key], child_level))
+                continue
+            yield level, node.collapsed, node.fields
+            if node.sibling is not node.null:
+                stack.append((node.sibling, level))
+            if node.child_loader is not None:
+                # write deferred children without reading them into nodes
+                pickle = node.child_loader.serialize()
+                if pickle is not None:
+                    stack.append((pickle, level + 1))
+            elif node.child is not node.null:
+                stack.append((node.child, level + 1))
+
+    @staticmethod
+    def __line(level: int, fields: List[str], descendants: int = None) -> str:
+        if descendants is None:
+            return json.dumps([level, fields]) + '\n'
+        return json.dumps([level, fields, descendants]) + '\n'
+
+
+class RecordReader(object):
+    """
+    Builds a NestedList from the records of a .nnn file, all at once or a chunk of records at a time
+    While reading in chunks, the nodes read so far can be used as long as the last ones aren't moved.
+    The descendants of collapsed records are kept as unparsed lines until they are expanded.
+    """
+
+    # records read at a time by read()
+    __chunk = 2000
+
+    def __init__(self, file_path: str, fold_level: int = None):
+        """
+        :param fold_level: collapse every record at this level or deeper that has descendants
+        """
+        self.__file = open(file_path, 'rb')
+        self.__size = os.path.getsize(file_path)
+        header = self.__file.readline()
+        self.__bytes_read = len(header)
+        if header != RecordFormat.header.encode('utf-8'):
+            self.__file.close()
+            raise Exception("{} is not a record file".format(file_path))
+        self.__builder = _RecordBuilder(self.__lines(), fold_level)
+        self.__finished = False
+
+    @property
+    def root(self) -> NestedList:
+        """
+        :return: the first node, None if no records have been read yet
+        """
+        return self.__builder.root
+
+    @property
+    def finished(self) -> bool:
+        return self.__finished
+
+    @property
+    def progress(self) -> float:
+        """
+        :return: fraction of the file read
+        """
+        if self.__size == 0:
+            return 1
+        return self.__bytes_read / self.__size
+
+    def read(self) -> NestedList:
+        """
+        Reads the rest of the file
+        :return: the first node
+        """
+        while not self.read_chunk(self.__chunk):
+            pass
+        return self.root
+
+    def read_chunk(self, records: int) -> bool:
+        """
+        Reads up to records more records, not counting hidden ones
+        :return: whether the whole file has been read
+        """
+        if self.__finished:
+            return True
+        if self.__builder.build(records):
+            self.__file.close()
+            self.__finished = True
+        return self.__finished
+
+    def __lines(self) -> Iterator[bytes]:
+        for line in self.__file:
+            self.__bytes_read += len(line)
+            yield line
+
+
+class _RecordBuilder(object):
+    """
+    Adds records to a tree in order, setting aside the descendants of collapsed records unparsed
+    """
+
+    def __init__(self, lines: Iterator[bytes], fold_level: int = None, parent: NestedList = None, shift: int = 0):
+        """
+        :param parent: node the records are descendants of, None if the first record is the root
+        :param shift: added to the level of each record, for records of a node that has changed level
+        """
+        self.__lines = lines
+        # line read past the end of a folded subtree, to be read next
+        self.__next_line = None
+        self.__fold_level = fold_level
+        self.__shift = shift
+        self.__root = None
+        # last node added at each level
+        if parent is None:
+            self.__last = []
+        else:
+            self.__last = [None] * parent.level + [parent]
+
+    @property
+    def root(self) -> NestedList:
+        """
+        :return: the first node, None if no records have been added yet
+        """
+        return self.__root
+
+    def build(self, records: int = None) -> bool:
+        """
+        Adds up to records records, or all of them if None
+        :return: whether every record has been added
+        """
+        added = 0
+        while records is None or added < records:
+            line = self.__read_line()
+            if line is None:
+                if self.__root is None and len(self.__last) == 0:
+                    # empty file
+                    self.__root = NestedList()
+                return True
+            level, fields, descendants = RecordFormat.parse(line)
+            node = self.__add(level + self.__shift, fields)
+            if descendants is not None:
+                node.toggle_collapsed()
+                hidden = [self.__read_line() for _ in range(descendants)]
+            elif self.__fold_level is not None and level + self.__shift >= self.__fold_level:
+                hidden = self.__read_subtree(level)
+                if len(hidden) > 0:
+                    node.toggle_collapsed()
+            else:
+                hidden = []
+            if len(hidden) > 0:
+                node.defer_children(_HiddenRecords(hidden, level, self.__fold_level))
+            added += 1
+        return False
+
+    def __read_line(self) -> bytes:
+        """
+        :return: the next line, None at the end
+        """
+        if self.__next_line is not None:
+            line = self.__next_line
+            self.__next_line = None
+            return line
+        return next(self.__lines, None)
+
+    def __read_subtree(self, level: int) -> List[bytes]:
+        """
+        :return: the lines following a record at level that are its descendants
+        """
+        lines = []
+        while True:
+            line = self.__read_line()
+            if line is None:
+                return lines
+            if RecordFormat.parse_level(line) <= level:
+                self.__next_line = line
+                return lines
+            lines.append(line)
+
+    def __add(self, level: int, fields: List[str]) -> NestedList:
+        if self.__root is None and len(self.__last) == 0:
+            assert level == 0
+            self.__root = NestedList(fields)
+            node = self.__root
+        elif level < len(self.__last):
+            node = self.__last[level].insert_sibling(fields)
+        else:
+            assert level == len(self.__last)
+            node = self.__last[level - 1].insert_child(fields)
+        del self.__last[level:]
+        self.__last.append(node)
+        return node
+
+
+class _HiddenRecords(ChildLoader):
+    """
+    Unparsed records of the descendants of a collapsed node
+    """
+
+    def __init__(self, lines: List[bytes], level: int, fold_level: int = None):
+        """
+        :param level: level of the collapsed node in the file
+        """
+        self.__lines = lines
+        self.__level = level
+        self.__fold_level = fold_level
+
+    def load(self, parent: NestedList):
+        _RecordBuilder(iter(self.__lines), self.__fold_level, parent, parent.level - self.__level).build()
+
+    def serialize(self) -> dict:
+        return RecordFormat.pickle(self.__lines)
@@ -0,0 +1,47 @@
+from nestingnote.styles import Styles
+from typing import List, Tuple
+
+
+class RenderLine(object):
+    """
+    The text of one line as runs of characters in the same style
+    Adjacent text in the same style is merged into one run, so each run is a single call to the view.
+    """
+
+    def __init__(self):
+        self.__runs: List[Tuple[str, Styles]] = []
+        self.__length = 0
+
+    def __len__(self) -> int:
+        return self.__length
+
+    @property
+    def runs(self) -> List[Tuple[str, Styles]]:
+        return self.__runs
+
+    def add(self, text: str, style: Styles):
+        if len(text) == 0:
+            return
+        if len(self.__runs) > 0 and self.__runs[-1][1] == style:
+            self.__runs[-1] = (self.__runs[-1][0] + text, style)
+        else:
+            self.__runs.append((text, style))
+        self.__length += len(text)
+
+    def clip(self, start: int, width: int) -> List[Tuple[str, Styles]]:
+        """
+        :return: the runs of the characters from start to start + width
+        """
+        if start == 0 and self.__length <= width:
+            return self.__runs
+        clipped = []
+        position = 0
+        end = start + width
+        for text, style in self.__runs:
+            run_end = position + len(text)
+            if run_end > start and position < end:
+                clipped.append((text[max(0, start - position):end - position], style))
+            position = run_end
+            if position >= end:
+                break
+        return clipped
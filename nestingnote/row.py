@@ -1,5 +1,8 @@
 from nestingnote.column import Column
+from nestingnote.counters import OperationCounters
 from typing import List
+import sys
+import weakref
 
 
 class Row(object):
@@ -9,11 +12,17 @@ class Row(object):
 
     __tab_len = 4
 
+    # while a batch is open, the rows changed in it with their fields out of their columns by id, else None
+    __batch = None
+    # whether this row's fields are out of their columns until the batch ends
+    __detached = False
+
     def __detach_columns(self, index: int = 0):
         """
         remove fields from respective columns from index to the end of self.__fields
         :param index: starting field to detach from its column
         """
+        OperationCounters.get_instance().row_detaches += 1
         for index in range(index, len(self.__fields)):
             field_len = len(self.__fields[index])
             self.__columns[index].remove_field(field_len)
@@ -23,10 +32,48 @@ class Row(object):
         add new field lengths to each column from index to the end of self.__fields
         :param index: starting field to attach to its column
         """
+        OperationCounters.get_instance().row_attaches += 1
         for index in range(index, len(self.__fields)):
             field_len = len(self.__fields[index])
             self.__columns[index].add_field(field_len)
 
+    def __in_batch(self) -> bool:
+        """
+        Called before the fields change
+        :return: whether the columns can be left alone, because a batch keeps the fields out of them until it ends
+        """
+        if Row.__batch is None:
+            return False
+        if not self.__detached:
+            self.__detach_columns()
+            self.__detached = True
+            Row.__batch[id(self)] = weakref.ref(self)
+        return True
+
+    @staticmethod
+    def __apply_batch():
+        """
+        Puts the fields of the rows changed in the batch so far back into their columns, before a column is read
+        """
+        if not Row.__batch:
+            return
+        rows = Row.__batch
+        Row.__batch = {}
+        for reference in rows.values():
+            row = reference()
+            if row is not None and row.__detached:
+                # back to the class default, so rows don't keep the attribute
+                del row.__detached
+                row.__attach_columns()
+
+    def __append(self, text: str, attach: bool = True):
+        self.__fields.append(text)
+        # Add new column if necessary
+        if len(self.__fields) > len(self.__columns):
+            self.__columns.append(Column())
+        if attach:
+            self.__attach_columns(len(self) - 1)
+
     # Public methods
 
     def __init__(self, columns: List[Column], fields: List[str] = None):
@@ -34,26 +81,48 @@ class Row(object):
         if fields is None:
             fields = []
         self.__columns = columns
+        # new rows are put into their columns straight away, batches only help rows changed more than once
         for field in fields:
-            self.append(field)
+            self.__append(field)
         # if no fields, create one empty field
         if len(fields) == 0:
-            self.append('')
+            self.__append('')
 
     def __del__(self):
         """
         detach all columns from self
         """
-        self.__detach_columns()
+        if not self.__detached:
+            self.__detach_columns()
+
+    @staticmethod
+    def begin_batch() -> bool:
+        """
+        Until commit_batch, a row that changes takes its fields out of their columns once and puts them back once
+        at the end, rather than around every change. Reading a column in between puts them back early.
+        :return: whether a batch was begun, False if one was open already, which is committed by whoever began it
+        """
+        if Row.__batch is not None:
+            return False
+        Row.__batch = {}
+        return True
+
+    @staticmethod
+    def commit_batch():
+        Row.__apply_batch()
+        Row.__batch = None
 
     def remove(self, index):
         """
         Delete the field at index and update related column
         """
         assert len(self) > index
-        self.__detach_columns(index)
-        del self.__fields[index]
-        self.__attach_columns(index)
+        if self.__in_batch():
+            del self.__fields[index]
+        else:
+            self.__detach_columns(index)
+            del self.__fields[index]
+            self.__attach_columns(index)
         # If the only field is deleted, replace it with an empty field
         if len(self.fields) == 0:
             self.append('')
@@ -66,28 +135,30 @@ class Row(object):
         :param text:
         :return:
         """
-        self.__detach_columns(index)
+        batched = self.__in_batch()
+        if not batched:
+            self.__detach_columns(index)
         # Insert new field
         self.__fields.insert(index, text)
         # Add new column if necessary
         if len(self.__fields) > len(self.__columns):
             self.__columns.append(Column())
-        self.__attach_columns(index)
+        if not batched:
+            self.__attach_columns(index)
 
     def replace(self, index: int, text: str):
         """
         Replace an existing field with new text
         """
+        if self.__in_batch():
+            self.__fields[index] = text
+            return
         self.__columns[index].remove_field(len(self.__fields[index]))
         self.__fields[index] = text
         self.__columns[index].add_field(len(self.__fields[index]))
 
     def append(self, text: str):
-        self.__fields.append(text)
-        # Add new column if necessary
-        if len(self.__fields) > len(self.__columns):
-            self.__columns.append(Column())
-        self.__attach_columns(len(self)-1)
+        self.__append(text, attach=not self.__in_batch())
 
     """
     Getters
@@ -99,17 +170,49 @@ class Row(object):
         """
         return len(self.__fields)
 
+    def __sizeof__(self) -> int:
+        """
+        :return: bytes of the row and its list of fields, not counting the fields or the columns shared with siblings
+        """
+        return object.__sizeof__(self) + sys.getsizeof(self.__dict__) + sys.getsizeof(self.__fields)
+
     def width(self) -> int:
         """
         :return: Sum of all characters in this row, including padding
         Not including indentation
         """
-        to_return = 0
-        for field in self:
-            to_return += len(field)
-        return to_return
+        return self.field_start(len(self) - 1) + self.__text_len(len(self) - 1)
+
+    def field_start(self, index: int) -> int:
+        """
+        :return: where the field at index starts, counted from the start of the first field
+        The offsets of the columns are kept until the width of a column changes, then found again for the whole row.
+        """
+        self.__apply_batch()
+        if self.__columns[index].offset is None:
+            offset = 0
+            for column in self.__columns[:len(self.__fields)]:
+                column.offset = offset
+                offset += column.width + self.__tab_len
+        return self.__columns[index].offset
+
+    def field_index(self, x: int) -> int:
+        """
+        :param x: counted from the start of the first field
+        :return: index of the field x falls within, counting its padding, the last field if x is past the end
+        """
+        low = 0
+        high = len(self) - 1
+        while low < high:
+            middle = (low + high + 1) // 2
+            if self.field_start(middle) <= x:
+                low = middle
+            else:
+                high = middle - 1
+        return low
 
     def __padded_field_len(self, index: int):
+        self.__apply_batch()
         return self.__columns[index].width + self.__tab_len
 
     def field(self, index: int):
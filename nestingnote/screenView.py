@@ -0,0 +1,132 @@
+from nestingnote.styles import Styles
+from nestingnote.view import View
+from typing import List, Tuple
+
+
+class ScreenView(View):
+    """
+    View that keeps what would be on a terminal in memory, as a grid of characters and their styles
+    For rendering without a terminal: snapshots in tests, comparing frames and counting the work each frame does.
+    A frame starts each time the screen is cleared.
+    """
+
+    blank = ' '
+
+    def __init__(self, rows: int = 24, columns: int = 80, keys: List[int] = None):
+        """
+        :param keys: returned by input_char in order
+        """
+        self.__rows = rows
+        self.__columns = columns
+        self.__keys = [] if keys is None else keys
+        self.__next_key = 0
+        self.__timeout = -1
+        self.__chars: List[List[str]] = []
+        self.__styles: List[List[Styles]] = []
+        self.__previous_lines: List[str] = []
+        self.__blank()
+        self.cursor = (0, 0)
+        # frames started, and cells and calls to addstr in the current frame
+        self.frames = 0
+        self.cells_written = 0
+        self.writes = 0
+        self.errors = 0
+
+    def resize(self, rows: int, columns: int):
+        self.__rows = rows
+        self.__columns = columns
+        self.__blank()
+
+    @property
+    def num_columns(self):
+        return self.__columns
+
+    @property
+    def num_rows(self):
+        return self.__rows
+
+    def addstr(self, y: int, x: int, string: str, style: Styles):
+        """
+        Writes string clipped to the screen
+        """
+        self.writes += 1
+        if not 0 <= y < self.__rows or x >= self.__columns:
+            return
+        string = string[:self.__columns - x]
+        chars = self.__chars[y]
+        styles = self.__styles[y]
+        for index, char in enumerate(string, x):
+            chars[index] = char
+            styles[index] = style
+        self.cells_written += len(string)
+
+    def move_cursor(self, y: int, x: int):
+        self.cursor = (y, x)
+
+    def clear(self):
+        """
+        Starts a new frame
+        """
+        self.__previous_lines = self.lines
+        self.__blank()
+        self.frames += 1
+        self.cells_written = 0
+        self.writes = 0
+
+    @property
+    def input_char(self) -> int:
+        if self.__next_key == len(self.__keys):
+            if self.__timeout == 0:
+                return -1
+            raise Exception("No more input")
+        key = self.__keys[self.__next_key]
+        self.__next_key += 1
+        return key
+
+    def set_input_timeout(self, milliseconds: int):
+        self.__timeout = milliseconds
+
+    def signal_user_error(self):
+        self.errors += 1
+
+    def refresh(self):
+        pass
+
+    # Reading the screen
+
+    def line(self, row: int) -> str:
+        return ''.join(self.__chars[row])
+
+    @property
+    def lines(self) -> List[str]:
+        return [self.line(row) for row in range(self.__rows)]
+
+    def style(self, row: int, column: int) -> Styles:
+        """
+        :return: style of the character at row and column, None if nothing was written there this frame
+        """
+        return self.__styles[row][column]
+
+    def snapshot(self) -> str:
+        """
+        :return: the screen as text, without trailing blanks
+        """
+        return '\n'.join(line.rstrip() for line in self.lines).rstrip('\n')
+
+    def _cells(self, row: int) -> Tuple[List[str], List[Styles]]:
+        """
+        :return: the characters and styles of row, for views that draw the grid somewhere
+        """
+        return self.__chars[row], self.__styles[row]
+
+    def changed_rows(self) -> List[int]:
+        """
+        :return: rows that differ from the previous frame
+        """
+        lines = self.lines
+        return [row for row in range(self.__rows)
+                if row >= len(self.__previous_lines) or lines[row] != self.__previous_lines[row]]
+
+    def __blank(self):
+        self.__chars = [[self.blank] * self.__columns for _ in range(self.__rows)]
+        self.__styles = [[None] * self.__columns for _ in range(self.__rows)]
@@ -1,4 +1,5 @@
 from typing import List
+from contextlib import contextmanager
 from nestingnote.row import Row
 from nestingnote.column import Column
 
@@ -11,6 +12,15 @@ class SimpleNestedList(object):
 
     __indent_len = 4
 
+    # snapshots still being read, see Snapshot, and stores saving only the nodes that changed, see SqliteStore,
+    # and how many times one was added
+    __snapshots = []
+    __snapshot_epoch = 0
+    # the number of snapshots taken when this node was made or last changed, only set once there are any
+    __epoch = 0
+    # where the node is kept by the SqliteStore it was read from or saved to, only set once it is
+    _store_row = None
+
     def __init__(self, fields: List[str] = None, columns: List[Column] = None):
         """
         :param fields:
@@ -28,6 +38,9 @@ class SimpleNestedList(object):
         self.__sibling = self.null
         # indentation level
         self.__level = 0
+        if SimpleNestedList.__snapshot_epoch > 0:
+            # snapshots taken before this node was made don't include it
+            self.__epoch = SimpleNestedList.__snapshot_epoch
 
     @staticmethod
     def _polymorphic_init(fields: List[str] = None, columns: List[Column] = None):
@@ -66,8 +79,49 @@ class SimpleNestedList(object):
         raise Exception("Abstract property")
         # return _NullSimpleNestedList.getInstance()
 
+    @staticmethod
+    @contextmanager
+    def batch():
+        """
+        Rows changed inside put their fields back into their columns once, at the end, rather than after every
+        change, see Row.begin_batch. A batch inside another is part of the outer one.
+        """
+        began = Row.begin_batch()
+        try:
+            yield
+        finally:
+            if began:
+                Row.commit_batch()
+
     # Protected methods
 
+    @staticmethod
+    def _add_snapshot(snapshot) -> int:
+        """
+        Starts giving snapshot the state of nodes from before they change
+        Anything with an epoch and a preserve method can be added to be told which nodes change.
+        Must be called on the thread that edits the nodes
+        :return: the epoch of the snapshot, which is given nodes last changed before it
+        """
+        SimpleNestedList.__snapshot_epoch += 1
+        SimpleNestedList.__snapshots = SimpleNestedList.__snapshots + [snapshot]
+        return SimpleNestedList.__snapshot_epoch
+
+    @staticmethod
+    def _remove_snapshot(snapshot):
+        SimpleNestedList.__snapshots = [other for other in SimpleNestedList.__snapshots if other is not snapshot]
+
+    def _before_write(self):
+        """
+        Called before every change to this node, so the snapshots taken since it last changed keep it as it was
+        Only compares two numbers when there are no new snapshots
+        """
+        if self.__epoch != SimpleNestedList.__snapshot_epoch:
+            for snapshot in SimpleNestedList.__snapshots:
+                if snapshot.epoch > self.__epoch:
+                    snapshot.preserve(self)
+            self.__epoch = SimpleNestedList.__snapshot_epoch
+
     def _attach_to_parent(self, parent):
         """
         Reverse of insert_child, used to allow NullNestedList to polymophically handle child insertion
@@ -77,7 +131,9 @@ class SimpleNestedList(object):
         :param parent: node to insert self under
         :return: The new instance of self that is now attached to prev_sibling
         """
-        return parent.insert_child(self.fields)
+        new_self = parent.insert_child(self.fields)
+        new_self._take_store_row(self)
+        return new_self
 
     def _attach_to_prev_sibling(self, prev_sibling):
         """
@@ -88,7 +144,20 @@ class SimpleNestedList(object):
         :param prev_sibling: node to insert self under
         :return: The new instance of self that is now attached to prev_sibling
         """
-        return prev_sibling.insert_sibling(self.fields)
+        new_self = prev_sibling.insert_sibling(self.fields)
+        new_self._take_store_row(self)
+        return new_self
+
+    def _take_store_row(self, original):
+        """
+        Keeps self, a copy of original that replaces it, where original was stored, so moving nodes around
+        doesn't rewrite them
+        """
+        row = original._store_row
+        if row is not None:
+            original._store_row = None
+            self._store_row = row
+            row.moved(self)
 
     def _insert_sibling_deep(self, sibling):
         """
@@ -129,6 +198,12 @@ class SimpleNestedList(object):
         # TODO make an inner class node and use decorator getters and setters
         return self.__columns
 
+    @property
+    def _row(self) -> Row:
+        """
+        For memory accounting
+        """
+        return self.__row
 
     @property
     def last_sibling(self):
@@ -162,6 +237,7 @@ class SimpleNestedList(object):
         Deletes the sibling row only, not its children or siblings
         The sibling is replaced by this.sibling.sibling and its children are given to this
         """
+        self._before_write()
         nephew = self.sibling.child
         if nephew is not self.null:
             self._append_child_deep(nephew)
@@ -171,11 +247,13 @@ class SimpleNestedList(object):
         """
         Deletes the sibling row and all its siblings and children
         """
+        self._before_write()
         self.__sibling = self.null
 
     def insert_sibling(self, texts: List[str] = None):
         if texts is None:
             texts = []
+        self._before_write()
         self.__sibling = self._new_nested_list(columns=self._columns, fields=texts,
                                                level=self.__level, next_sibling=self.__sibling)
         return self.__sibling
@@ -189,6 +267,7 @@ class SimpleNestedList(object):
         """
         Deletes the child row and all children, siblings, and descendants recursively
         """
+        self._before_write()
         self.__child = self.null
 
     def append_child(self, texts: List[str] = None):
@@ -207,6 +286,7 @@ class SimpleNestedList(object):
         if texts is None:
             texts = []
         child_cols = self.__child._columns
+        self._before_write()
         self.__child = self._new_nested_list(columns=child_cols, fields=texts,
                                              level=self.__level + 1, next_sibling=self.__child)
         return self.__child
@@ -242,16 +322,26 @@ class SimpleNestedList(object):
         """
         return self.__row.width() + len(self.indent_padding)
 
+    def get_field_start(self, index: int) -> int:
+        """
+        :return: x coordinate of the start of the field at index, including indentation
+        """
+        return self.__row.field_start(index) + len(self.indent_padding)
+
     def insert_field(self, index: int, text: str):
+        self._before_write()
         self.__row.insert(index, text)
 
     def append_field(self, text: str):
+        self._before_write()
         self.__row.append(text)
 
     def delete_field(self, index):
+        self._before_write()
         self.__row.remove(index)
 
     def replace_field(self, index: int, replacement: str):
+        self._before_write()
         self.__row.replace(index, replacement)
 
     def get_field(self, index: int) -> str:
@@ -0,0 +1,94 @@
+from nestingnote.nestedlist import NestedList, ChildLoader
+from typing import List
+
+
+class SnapshotNode(object):
+    """
+    A node as it was when its snapshot was taken, with the properties of NestedList that saving reads, so
+    RecordFormat.lines can write a snapshot like a document
+    """
+
+    def __init__(self, snapshot, node: NestedList):
+        self.__snapshot = snapshot
+        self.__fields, self.__collapsed, self.__child, self.__sibling, self.__child_loader = snapshot.state(node)
+
+    @property
+    def null(self):
+        return self.__child.null
+
+    @property
+    def fields(self) -> List[str]:
+        return list(self.__fields)
+
+    @property
+    def collapsed(self) -> bool:
+        return self.__collapsed
+
+    @property
+    def child_loader(self) -> ChildLoader:
+        return self.__child_loader
+
+    @property
+    def child(self):
+        if self.__child is self.null:
+            return self.null
+        return SnapshotNode(self.__snapshot, self.__child)
+
+    @property
+    def sibling(self):
+        if self.__sibling is self.null:
+            return self.null
+        return SnapshotNode(self.__snapshot, self.__sibling)
+
+
+class Snapshot(object):
+    """
+    A document as it was when the snapshot was taken, which stays that way while the document is edited
+    Taking one copies nothing, the snapshot shares the document's nodes. The first change to a node after the
+    snapshot hands it the node's fields, links and collapsed flag from before (SimpleNestedList._before_write), so
+    only the nodes edited since are copied, and each only once.
+    Snapshots are taken and released on the thread editing the document and can be read on any other, e.g. to save
+    while typing carries on, as long as the loaders of the children it holds can be read there.
+    """
+
+    def __init__(self, root: NestedList):
+        self.__root = root
+        # id of each node changed since the snapshot was taken -> the node, kept so the id isn't reused, and its state
+        self.__versions = {}
+        # nodes last changed before this are given to preserve
+        self.epoch = NestedList._add_snapshot(self)
+
+    @property
+    def root(self) -> SnapshotNode:
+        return SnapshotNode(self, self.__root)
+
+    @property
+    def nodes_copied(self) -> int:
+        """
+        :return: nodes changed since the snapshot was taken
+        """
+        return len(self.__versions)
+
+    def preserve(self, node: NestedList):
+        """
+        Called before the first change to node since the snapshot was taken
+        """
+        self.__versions[id(node)] = (node, node._state())
+
+    def state(self, node: NestedList) -> tuple:
+        """
+        :return: node as it was when the snapshot was taken, as NestedList._state gives it
+        """
+        # read before looking for a copy: a change that isn't copied yet can't have started
+        state = node._state()
+        version = self.__versions.get(id(node))
+        if version is not None:
+            return version[1]
+        return state
+
+    def release(self):
+        """
+        Stops keeping the nodes that change, the snapshot can't be read afterwards
+        """
+        NestedList._remove_snapshot(self)
+        self.__versions = {}
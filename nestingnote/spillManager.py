@@ -0,0 +1,255 @@
+from nestingnote.nestedlist import NestedList, ChildLoader
+from typing import List, Set
+import json
+import tempfile
+import threading
+import weakref
+
+
+class SpillManager(object):
+    """
+    Keeps the number of NestedList nodes held in memory under a budget
+    When the budget is exceeded, the children of the least recently used collapsed nodes
+    are written to a temporary spill file and read back the next time they are needed.
+    Children read back leave their bytes behind, so once those outweigh the children still spilled the file is
+    rewritten without them.
+    """
+
+    # how many calls to enforce between walks of the tree
+    __check_interval = 100
+    # bytes no longer read the spill file may hold before it's rewritten, as long as they're fewer than the rest
+    __compact_bytes = 1 << 16
+
+    def __init__(self, budget: int):
+        """
+        :param budget: the number of nodes allowed in memory
+        """
+        self.__budget = budget
+        self.__file = tempfile.TemporaryFile()
+        self.__file_bytes = 0
+        # snapshots being saved on another thread read spilled children too
+        self.__file_lock = threading.Lock()
+        # spilled children that can still be read, by a node or a snapshot holding them, the rest of the file is dead
+        self.__loaders = weakref.WeakSet()
+        # incremented on every touch, orders nodes from least to most recently used
+        self.__clock = 0
+        # id(node) -> [weak reference to node, clock value when last used]
+        self.__last_used = {}
+        self.__calls = 0
+        self.__resident_nodes = 0
+        self.__spilled_nodes = 0
+
+    @property
+    def resident_nodes(self) -> int:
+        """
+        :return: nodes in memory as of the last walk of the tree
+        """
+        return self.__resident_nodes
+
+    @property
+    def spilled_nodes(self) -> int:
+        return self.__spilled_nodes
+
+    @property
+    def spill_file_bytes(self) -> int:
+        return self.__file_bytes
+
+    def summary(self) -> str:
+        return '{} nodes resident, {} spilled to disk ({} bytes)'.format(
+            self.resident_nodes, self.spilled_nodes, self.spill_file_bytes)
+
+    def touch(self, node: NestedList):
+        """
+        Marks node as recently used so its children are the last to be spilled
+        """
+        self.__clock += 1
+        entry = self.__last_used.get(id(node))
+        if entry is not None and entry[0]() is node:
+            entry[1] = self.__clock
+        else:
+            self.__last_used[id(node)] = [weakref.ref(node), self.__clock]
+
+    def due(self) -> bool:
+        """
+        Called once per edit
+        :return: whether enough edits have passed to walk the tree again
+        """
+        self.__calls += 1
+        return self.__calls % self.__check_interval == 0
+
+    def enforce(self, root: NestedList, protected: Set[int]):
+        """
+        Spills collapsed subtrees until the nodes in memory fit the budget
+        :param root: first node of the document
+        :param protected: ids of nodes whose children must stay in memory, e.g. those near the viewport
+        """
+        self.__resident_nodes, candidates = self.__walk(root)
+        if self.__resident_nodes <= self.__budget:
+            return
+        candidates = [(node, size) for node, size in candidates if id(node) not in protected]
+        candidates.sort(key=lambda candidate: self.__last_use(candidate[0]))
+        for node, size in candidates:
+            if self.__resident_nodes <= self.__budget:
+                break
+            self.__spill(node)
+            self.__resident_nodes -= size
+        self.__last_used = {key: entry for key, entry in self.__last_used.items() if entry[0]() is not None}
+
+    def read(self, loader) -> list:
+        """
+        :param loader: spilled children, whose place in the file moves when it's rewritten
+        """
+        with self.__file_lock:
+            self.__file.seek(loader.offset)
+            data = self.__file.read(loader.length)
+        return json.loads(data.decode('utf-8'))
+
+    def unspill(self, nodes: int):
+        self.__spilled_nodes -= nodes
+        self.__resident_nodes += nodes
+
+    # Private
+
+    def __last_use(self, node: NestedList) -> int:
+        entry = self.__last_used.get(id(node))
+        if entry is None or entry[0]() is not node:
+            return 0
+        return entry[1]
+
+    @staticmethod
+    def __walk(root: NestedList):
+        """
+        Counts the nodes in memory without reading any deferred children
+        :return: the count, and each outermost collapsed node holding children in memory with the number of them
+        """
+        resident = 0
+        candidates = []
+        # (node, candidate it's hidden under or None)
+        stack = [(root, None)]
+        while len(stack) > 0:
+            node, hidden_under = stack.pop()
+            resident += 1
+            if hidden_under is not None:
+                hidden_under[1] += 1
+            if node.sibling is not node.null:
+                stack.append((node.sibling, hidden_under))
+            if node.child_loader is None and node.child is not node.null:
+                if hidden_under is None and node.collapsed:
+                    hidden_under = [node, 0]
+                    candidates.append(hidden_under)
+                stack.append((node.child, hidden_under))
+        return resident, candidates
+
+    def __spill(self, node: NestedList):
+        records, spilled = self.__records(node)
+        data = json.dumps(records).encode('utf-8')
+        with self.__file_lock:
+            offset = self.__file_bytes
+            self.__file.seek(offset)
+            self.__file.write(data)
+            self.__file_bytes += len(data)
+        loader = _SpilledChildren(self, offset, len(data), len(records), spilled)
+        self.__loaders.add(loader)
+        node.defer_children(loader)
+        self.__spilled_nodes += len(records)
+        self.__compact()
+
+    def __records(self, parent: NestedList):
+        """
+        Lists the descendants of parent in order, as [depth below parent - 1, collapsed, fields], followed by the
+        index in spilled of the children of the node that were already spilled
+        Subtrees already in the spill file stay where they are
+        :return: the records, and the spilled children they refer to
+        """
+        records = []
+        spilled = []
+        # (node, depth)
+        stack = [(parent.child, 0)]
+        while len(stack) > 0:
+            node, depth = stack.pop()
+            record = [depth, node.collapsed, list(node.fields)]
+            records.append(record)
+            if node.sibling is not node.null:
+                stack.append((node.sibling, depth))
+            loader = node.child_loader
+            if isinstance(loader, _SpilledChildren) and loader.manager is self:
+                record.append(len(spilled))
+                spilled.append(loader)
+            elif node.child is not node.null:
+                stack.append((node.child, depth + 1))
+        return records, spilled
+
+    def __compact(self):
+        """
+        Rewrites the spill file with only the children that can still be read, once the rest takes enough of it
+        """
+        loaders = sorted(self.__loaders, key=lambda loader: loader.offset)
+        live = sum(loader.length for loader in loaders)
+        dead = self.__file_bytes - live
+        if dead < self.__compact_bytes or dead < live:
+            return
+        with self.__file_lock:
+            compacted = tempfile.TemporaryFile()
+            for loader in loaders:
+                self.__file.seek(loader.offset)
+                data = self.__file.read(loader.length)
+                loader.offset = compacted.tell()
+                compacted.write(data)
+            self.__file.close()
+            self.__file = compacted
+            self.__file_bytes = live
+
+
+class _SpilledChildren(ChildLoader):
+    """
+    Children of a collapsed node that were written to the spill file
+    """
+
+    def __init__(self, manager: SpillManager, offset: int, length: int, nodes: int, spilled: List):
+        """
+        :param spilled: children of the nodes among these that were spilled before them, see SpillManager.__records
+        """
+        self.manager = manager
+        # where the records are in the spill file, moved by the manager
+        self.offset = offset
+        self.length = length
+        self.nodes = nodes
+        self.__spilled = spilled
+
+    def records(self) -> list:
+        return self.manager.read(self)
+
+    def load(self, parent: NestedList):
+        # last node added at each depth
+        last = []
+        for record in self.records():
+            depth, collapsed, fields = record[:3]
+            if depth < len(last):
+                node = last[depth].insert_sibling(fields)
+            elif depth == 0:
+                node = parent.insert_child(fields)
+            else:
+                node = last[depth - 1].insert_child(fields)
+            if collapsed:
+                node.toggle_collapsed()
+            if len(record) > 3:
+                node.defer_children(self.__spilled[record[3]])
+            del last[depth:]
+            last.append(node)
+        self.manager.unspill(self.nodes)
+
+    def serialize(self) -> dict:
+        first = {'child': None}
+        # dict the next record at each depth is attached to, and under which key
+        last = [(first, 'child')]
+        for record in self.records():
+            depth, collapsed, fields = record[:3]
+            pickle = {'fields': fields, 'collapsed': collapsed, 'child': None, 'sibling': None}
+            if len(record) > 3:
+                pickle['child'] = self.__spilled[record[3]].serialize()
+            del last[depth + 1:]
+            parent, key = last[depth]
+            parent[key] = pickle
+            last[depth] = (pickle, 'sibling')
+            last.append((pickle, 'child'))
+        return first['child']
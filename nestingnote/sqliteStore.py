@@ -0,0 +1,347 @@
+from nestingnote.nestedlist import NestedList, ChildLoader
+from typing import List, Optional
+import json
+import sqlite3
+import weakref
+
+
+class SqliteStore(object):
+    """
+    Keeps a NestedList in a SQLite file, one table row per node, linked to the rows of its first child and next sibling
+    like the node is
+    Nodes read from the file or saved to it carry their row. The store is told which nodes change the way snapshots
+    are (SimpleNestedList._before_write), so saving only looks at the nodes changed since the last save and the nodes
+    they now link to, and only writes those whose row differs. Nodes copied to move them, as indenting does, take
+    their row along, so moving a subtree rewrites the rows around it rather than the subtree.
+    The children of collapsed nodes stay on disk until they are first needed.
+    """
+
+    __schema = """
+        CREATE TABLE IF NOT EXISTS nodes (
+            id INTEGER PRIMARY KEY,
+            child INTEGER,
+            sibling INTEGER,
+            collapsed INTEGER NOT NULL DEFAULT 0,
+            fields TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS document (
+            root INTEGER
+        );
+    """
+
+    def __init__(self, file_path: str):
+        self.__connection = sqlite3.connect(file_path)
+        self.__connection.executescript(self.__schema)
+        root = self.__connection.execute("SELECT root FROM document").fetchone()
+        # row of the first top level node, None if there are no nodes
+        self.__root_id = None if root is None else root[0]
+        self.__next_id = (self.__connection.execute("SELECT MAX(id) FROM nodes").fetchone()[0] or 0) + 1
+        # rows of the nodes changed since the last save
+        self.__changed = set()
+        self.epoch = None
+        self.__track()
+        # rows inserted, updated or deleted by the last save, for tests and the curious
+        self.rows_written = 0
+
+    def close(self):
+        NestedList._remove_snapshot(self)
+        self.__connection.close()
+
+    @staticmethod
+    def write(root: NestedList, file_path: str):
+        """
+        Writes the tree starting at root to a new file, without keeping track of its nodes
+        """
+        store = SqliteStore(file_path)
+        # id(node) -> row id, the nodes are all held by the tree until it's written
+        row_ids = {}
+
+        def row_id(node: NestedList) -> Optional[int]:
+            if node is node.null:
+                return None
+            if id(node) not in row_ids:
+                row_ids[id(node)] = len(row_ids) + 1
+                stack.append(node)
+            return row_ids[id(node)]
+        stack = []
+        with store.__connection:
+            store.__set_root(row_id(root))
+            while len(stack) > 0:
+                node = stack.pop()
+                store.__connection.execute(
+                    "INSERT INTO nodes (id, child, sibling, collapsed, fields) VALUES (?, ?, ?, ?, ?)",
+                    (row_ids[id(node)], row_id(node.child), row_id(node.sibling), int(node.collapsed),
+                     json.dumps(node.fields)))
+        store.close()
+
+    def load(self) -> NestedList:
+        """
+        Reads every node except the descendants of collapsed nodes, which are read when they are first needed
+        :return: the first top level node, an empty NestedList if the file has no nodes
+        """
+        if self.__root_id is None:
+            return NestedList()
+        top_level = self.__read_siblings(self.__root_id)
+        first = top_level[0]
+        root = NestedList(first[3])
+        self.__attach(root, first)
+        if not root.collapsed and first[1] is not None:
+            self.load_children(root, first[1])
+        self.__add_nodes(root, top_level[1:], True)
+        self.__track()
+        return root
+
+    def save(self, root: NestedList):
+        """
+        Brings the file up to date with the tree starting at root in a single transaction
+        """
+        with self.__connection:
+            changes = self.__connection.total_changes
+            # the changed nodes still held, then the nodes they link to that aren't in the file
+            nodes = [row.node() for row in self.__changed if row.id is not None and row.node() is not None]
+            # row id -> (child, sibling) each changed node linked to when last written
+            old_links = {row.id: row.state[2:] for row in self.__changed if row.id is not None}
+            root_id = self.__row(root, nodes)
+            # row id -> (row, state to write) for every node written, each row is linked to by one of them or root
+            writes = {}
+            index = 0
+            while index < len(nodes):
+                node = nodes[index]
+                index += 1
+                row = node._store_row
+                if self.__owns_loader(node):
+                    child_id = row.state[2]
+                else:
+                    child_id = self.__row(node.child, nodes)
+                state = (node.collapsed, tuple(node.fields), child_id, self.__row(node.sibling, nodes))
+                writes[row.id] = (row, state)
+            removed = self.__remove_unlinked(root_id, writes, old_links)
+            for row_id, (row, state) in writes.items():
+                if row_id in removed:
+                    row.id = None
+                elif state != row.state:
+                    self.__connection.execute(
+                        "INSERT OR REPLACE INTO nodes (id, child, sibling, collapsed, fields) VALUES (?, ?, ?, ?, ?)",
+                        (row_id, state[2], state[3], int(state[0]), json.dumps(state[1])))
+                    row.state = state
+            if root_id != self.__root_id:
+                self.__set_root(root_id)
+            self.rows_written = self.__connection.total_changes - changes
+        self.__changed = set()
+        self.__track()
+
+    def preserve(self, node: NestedList):
+        """
+        Called before the first change to node since the last save, see SimpleNestedList._before_write
+        """
+        row = node._store_row
+        if row is not None and row.store is self:
+            self.__changed.add(row)
+
+    def serialize_children(self, first_id: int) -> dict:
+        """
+        :return: the nodes from the one stored at first_id on in the format of NestedList.serialize
+        """
+        first = {'child': None, 'sibling': None}
+        # (row id of the first child, dict to attach the children to)
+        stack = [(first_id, first)]
+        while len(stack) > 0:
+            row_id, parent = stack.pop()
+            previous = parent
+            key = 'child'
+            for _, child_id, collapsed, fields, _ in self.__read_siblings(row_id):
+                pickle = {'fields': fields, 'collapsed': collapsed, 'child': None, 'sibling': None}
+                previous[key] = pickle
+                previous = pickle
+                key = 'sibling'
+                if child_id is not None:
+                    stack.append((child_id, pickle))
+        return first['child']
+
+    def load_children(self, parent: NestedList, first_id: int):
+        self.__add_nodes(parent, self.__read_siblings(first_id), False)
+        # nodes read since the last save are told about from their first change
+        self.__track()
+
+    # Private
+
+    def __track(self):
+        """
+        Starts being told of the first change to every node from now on
+        """
+        NestedList._remove_snapshot(self)
+        self.epoch = NestedList._add_snapshot(self)
+
+    def __set_root(self, root_id: Optional[int]):
+        self.__connection.execute("DELETE FROM document")
+        self.__connection.execute("INSERT INTO document (root) VALUES (?)", (root_id,))
+        self.__root_id = root_id
+
+    def __row(self, node: NestedList, new: List[NestedList]) -> Optional[int]:
+        """
+        :param new: nodes given a row are added, to be written
+        :return: the row id of node, a new one if it isn't in the file, None for the null node
+        """
+        if node is node.null:
+            return None
+        row = node._store_row
+        if row is None or row.store is not self or row.id is None:
+            node._store_row = _StoredRow(self, self.__next_id, node, None)
+            self.__next_id += 1
+            new.append(node)
+            return self.__next_id - 1
+        return row.id
+
+    def __remove_unlinked(self, root_id: Optional[int], writes: dict, old_links: dict) -> set:
+        """
+        Deletes the rows no longer linked to, and everything stored beneath them that isn't linked to from elsewhere
+        Every row only has one link to it, so a row can only lose its link from a node that changed
+        :param writes: row id -> (row, state) of the nodes about to be written
+        :param old_links: row id -> (child, sibling) as they were in the file, for the changed nodes
+        :return: the rows removed, including those about to be written that turned out to be beneath them
+        """
+        # row id -> how many live rows link to it now
+        linked = {}
+        for _, state in writes.values():
+            for link in state[2:]:
+                linked[link] = linked.get(link, 0) + 1
+        linked[root_id] = linked.get(root_id, 0) + 1
+        unlinked = {link for links in old_links.values() for link in links}
+        unlinked.add(self.__root_id)
+        unlinked = [row_id for row_id in unlinked if row_id is not None and row_id not in linked]
+        removed = set()
+        while len(unlinked) > 0:
+            # rows not in the file yet are only removed with the node that links to them
+            stored = [row_id for row_id in unlinked if row_id not in writes or writes[row_id][0].state is not None]
+            doomed = self.__doomed(stored, linked)
+            doomed.update(row_id for row_id in unlinked if row_id not in stored)
+            doomed -= removed
+            removed.update(doomed)
+            unlinked = []
+            for row_id in doomed:
+                if row_id not in writes:
+                    continue
+                # what a removed node links to now loses that link
+                for link in writes[row_id][1][2:]:
+                    if link in linked:
+                        linked[link] -= 1
+                        if linked[link] == 0:
+                            del linked[link]
+                            unlinked.append(link)
+        if len(removed) > 0:
+            self.__connection.executemany("DELETE FROM nodes WHERE id = ?", [(row_id,) for row_id in removed])
+        return removed
+
+    def __doomed(self, row_ids: List[int], linked: dict) -> set:
+        """
+        :return: the rows and everything stored beneath them in the file, stopping at the rows in linked
+        """
+        if len(row_ids) == 0:
+            return set()
+        self.__connection.execute("CREATE TEMP TABLE IF NOT EXISTS unlinked (id INTEGER PRIMARY KEY)")
+        self.__connection.execute("CREATE TEMP TABLE IF NOT EXISTS linked (id INTEGER PRIMARY KEY)")
+        self.__connection.executemany("INSERT INTO unlinked (id) VALUES (?)", [(row_id,) for row_id in row_ids])
+        self.__connection.executemany("INSERT INTO linked (id) VALUES (?)",
+                                      [(row_id,) for row_id in linked if row_id is not None])
+        cursor = self.__connection.execute(
+            "WITH RECURSIVE doomed(id) AS ("
+            "SELECT id FROM unlinked UNION "
+            "SELECT CASE link WHEN 0 THEN nodes.child ELSE nodes.sibling END "
+            "FROM doomed JOIN nodes ON nodes.id = doomed.id, (SELECT 0 AS link UNION ALL SELECT 1) "
+            "WHERE CASE link WHEN 0 THEN nodes.child ELSE nodes.sibling END NOT IN (SELECT id FROM linked)"
+            ") SELECT id FROM doomed")
+        doomed = {row_id for row_id, in cursor}
+        self.__connection.execute("DELETE FROM unlinked")
+        self.__connection.execute("DELETE FROM linked")
+        return doomed
+
+    def __read_siblings(self, first_id: int) -> List[tuple]:
+        """
+        :return: (row id, row id of the first child, collapsed, fields, row id of the sibling) for the row first_id and
+            each of its siblings in order
+        """
+        cursor = self.__connection.execute(
+            "WITH RECURSIVE siblings(id, position) AS ("
+            "SELECT ?, 0 UNION ALL "
+            "SELECT nodes.sibling, position + 1 FROM nodes JOIN siblings ON nodes.id = siblings.id "
+            "WHERE nodes.sibling IS NOT NULL"
+            ") SELECT nodes.id, child, sibling, collapsed, fields FROM siblings JOIN nodes ON nodes.id = siblings.id "
+            "ORDER BY position",
+            (first_id,))
+        return [(row_id, child_id, bool(collapsed), json.loads(fields), sibling_id)
+                for row_id, child_id, sibling_id, collapsed, fields in cursor]
+
+    def __add_nodes(self, first_parent: NestedList, rows: List[tuple], as_siblings: bool):
+        """
+        Adds rows as the last children of first_parent, or after it as its siblings
+        Then continues down through every expanded descendant
+        """
+        # (node to add to, rows to add, whether they're its siblings)
+        stack = [(first_parent, rows, as_siblings)]
+        while len(stack) > 0:
+            parent, rows, as_siblings = stack.pop()
+            previous = parent if as_siblings else None
+            for row in rows:
+                if previous is None:
+                    node = parent.insert_child(row[3])
+                else:
+                    node = previous.insert_sibling(row[3])
+                self.__attach(node, row)
+                if not node.collapsed and row[1] is not None:
+                    stack.append((node, self.__read_siblings(row[1]), False))
+                previous = node
+
+    def __attach(self, node: NestedList, row: tuple):
+        """
+        Records that node is stored at row, and defers its children if it's collapsed
+        """
+        row_id, child_id, collapsed, fields, sibling_id = row
+        if collapsed:
+            node.toggle_collapsed()
+            if child_id is not None:
+                node.defer_children(_SqliteChildLoader(self, child_id))
+        node._store_row = _StoredRow(self, row_id, node, (collapsed, tuple(fields), child_id, sibling_id))
+
+    def __owns_loader(self, node: NestedList) -> bool:
+        """
+        :return: whether node's children are still unread in this file
+        """
+        loader = node.child_loader
+        return isinstance(loader, _SqliteChildLoader) and loader.store is self
+
+
+class _StoredRow(object):
+    """
+    Where a node is kept in a SqliteStore and what was last written there
+    """
+
+    def __init__(self, store: SqliteStore, row_id: int, node: NestedList, state: Optional[tuple]):
+        self.store = store
+        # None once the row is deleted
+        self.id = row_id
+        self.node = weakref.ref(node)
+        # (collapsed, fields, child row id, sibling row id) as last written, None if never written
+        self.state = state
+
+    def moved(self, node: NestedList):
+        """
+        Called when node, a copy of the node stored here, takes its place
+        """
+        self.node = weakref.ref(node)
+        self.store.preserve(node)
+
+
+class _SqliteChildLoader(ChildLoader):
+    """
+    Reads the children of a collapsed node from a SqliteStore when they are first needed
+    """
+
+    def __init__(self, store: SqliteStore, first_id: int):
+        self.store = store
+        self.__first_id = first_id
+
+    def load(self, parent: NestedList):
+        self.store.load_children(parent, self.__first_id)
+
+    def serialize(self) -> dict:
+        return self.store.serialize_children(self.__first_id)
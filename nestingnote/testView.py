@@ -37,6 +37,9 @@ class TestView(View):
             raise Exception("No more input")
         return self.__inputs[next_key]
 
+    def set_input_timeout(self, milliseconds: int):
+        pass
+
     def signal_user_error(self):
         pass
 
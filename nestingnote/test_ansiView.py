@@ -0,0 +1,58 @@
+import unittest
+from nestingnote.ansiView import AnsiView
+from nestingnote.model import Model
+from nestingnote.nestedlist import NestedList
+from nestingnote.directions import LateralDirection
+from nestingnote.key import KeyMap, Key
+import os
+
+
+class TestAnsiView(unittest.TestCase):
+
+    def setUp(self):
+        self.input, self.keys = os.pipe()
+        self.output, self.screen = os.pipe()
+        self.view = AnsiView(self.input, self.screen)
+
+    def tearDown(self):
+        os.close(self.screen)
+        os.close(self.keys)
+        os.close(self.input)
+        os.close(self.output)
+
+    def test_frames(self):
+        root = NestedList(["one", "two"])
+        root.insert_sibling(["three"])
+        model = Model(self.view, root=root)
+        model.display()
+        first = os.read(self.output, 1 << 16)
+        self.assertEqual(len(first), self.view.frame_bytes)
+        self.assertIn(b'one', first)
+        self.assertIn(b'three', first)
+        # nothing changed
+        model.display()
+        self.assertEqual(self.view.frame_bytes, 0)
+        model.move(LateralDirection.RIGHT)
+        model.display()
+        self.assertEqual(os.read(self.output, 1 << 16)[-3:], b'\x1b[C')
+        model.insert("x")
+        model.display()
+        frame = os.read(self.output, 1 << 16)
+        # only the changed part of the first line is rewritten
+        self.assertIn(b'xne', frame)
+        self.assertNotIn(b'three', frame)
+        self.assertLess(len(frame), 40)
+
+    def test_keys(self):
+        key_map = KeyMap.get_instance()
+        os.write(self.keys, b'a\x1b[A\x7f\x1b[6~\n\xc3\xa9\x1b[1;5C')
+        keys = [self.view.input_char for _ in range(7)]
+        self.assertEqual(keys, [ord('a'), key_map.value(Key.UP), key_map.value(Key.BACKSPACE),
+                                key_map.value(Key.PAGE_DOWN), key_map.value(Key.ENTER), ord('é'),
+                                key_map.value(Key.CTRL_RIGHT)])
+        self.view.set_input_timeout(0)
+        self.assertEqual(self.view.input_char, -1)
+
+
+if __name__ == '__main__':
+    unittest.main()
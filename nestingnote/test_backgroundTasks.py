@@ -0,0 +1,126 @@
+import unittest
+from nestingnote.backgroundTasks import BackgroundTasks
+from nestingnote.controller import Controller
+from nestingnote.model import Model
+from nestingnote.nestedlist import NestedList
+from nestingnote.records import RecordFormat, RecordReader
+from nestingnote.testView import TestView
+from nestingnote.screenView import ScreenView
+from nestingnote.directions import LateralDirection, VerticalDirection
+import asyncio
+import json
+import os
+import tempfile
+
+
+class TestBackgroundTasks(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.directory.name, 'note.nnn')
+        root = NestedList(["line 0"])
+        node = root
+        for index in range(1, 10):
+            node = node.insert_sibling(["line {}".format(index)])
+        RecordFormat.write(root, self.file_path)
+        self.changes = 0
+
+    def changed(self):
+        self.changes += 1
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def run_tasks(self, tasks: BackgroundTasks, until, timeout: float = 2):
+        """
+        Runs the tasks until until() is true
+        """
+        async def main():
+            running = [asyncio.create_task(coroutine) for coroutine in tasks.coroutines(self.changed)]
+            try:
+                for _ in range(int(timeout / 0.01)):
+                    if until():
+                        return
+                    await asyncio.sleep(0.01)
+                self.fail('timed out')
+            finally:
+                for task in running:
+                    task.cancel()
+        asyncio.run(main())
+
+    def read_file(self) -> list:
+        return [node.fields for node in RecordReader(self.file_path).read()]
+
+    def test_save_in_steps(self):
+        model = Model(TestView([]), self.file_path)
+        model.insert("new ")
+        self.assertTrue(model.modified)
+        steps = model.save_in_steps(lines_per_step=4)
+        next(steps)
+        # an edit to a line not written yet is left for the next save
+        for _ in range(8):
+            model.move(VerticalDirection.DOWN)
+        model.move_end(LateralDirection.LEFT)
+        model.insert("later ")
+        self.assertEqual(self.read_file()[0], ["line 0"])
+        list(steps)
+        model.finish_save()
+        self.assertEqual(self.read_file()[0], ["new line 0"])
+        self.assertEqual(self.read_file()[8], ["line 8"])
+        self.assertEqual(os.listdir(self.directory.name), ['note.nnn'])
+        self.assertTrue(model.modified)
+        list(model.save_in_steps(lines_per_step=4))
+        model.finish_save()
+        self.assertFalse(model.modified)
+        self.assertEqual(self.read_file()[8], ["later line 8"])
+        self.assertFalse(model.changed_on_disk())
+
+    def test_save_during_save_in_steps(self):
+        model = Model(TestView([]), self.file_path)
+        model.insert("new ")
+        steps = model.save_in_steps(lines_per_step=4)
+        next(steps)
+        model.insert("saved ")
+        model.save()
+        # the older document written in steps doesn't replace the newer one
+        list(steps)
+        model.finish_save()
+        self.assertEqual(self.read_file()[0], ["new saved line 0"])
+        self.assertEqual(os.listdir(self.directory.name), ['note.nnn'])
+        self.assertFalse(model.modified)
+        self.assertFalse(model.changed_on_disk())
+
+    def test_autosave(self):
+        model = Model(TestView([]), self.file_path)
+        tasks = BackgroundTasks(model, autosave_interval=0.01)
+        model.insert("new ")
+        self.run_tasks(tasks, lambda: tasks.autosaves > 0)
+        self.assertFalse(model.modified)
+        self.assertEqual(self.read_file()[0], ["new line 0"])
+
+    def test_watch(self):
+        view = ScreenView(rows=5, columns=80)
+        model = Model(view, self.file_path)
+        tasks = BackgroundTasks(model, watch_interval=0.01)
+        with open(self.file_path, 'a') as file:
+            file.write(json.dumps([0, ["added"]]) + '\n')
+        self.run_tasks(tasks, lambda: self.changes > 0)
+        model.display()
+        self.assertIn('changed by another program', view.lines[-1])
+
+    def test_controller(self):
+        view = TestView([ord(char) for char in 'abc'])
+        root = NestedList()
+        latency_file = os.path.join(self.directory.name, 'latency.json')
+        controller = Controller(Model(view, root=root), frame_interval=60)
+        tasks = BackgroundTasks(controller.model, latency=controller.latency, latency_file=latency_file,
+                                stats_interval=0.01)
+        with self.assertRaises(Exception):
+            # the test view runs out of keys
+            controller.run(tasks)
+        self.assertEqual(root.fields, ['abc'])
+        self.assertEqual(controller.latency.histogram(phase='execute').count, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,28 @@
+import unittest
+from nestingnote.benchmark import run, benchmarks, shapes
+import json
+
+
+class TestBenchmark(unittest.TestCase):
+
+    def test_shapes(self):
+        for name, shape in shapes.items():
+            root = shape(30)
+            if name != 'mixed':
+                # mixed collapses some lines
+                self.assertEqual(root.count(), 30)
+        self.assertEqual(shapes['deep_chain'](30).get_node(29).level, 29)
+        self.assertEqual(shapes['matrix'](3, columns=5).num_fields, 5)
+
+    def test_run(self):
+        results = run([30], repeat=1)
+        names = {result['benchmark'] for result in results['results']}
+        self.assertEqual(names, {benchmark.name for benchmark in benchmarks})
+        for result in results['results']:
+            self.assertEqual(len(result['runs']), 1)
+            self.assertGreater(result['operations'], 0)
+        json.dumps(results)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,143 @@
+"""
+Checks how operations scale rather than what they return
+Each operation is timed on documents of size n and 4n. Constant time operations should take about as long on both,
+linear ones about 4 times as long; a quadratic regression shows up as about 16 times.
+Timing makes these slow and sensitive to load, so they only run when NESTINGNOTE_COMPLEXITY is set.
+"""
+import unittest
+from nestingnote.benchmark.shapes import wide, deep_chain
+from nestingnote.model import Model
+from nestingnote.testView import TestView
+from nestingnote.directions import VerticalDirection, LateralDirection
+from nestingnote.nestedlist import NestedList
+from nestingnote.records import RecordFormat, RecordReader
+from nestingnote.row import Row
+from typing import Callable
+import gc
+import os
+import tempfile
+import time
+
+
+_enabled = os.environ.get('NESTINGNOTE_COMPLEXITY') is not None
+
+# largest ratio of the time at 4n to the time at n accepted for each complexity
+_constant = 2.5
+_linear = 8
+
+_size = 5000
+
+_repeat = 5
+
+
+def time_ratio(build: Callable[[int], object], operation: Callable[[object], None], size: int = _size) -> float:
+    """
+    :param build: makes the state for a document of the given size
+    :param operation: times only this, called on the state of build
+    :return: best time at 4 * size over best time at size
+    """
+    times = []
+    for scale in (1, 4):
+        state = build(size * scale)
+        best = None
+        for _ in range(_repeat):
+            # like timeit, so collections don't land in one run and not the other
+            gc.disable()
+            try:
+                start = time.perf_counter()
+                operation(state)
+                elapsed = time.perf_counter() - start
+            finally:
+                gc.enable()
+            best = elapsed if best is None else min(best, elapsed)
+        times.append(best)
+    return times[1] / max(times[0], 1e-9)
+
+
+@unittest.skipUnless(_enabled, "set NESTINGNOTE_COMPLEXITY to run complexity tests")
+class TestComplexity(unittest.TestCase):
+
+    def assertScales(self, ratio: float, limit: float):
+        self.assertLess(ratio, limit, "time grew {:.1f} times for 4 times the size".format(ratio))
+
+    def test_count(self):
+        self.assertScales(time_ratio(wide, lambda root: root.count()), _linear)
+        self.assertScales(time_ratio(deep_chain, lambda root: root.count()), _linear)
+
+    def test_get_node(self):
+        self.assertScales(time_ratio(wide, lambda root: root.get_node(root.count() - 1)), _linear)
+        # lookups near the top don't depend on how long the document is
+        self.assertScales(time_ratio(wide, lambda root: [root.get_node(row) for row in range(50)]), _constant)
+
+    @staticmethod
+    def model(size: int) -> Model:
+        return Model(TestView([]), root=wide(size))
+
+    def test_move(self):
+        def move(model: Model):
+            for _ in range(20):
+                model.move(VerticalDirection.DOWN)
+            for _ in range(20):
+                model.move(VerticalDirection.UP)
+        self.assertScales(time_ratio(self.model, move), _constant)
+
+    def test_display(self):
+        self.assertScales(time_ratio(self.model, lambda model: model.display()), _constant)
+
+    def test_wide_row(self):
+        def scrolled_right(size: int) -> Model:
+            model = Model(TestView([]), root=NestedList(["field"] * size))
+            # each field takes 9 columns with its padding
+            for _ in range(size * 9 - TestView([]).num_columns):
+                model.scroll(LateralDirection.RIGHT)
+            return model
+
+        def move_and_display(model: Model):
+            model.move_end(LateralDirection.LEFT)
+            model.move_end(LateralDirection.RIGHT)
+            model.display()
+        # only the fields on screen are rendered
+        self.assertScales(time_ratio(scrolled_right, move_and_display, size=2000), _constant)
+
+    def test_get_previous_sibling(self):
+        def at_end(size: int) -> Model:
+            model = self.model(size)
+            for _ in range(size // TestView([]).num_rows - 1):
+                model.page(VerticalDirection.DOWN)
+            return model
+
+        def at_second_line(size: int) -> Model:
+            model = self.model(size)
+            model.move(VerticalDirection.DOWN)
+            return model
+        # linear in the cursor's position, not in the length of the document
+        self.assertScales(time_ratio(at_end, lambda model: model.get_previous_sibling()), _linear)
+        self.assertScales(time_ratio(at_second_line, lambda model: model.get_previous_sibling()), _constant)
+
+    def test_row_insert(self):
+        def sibling_rows(size: int) -> Row:
+            columns = []
+            rows = [Row(columns, ["field", "field"]) for _ in range(size)]
+            return rows[0]
+
+        def insert(row: Row):
+            for _ in range(20):
+                row.insert(1, "inserted")
+            for _ in range(20):
+                row.remove(1)
+        # columns are shared by all siblings but inserting only touches this row's
+        self.assertScales(time_ratio(sibling_rows, insert), _constant)
+
+    def test_save_and_load(self):
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = os.path.join(directory, 'test.nnn')
+            self.assertScales(time_ratio(wide, lambda root: RecordFormat.write(root, file_path)), _linear)
+
+            def saved(size: int) -> str:
+                RecordFormat.write(wide(size), file_path)
+                return file_path
+            self.assertScales(time_ratio(saved, lambda path: RecordReader(path).read()), _linear)
+
+
+if __name__ == '__main__':
+    unittest.main()
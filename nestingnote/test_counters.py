@@ -0,0 +1,54 @@
+import unittest
+from nestingnote.counters import OperationCounters
+from nestingnote.controller import Controller
+from nestingnote.model import Model
+from nestingnote.nestedlist import NestedList
+from nestingnote.testView import TestView
+
+
+class TestCounters(unittest.TestCase):
+
+    def setUp(self):
+        self.counters = OperationCounters.get_instance()
+        self.counters.reset()
+
+    def test_tree(self):
+        root = NestedList(["one", "two"])
+        root.insert_child(["child"])
+        root.insert_sibling(["three"])
+        # one per field
+        self.assertEqual(self.counters.row_attaches, 4)
+        self.counters.reset()
+        root.count()
+        root.get_node(1)
+        self.assertEqual(self.counters.count_visits, 3)
+        self.assertEqual(self.counters.get_node, 1)
+        root.replace_field(0, "uno")
+        self.assertEqual(self.counters.row_detaches, 0)
+        root.insert_field(0, "zero")
+        self.assertEqual((self.counters.row_attaches, self.counters.row_detaches), (1, 1))
+        root.get_padded_field(0)
+        self.assertEqual(self.counters.column_widths, 1)
+
+    def test_display(self):
+        root = NestedList(["one", "two"])
+        model = Model(TestView([]), root=root, show_counters=True)
+        model.display()
+        # two fields and the overlay, there is no indent to draw
+        self.assertEqual(self.counters.addstr, 3)
+        self.assertEqual(self.counters.bytes_drawn, len("one    two") + TestView([]).num_columns - 1)
+        model.toggle_counters()
+        self.counters.reset()
+        model.display()
+        self.assertEqual(self.counters.addstr, 2)
+
+    def test_reset_per_key(self):
+        controller = Controller(Model(TestView([]), root=NestedList()))
+        self.counters.get_node = 1000
+        controller.handle_key(ord('a'))
+        self.assertLess(self.counters.get_node, 1000)
+        self.assertIn('get_node {}'.format(self.counters.get_node), self.counters.summary())
+
+
+if __name__ == '__main__':
+    unittest.main()
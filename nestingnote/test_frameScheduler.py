@@ -0,0 +1,57 @@
+import unittest
+from nestingnote.frameScheduler import FrameScheduler
+from nestingnote.controller import Controller
+from nestingnote.model import Model
+from nestingnote.nestedlist import NestedList
+from nestingnote.testView import TestView
+
+
+class TestFrameScheduler(unittest.TestCase):
+
+    def setUp(self):
+        self.now = 0.0
+        self.scheduler = FrameScheduler(0.016, clock=lambda: self.now)
+
+    def test_schedule(self):
+        # nothing to draw, wait for a key
+        self.assertFalse(self.scheduler.frame_due())
+        self.assertEqual(self.scheduler.input_timeout(idle_work=False), -1)
+        self.scheduler.changed()
+        self.assertTrue(self.scheduler.frame_due())
+        self.scheduler.frame_drawn()
+        self.now = 0.010
+        self.scheduler.changed()
+        # too soon after the last frame, wait for more keys until the next one is due
+        self.assertFalse(self.scheduler.frame_due())
+        self.assertEqual(self.scheduler.input_timeout(idle_work=False), 6)
+        self.scheduler.changed()
+        self.now = 0.016
+        self.assertTrue(self.scheduler.frame_due())
+        self.assertEqual(self.scheduler.input_timeout(idle_work=False), 0)
+        self.scheduler.frame_drawn()
+        self.assertEqual((self.scheduler.frames, self.scheduler.changes), (2, 3))
+
+    def test_idle_work(self):
+        self.assertEqual(self.scheduler.input_timeout(idle_work=True), 0)
+        self.scheduler.changed()
+        self.scheduler.frame_drawn()
+        self.scheduler.changed()
+        self.assertEqual(self.scheduler.input_timeout(idle_work=True), 0)
+
+    def test_controller(self):
+        view = TestView([ord(char) for char in 'abc'])
+        # keys come faster than frames
+        root = NestedList()
+        controller = Controller(Model(view, root=root), frame_interval=60)
+        with self.assertRaises(Exception):
+            # the test view runs out of keys
+            controller.run()
+        self.assertEqual(root.fields, ['abc'])
+        # only the first frame was drawn
+        self.assertEqual(controller.frames.frames, 1)
+        self.assertEqual(controller.frames.changes, 3)
+        self.assertEqual(controller.latency.histogram(phase='execute').count, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import unittest
+from nestingnote.keyDecoder import KeyDecoder
+from nestingnote.key import KeyMap, Key
+
+
+class TestKeyDecoder(unittest.TestCase):
+
+    def setUp(self):
+        self.key_map = KeyMap.get_instance()
+        self.now = 0.0
+        self.decoder = KeyDecoder(escape_timeout=25, clock=lambda: self.now)
+
+    def decode_all(self) -> list:
+        keys = []
+        key = self.decoder.decode()
+        while key != -1:
+            keys.append(key)
+            key = self.decoder.decode()
+        return keys
+
+    def test_keys(self):
+        self.decoder.feed(b'a\x1b[A\x7f\x1b[6~\r\xc3\xa9\x1b[1;5C\x1bOd\x1b[Z')
+        self.assertEqual(self.decode_all(), [ord('a'), self.key_map.value(Key.UP),
+                                             self.key_map.value(Key.BACKSPACE), self.key_map.value(Key.PAGE_DOWN),
+                                             self.key_map.value(Key.ENTER), ord('é'),
+                                             self.key_map.value(Key.CTRL_RIGHT), self.key_map.value(Key.CTRL_LEFT),
+                                             self.key_map.value(Key.SHIFT_TAB)])
+        self.assertFalse(self.decoder.waiting)
+
+    def test_unknown(self):
+        # F5 and shift up aren't used, they're dropped whole
+        self.decoder.feed(b'\x1b[15~x\x1b[1;2Ay\x1bOPz')
+        self.assertEqual(self.decode_all(), [ord('x'), ord('y'), ord('z')])
+        self.assertEqual(self.decoder.unknown, 3)
+
+    def test_split(self):
+        self.decoder.feed(b'\x1b[1;')
+        self.assertEqual(self.decoder.decode(), -1)
+        self.assertTrue(self.decoder.waiting)
+        self.now = 0.010
+        self.assertEqual(self.decoder.time_left, 15)
+        self.decoder.feed(b'5D\xe2\x82')
+        self.assertEqual(self.decoder.decode(), self.key_map.value(Key.CTRL_LEFT))
+        self.assertEqual(self.decoder.last_latency, 0.010)
+        # half a character
+        self.assertEqual(self.decoder.decode(), -1)
+        self.decoder.feed(b'\xac')
+        self.assertEqual(self.decoder.decode(), ord('€'))
+
+    def test_escape(self):
+        self.decoder.feed(b'\x1b')
+        self.assertEqual(self.decoder.decode(), -1)
+        self.now = 0.024
+        self.assertEqual(self.decoder.decode(), -1)
+        self.now = 0.025
+        self.assertEqual(self.decoder.decode(), self.key_map.value(Key.ESC))
+        self.assertEqual(self.decoder.latency.max, 0.025)
+        # escape followed by a key that isn't part of a sequence
+        self.decoder.feed(b'\x1bq')
+        self.assertEqual(self.decode_all(), [self.key_map.value(Key.ESC), ord('q')])
+        # the rest of a sequence that came too late is taken as it is
+        self.decoder.feed(b'\x1b[')
+        self.decoder.decode()
+        self.now = 0.100
+        self.assertEqual(self.decode_all(), [self.key_map.value(Key.ESC), ord('[')])
+        self.decoder.feed(b'B')
+        self.assertEqual(self.decoder.decode(), ord('B'))
+
+
+if __name__ == '__main__':
+    unittest.main()
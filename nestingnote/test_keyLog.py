@@ -0,0 +1,47 @@
+import unittest
+from nestingnote.keyLog import KeyRecorder, replay, read_log
+from nestingnote.records import RecordFormat, RecordReader
+from nestingnote.nestedlist import NestedList
+from nestingnote.testView import TestView
+from nestingnote.key import KeyMap, Key
+import os
+import tempfile
+
+
+class TestKeyLog(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.directory.name, 'test.nnn')
+        self.log_path = os.path.join(self.directory.name, 'keys.log')
+        RecordFormat.write(NestedList(["one"]), self.file_path)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_record(self):
+        keys = [ord('a'), KeyMap.get_instance().value(Key.ENTER)]
+        recorder = KeyRecorder(TestView(keys), self.log_path, self.file_path)
+        self.assertEqual(recorder.input_char, ord('a'))
+        self.assertEqual(recorder.input_char, KeyMap.get_instance().value(Key.ENTER))
+        recorder.close()
+        header, recorded = read_log(self.log_path)
+        self.assertEqual(header['file'], os.path.abspath(self.file_path))
+        self.assertEqual([key[1:] for key in recorded], [(ord('a'), 100, 100), (10, 100, 100)])
+
+    def test_replay(self):
+        key_map = KeyMap.get_instance()
+        keys = [ord('x'), key_map.value(Key.ENTER), ord('y'), key_map.value(Key.CTRL_W)]
+        recorder = KeyRecorder(TestView(keys), self.log_path, self.file_path)
+        for _ in keys:
+            recorder.input_char
+        recorder.close()
+        report = replay(self.log_path, profile=True)
+        self.assertIn('Replayed 4 of 4 keys', report)
+        self.assertIn('function calls', report)
+        # saves in the replay go to a copy
+        self.assertEqual(str(RecordReader(self.file_path).read()), 'one\n')
+
+
+if __name__ == '__main__':
+    unittest.main()
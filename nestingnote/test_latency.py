@@ -0,0 +1,54 @@
+import unittest
+from nestingnote.latency import LatencyHistogram, LatencyStats
+from nestingnote.controller import Controller
+from nestingnote.model import Model
+from nestingnote.nestedlist import NestedList
+from nestingnote.testView import TestView
+from nestingnote.key import KeyMap, Key
+import json
+import os
+import tempfile
+
+
+class TestLatency(unittest.TestCase):
+
+    def test_percentiles(self):
+        histogram = LatencyHistogram()
+        for millisecond in range(1, 101):
+            histogram.record(millisecond / 1000)
+        self.assertEqual(histogram.count, 100)
+        self.assertEqual(histogram.max, 0.1)
+        # within a bucket's width of the exact value
+        self.assertAlmostEqual(histogram.percentile(50), 0.05, delta=0.05 * 0.2)
+        self.assertAlmostEqual(histogram.percentile(95), 0.095, delta=0.095 * 0.2)
+        self.assertEqual(histogram.percentile(100), 0.1)
+        self.assertEqual(LatencyHistogram().percentile(50), 0)
+
+    def test_stats(self):
+        stats = LatencyStats()
+        self.assertEqual(stats.summary(), 'No keys timed yet')
+        stats.record('Insert', lookup=1e-6, execute=1e-5, display=1e-3)
+        stats.record('Save', lookup=1e-6, execute=1e-1, display=1e-3)
+        self.assertEqual(stats.commands, ['Insert', 'Save'])
+        self.assertEqual(stats.histogram(phase='lookup').count, 2)
+        self.assertEqual(stats.histogram('Save').count, 3)
+        self.assertIn('slowest Save', stats.summary())
+
+    def test_controller(self):
+        key_map = KeyMap.get_instance()
+        keys = [ord('a'), ord('b'), key_map.value(Key.CTRL_T), key_map.value(Key.ENTER)]
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = os.path.join(directory, 'latency.json')
+            controller = Controller(Model(TestView(keys), root=NestedList()), latency_file=file_path)
+            with self.assertRaises(Exception):
+                # the test view runs out of keys
+                controller.run()
+            with open(file_path) as file:
+                latency = json.load(file)
+        self.assertEqual(latency['Insert']['display']['count'], 2)
+        self.assertEqual(latency['NewLine']['execute']['count'], 1)
+        self.assertEqual(len(latency), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
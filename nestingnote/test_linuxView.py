@@ -0,0 +1,67 @@
+import unittest
+from unittest import mock
+from nestingnote.linuxView import LinuxView
+from nestingnote.key import KeyMap, Key
+import curses
+
+
+class Window(object):
+    """
+    Curses window that only gives back the keys it was made with
+    """
+
+    def __init__(self, keys: list):
+        self.keys = keys
+        self.keypad_on = None
+
+    def keypad(self, on: bool):
+        self.keypad_on = on
+
+    def getmaxyx(self):
+        return 24, 80
+
+    def timeout(self, milliseconds: int):
+        pass
+
+    def getch(self) -> int:
+        return self.keys.pop(0) if len(self.keys) > 0 else -1
+
+
+class TestLinuxView(unittest.TestCase):
+
+    def setUp(self):
+        self.key_map = KeyMap.get_instance()
+        # colours need a screen
+        patches = [mock.patch('curses.init_pair'), mock.patch('curses.color_pair', return_value=0)]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def read_keys(self, view: LinuxView) -> list:
+        keys = []
+        key = view.input_char
+        while key != -1:
+            keys.append(key)
+            key = view.input_char
+        return keys
+
+    def test_curses_key_codes(self):
+        window = Window([ord('a'), curses.KEY_LEFT, curses.KEY_BTAB, curses.KEY_ENTER, curses.KEY_DC,
+                         curses.KEY_RESIZE])
+        view = LinuxView(window, decode_bytes=False)
+        self.assertTrue(window.keypad_on)
+        self.assertEqual(self.read_keys(view), [ord('a'), self.key_map.value(Key.LEFT),
+                                                self.key_map.value(Key.SHIFT_TAB), self.key_map.value(Key.ENTER),
+                                                self.key_map.value(Key.DELETE), self.key_map.value(Key.RESIZE)])
+
+    def test_terminal_bytes(self):
+        window = Window(list(b'a\x1b[D\x1b[Z\r') + [curses.KEY_RESIZE])
+        view = LinuxView(window, decode_bytes=True)
+        self.assertFalse(window.keypad_on)
+        self.assertEqual(self.read_keys(view), [ord('a'), self.key_map.value(Key.LEFT),
+                                                self.key_map.value(Key.SHIFT_TAB), self.key_map.value(Key.ENTER),
+                                                self.key_map.value(Key.RESIZE)])
+
+
+if __name__ == '__main__':
+    unittest.main()
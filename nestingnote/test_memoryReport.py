@@ -0,0 +1,50 @@
+import unittest
+from nestingnote.memoryReport import MemoryReport
+from nestingnote.nestedlist import NestedList, ChildLoader
+
+
+class Unread(ChildLoader):
+
+    def load(self, parent):
+        raise Exception("The report shouldn't load children")
+
+    def serialize(self) -> dict:
+        return None
+
+
+class TestMemoryReport(unittest.TestCase):
+
+    def test_report(self):
+        root = NestedList(["one", "two"])
+        child = root.insert_child(["a"])
+        child.insert_sibling(["bb", "c", "d"])
+        sibling = root.insert_sibling(["three"])
+        sibling.insert_child(["hidden"])
+        sibling.toggle_collapsed()
+        sibling.defer_children(Unread())
+        report = MemoryReport(root)
+        self.assertEqual(report.nodes, 4)
+        self.assertEqual(report.deferred, 1)
+        # the top level has two columns, its children three
+        self.assertEqual(report.sibling_groups, 2)
+        self.assertEqual(report.columns, 5)
+        self.assertEqual(report.field_chars, len("onetwoabbcdthree"))
+        self.assertEqual(report.levels[1][:2], [2, 5])
+        self.assertEqual(sorted(group[0] for group in report.groups), [["a"], ["one", "two"]])
+        self.assertEqual(report.total_bytes,
+                         report.node_bytes + report.row_bytes + report.string_bytes + report.column_bytes)
+        self.assertGreater(report.string_bytes, report.field_chars)
+        self.assertIn('4 lines, 5 columns', report.summary())
+        self.assertIn('one two', report.format(traced=(1, 2)))
+        self.assertEqual(report.to_dict()['levels'][0]['nodes'], 2)
+
+    def test_counter_entries(self):
+        root = NestedList(["one"])
+        for text in ("a", "abcdef"):
+            root.replace_field(0, text)
+        # widths no field has anymore are still counted
+        self.assertEqual(MemoryReport(root).counter_entries, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
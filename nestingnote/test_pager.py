@@ -0,0 +1,116 @@
+import unittest
+from nestingnote.pager import RecordIndex, Pager
+from nestingnote.records import RecordFormat
+from nestingnote.nestedlist import NestedList
+from nestingnote.testView import TestView
+from nestingnote.key import KeyMap, Key
+import os
+import tempfile
+
+
+class TestPager(unittest.TestCase):
+
+    def setUp(self):
+        """
+        0
+            1
+                2
+            3
+        4
+        ...
+        """
+        self.directory = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.directory.name, 'test.nnn')
+        root = NestedList(["0"])
+        last = root
+        for record in range(1, 1000):
+            if record % 4 == 0:
+                last = last.insert_sibling([str(record)])
+            elif record % 4 == 1:
+                middle = last.insert_child([str(record), "field"])
+            elif record % 4 == 2:
+                middle.insert_child([str(record)])
+            else:
+                middle.insert_sibling([str(record)])
+        RecordFormat.write(root, self.file_path)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_read(self):
+        index = RecordIndex(self.file_path)
+        self.assertEqual(index.read(0), (0, ["0"]))
+        self.assertEqual(index.read(600), (0, ["600"]))
+        self.assertEqual(index.read(5), (1, ["5", "field"]))
+        self.assertEqual(index.read(999), (1, ["999"]))
+        self.assertIsNone(index.length)
+        self.assertIsNone(index.read(1000))
+        self.assertEqual(index.length, 1000)
+        self.assertEqual(index.read(6), (2, ["6"]))
+        index.close()
+
+    def test_subtree_end(self):
+        index = RecordIndex(self.file_path)
+        self.assertEqual(index.subtree_end(4), 8)
+        self.assertEqual(index.subtree_end(5), 7)
+        self.assertEqual(index.subtree_end(996), 1000)
+        index.close()
+
+    def test_legacy_file(self):
+        with open(self.file_path, 'w') as file:
+            file.write('{"fields": [""], "child": null, "sibling": null}')
+        with self.assertRaises(Exception):
+            RecordIndex(self.file_path)
+
+    def test_navigation(self):
+        key_map = KeyMap.get_instance()
+        keys = [key_map.value(Key.PAGE_DOWN), key_map.value(Key.DOWN), key_map.value(Key.CTRL_K),
+                ord('g'), ord('9'), ord('9'), ord('8'), key_map.value(Key.ENTER), ord('q')]
+        pager = Pager(TestView(keys), self.file_path)
+        pager.display()
+        self.assertEqual(pager.cursor_record, 0)
+        pager.move(98)
+        pager.display()
+        self.assertEqual(pager.cursor_record, 98)
+        pager.move(2)
+        pager.display()
+        self.assertEqual(pager.cursor_record, 100)
+        pager.toggle_collapsed()
+        pager.move(1)
+        pager.display()
+        self.assertEqual(pager.cursor_record, 104)
+        pager.move(-1)
+        pager.display()
+        self.assertEqual(pager.cursor_record, 100)
+        pager.move(-100)
+        pager.display()
+        self.assertEqual(pager.cursor_record, 0)
+        pager.goto(2000)
+        pager.display()
+        self.assertEqual(pager.cursor_record, 999)
+        pager.goto(101)
+        pager.display()
+        self.assertEqual(pager.cursor_record, 100)
+        pager.run()
+        self.assertEqual(pager.cursor_record, 997)
+
+    def test_saved_collapsed(self):
+        root = NestedList(["0"])
+        root.insert_child(["1"]).insert_sibling(["2"])
+        root.toggle_collapsed()
+        root.insert_sibling(["3"])
+        RecordFormat.write(root, self.file_path)
+        pager = Pager(TestView([]), self.file_path)
+        pager.display()
+        pager.move(1)
+        pager.display()
+        self.assertEqual(pager.cursor_record, 3)
+        pager.move(-1)
+        pager.toggle_collapsed()
+        pager.move(1)
+        pager.display()
+        self.assertEqual(pager.cursor_record, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,122 @@
+import unittest
+from nestingnote.records import RecordFormat, RecordReader
+from nestingnote.nestedlist import NestedList
+from nestingnote.model import Model
+from nestingnote.testView import TestView
+import json
+import os
+import tempfile
+
+
+class TestRecords(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.directory.name, 'test.nnn')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    @staticmethod
+    def build() -> NestedList:
+        root = NestedList(["one", "two", "three"])
+        child = root.insert_child(["child1", "child2"])
+        grandchild = child.insert_child(["gc1"])
+        grandchild.insert_sibling(["gc2", "gc2"])
+        sibling = root.insert_sibling()
+        sibling.insert_sibling(["sib2", "sib2"])
+        return root
+
+    def test_lines(self):
+        lines = list(RecordFormat.lines(self.build()))
+        target = [RecordFormat.header,
+                  '[0, ["one", "two", "three"]]\n',
+                  '[1, ["child1", "child2"]]\n',
+                  '[2, ["gc1"]]\n',
+                  '[2, ["gc2", "gc2"]]\n',
+                  '[0, [""]]\n',
+                  '[0, ["sib2", "sib2"]]\n']
+        self.assertEqual(lines, target)
+
+    def test_write_and_read(self):
+        root = self.build()
+        RecordFormat.write(root, self.file_path)
+        self.assertTrue(RecordFormat.is_record_file(self.file_path))
+        copy = RecordReader(self.file_path).read()
+        self.assertEqual(str(root), str(copy))
+        self.assertEqual(root, copy)
+
+    def test_collapsed(self):
+        root = self.build()
+        root.toggle_collapsed()
+        root.child.toggle_collapsed()
+        lines = list(RecordFormat.lines(root))
+        self.assertEqual(lines[1], '[0, ["one", "two", "three"], 3]\n')
+        self.assertEqual(lines[2], '[1, ["child1", "child2"], 2]\n')
+        self.assertEqual([RecordFormat.parse_descendants(line.encode('utf-8')) for line in lines[1:]],
+                         [3, 2, None, None, None, None])
+        self.assertIsNone(RecordFormat.parse_descendants(b'[0, []]\n'))
+        self.assertEqual(RecordFormat.parse_descendants(b'[0, ["a]]", "2"], 12]'), 12)
+        RecordFormat.write(root, self.file_path)
+        copy = RecordReader(self.file_path).read()
+        # hidden records are only built when expanded
+        self.assertIsNotNone(copy.child_loader)
+        self.assertEqual(copy.count(), 3)
+        self.assertEqual(root.serialize(), copy.serialize())
+        copy.toggle_collapsed()
+        self.assertTrue(copy.child.collapsed)
+        copy.child.toggle_collapsed()
+        root.toggle_collapsed()
+        root.child.toggle_collapsed()
+        self.assertEqual(str(root), str(copy))
+
+    def test_fold_level(self):
+        RecordFormat.write(self.build(), self.file_path)
+        copy = RecordReader(self.file_path, fold_level=1).read()
+        self.assertFalse(copy.collapsed)
+        self.assertTrue(copy.child.collapsed)
+        self.assertEqual(copy.count(), 4)
+        copy.child.toggle_collapsed()
+        self.assertEqual(str(self.build()), str(copy))
+
+    def test_progressive_open(self):
+        root = NestedList(["0"])
+        parent = root
+        for top in range(50):
+            if top > 0:
+                parent = parent.insert_sibling([str(top)])
+            child = parent.insert_child(["child"])
+            for _ in range(98):
+                child = child.insert_sibling(["child"])
+        RecordFormat.write(root, self.file_path)
+        model = Model(TestView([]), self.file_path)
+        self.assertTrue(model.loading)
+        self.assertEqual(model._Model__root.count(), 2000)
+        model.display()
+        model.continue_loading()
+        self.assertEqual(model._Model__root.count(), 4000)
+        # saving needs the whole document
+        model.save()
+        self.assertFalse(model.loading)
+        self.assertEqual(str(root), str(model._Model__root))
+        self.assertEqual(str(root), str(RecordReader(self.file_path).read()))
+
+    def test_load_legacy(self):
+        root = self.build()
+        with open(self.file_path, 'w') as file:
+            file.write(json.dumps(root.serialize(), indent=4))
+        self.assertFalse(RecordFormat.is_record_file(self.file_path))
+        model = Model(TestView([]), self.file_path)
+        self.assertEqual(str(root), str(model._Model__root))
+
+    def test_load_legacy_collapsed(self):
+        root = self.build()
+        root.child.toggle_collapsed()
+        with open(self.file_path, 'w') as file:
+            file.write(json.dumps(root.serialize(), indent=4))
+        model = Model(TestView([]), self.file_path)
+        self.assertTrue(model._Model__root.child.collapsed)
+
+
+if __name__ == '__main__':
+    unittest.main()
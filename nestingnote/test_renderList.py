@@ -0,0 +1,29 @@
+import unittest
+from nestingnote.renderList import RenderLine
+from nestingnote.styles import Styles
+
+
+class TestRenderList(unittest.TestCase):
+
+    def test_add(self):
+        line = RenderLine()
+        line.add("    ", Styles.EVEN)
+        line.add("", Styles.HEADER)
+        line.add("one  ", Styles.EVEN)
+        line.add("two", Styles.ODD)
+        self.assertEqual(line.runs, [("    one  ", Styles.EVEN), ("two", Styles.ODD)])
+        self.assertEqual(len(line), 12)
+
+    def test_clip(self):
+        line = RenderLine()
+        line.add("abc", Styles.HEADER)
+        line.add("def", Styles.EVEN)
+        line.add("ghi", Styles.ODD)
+        self.assertEqual(line.clip(0, 20), line.runs)
+        self.assertEqual(line.clip(2, 5), [("c", Styles.HEADER), ("def", Styles.EVEN), ("g", Styles.ODD)])
+        self.assertEqual(line.clip(3, 3), [("def", Styles.EVEN)])
+        self.assertEqual(line.clip(10, 3), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -146,6 +146,40 @@ class TestRow(unittest.TestCase):
             result += field
         self.assertEqual(result, target)
 
+    def test_field_start(self):
+        columns = []
+        row = Row(columns, fields=["one", "two", "three"])
+        other = Row(columns, fields=["0123", "123", "0123456"])
+        self.assertEqual([row.field_start(index) for index in range(3)], [0, 8, 15])
+        self.assertEqual(row.width(), 20)
+        self.assertEqual(row.field_index(7), 0)
+        self.assertEqual(row.field_index(8), 1)
+        self.assertEqual(row.field_index(100), 2)
+        # offsets follow the columns getting wider
+        other.replace(0, "0123456789")
+        self.assertEqual(row.field_start(2), 21)
+        self.assertEqual(row.field_index(8), 0)
+        other.replace(0, "")
+        self.assertEqual(row.field_start(1), 7)
+
+    def test_batch(self):
+        columns = []
+        row = Row(columns, fields=["one", "two", "three"])
+        other = Row(columns, fields=["0123", "123", "0123456"])
+        self.assertTrue(Row.begin_batch())
+        self.assertFalse(Row.begin_batch())
+        other.replace(0, "0123456789")
+        row.remove(0)
+        row.insert(0, "1")
+        row.append("four")
+        # reading a column puts the changed rows back into them first
+        self.assertEqual(row.field_start(2), 21)
+        other.remove(0)
+        Row.commit_batch()
+        self.assertEqual([row.field_start(index) for index in range(4)], [0, 7, 18, 27])
+        del other
+        self.assertEqual([row.field_start(index) for index in range(4)], [0, 5, 12, 21])
+
     def test_getters(self):
         columns = []
         row = Row(columns, fields=["one", "two", "three"])
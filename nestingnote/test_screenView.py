@@ -0,0 +1,116 @@
+import unittest
+import curses
+from nestingnote.screenView import ScreenView
+from nestingnote.model import Model
+from nestingnote.controller import Controller
+from nestingnote.nestedlist import NestedList
+from nestingnote.styles import Styles
+from nestingnote.directions import VerticalDirection, LateralDirection
+
+
+class TestScreenView(unittest.TestCase):
+
+    def test_addstr(self):
+        view = ScreenView(rows=2, columns=5)
+        view.addstr(0, 1, "abc", Styles.HEADER)
+        view.addstr(1, 3, "clipped", Styles.ODD)
+        view.addstr(2, 0, "off screen", Styles.ODD)
+        self.assertEqual(view.lines, [" abc ", "   cl"])
+        self.assertEqual(view.style(0, 1), Styles.HEADER)
+        self.assertIsNone(view.style(0, 0))
+        self.assertEqual(view.cells_written, 5)
+        self.assertEqual(view.writes, 3)
+        view.clear()
+        self.assertEqual(view.snapshot(), '')
+        self.assertEqual(view.changed_rows(), [0, 1])
+        self.assertEqual(view.frames, 1)
+
+    def test_scrolled_right(self):
+        root = NestedList(["field{}".format(index) for index in range(100)])
+        root.insert_child(["a", "b"])
+        view = ScreenView(rows=3, columns=10)
+        model = Model(view, root=root)
+        for _ in range(33):
+            model.scroll(LateralDirection.RIGHT)
+        model.display()
+        # the screen starts partway into the fourth field
+        self.assertEqual(view.lines[0], "ld3    fie")
+        self.assertEqual(view.style(0, 0), Styles.EVEN)
+        self.assertEqual(view.style(0, 7), Styles.ODD)
+        self.assertEqual(view.line(1), " " * 10)
+        # the cursor is placed on the screen, not in the line
+        self.assertEqual(view.cursor, (0, 0))
+
+    def test_move_end_scrolls(self):
+        root = NestedList(["field{}".format(index) for index in range(100)])
+        view = ScreenView(rows=3, columns=10)
+        model = Model(view, root=root)
+        model.move_end(LateralDirection.RIGHT)
+        model.display()
+        self.assertEqual(view.cursor, (0, 9))
+        # the window scrolls to the end of the last field
+        self.assertEqual(view.lines[0], "  field99 ")
+        model.move(LateralDirection.LEFT)
+        model.display()
+        self.assertEqual(view.cursor, (0, 8))
+        model.move_end(LateralDirection.LEFT)
+        model.display()
+        self.assertEqual(view.cursor, (0, 0))
+        self.assertEqual(view.lines[0], "field0    ")
+
+    def test_resize(self):
+        root = NestedList(["line0"])
+        node = root
+        for index in range(1, 20):
+            node = node.insert_sibling(["line{}".format(index)])
+        view = ScreenView(rows=10, columns=20)
+        model = Model(view, root=root)
+        controller = Controller(model)
+        for _ in range(8):
+            controller.handle_key(curses.KEY_DOWN)
+        controller.handle_key(curses.KEY_END)
+        view.resize(4, 3)
+        controller.handle_key(curses.KEY_RESIZE)
+        # the cursor is kept on screen
+        self.assertEqual(model.cursor_position, (8, 5))
+        self.assertEqual(view.cursor[0], 3)
+        self.assertEqual(view.lines, ["e5 ", "e6 ", "e7 ", "e8 "])
+
+    def test_model_snapshot(self):
+        root = NestedList(["one", "two"])
+        root.insert_child(["child"])
+        root.insert_sibling(["three", "x"]).toggle_collapsed()
+        view = ScreenView(rows=5, columns=20)
+        model = Model(view, root=root)
+        model.display()
+        self.assertEqual(view.snapshot(), "one      two\n    child\nthree    x")
+        self.assertEqual(view.style(2, 0), Styles.COLLAPSED_HEADER)
+        model.move(VerticalDirection.DOWN)
+        model.display()
+        self.assertEqual(view.cursor, (1, 4))
+        # nothing changed on screen, only the cursor moved
+        self.assertEqual(view.changed_rows(), [])
+
+    def test_frames(self):
+        class FrameView(ScreenView):
+            def __init__(self):
+                super().__init__(rows=5, columns=20)
+                self.changes = []
+
+            def begin_frame(self, top: int, changed: bool):
+                self.changes.append(changed)
+                super().begin_frame(top, changed)
+        view = FrameView()
+        model = Model(view, root=NestedList(["one"]))
+        model.display()
+        model.display()
+        model.insert("x")
+        model.display()
+        model.move(VerticalDirection.DOWN)
+        model.display()
+        self.assertEqual(view.changes, [True, False, True, False])
+        self.assertEqual(view.frames, 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
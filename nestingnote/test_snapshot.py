@@ -0,0 +1,110 @@
+import unittest
+from nestingnote.model import Model
+from nestingnote.nestedlist import NestedList
+from nestingnote.records import RecordFormat
+from nestingnote.spillManager import SpillManager
+from nestingnote.testView import TestView
+from nestingnote.directions import LateralDirection, VerticalDirection
+import threading
+
+
+class TestSnapshot(unittest.TestCase):
+
+    def setUp(self):
+        """
+        line 0
+            child 0
+            child 1
+        line 1
+        ...
+        line 9
+        """
+        self.root = NestedList(["line 0"])
+        child = self.root.insert_child(["child 0"])
+        child.insert_sibling(["child 1"])
+        node = self.root
+        for index in range(1, 10):
+            node = node.insert_sibling(["line {}".format(index)])
+        self.model = Model(TestView([]), root=self.root)
+        self.lines = list(RecordFormat.lines(self.root))
+
+    def down(self, lines: int):
+        for _ in range(lines):
+            self.model.move(VerticalDirection.DOWN)
+        self.model.move_end(LateralDirection.LEFT)
+
+    def test_copies_only_changed_nodes(self):
+        snapshot = self.model.snapshot()
+        self.assertEqual(snapshot.nodes_copied, 0)
+        self.model.insert("new ")
+        self.model.insert("er ")
+        self.assertEqual(snapshot.nodes_copied, 1)
+        self.assertEqual(list(RecordFormat.lines(snapshot.root)), self.lines)
+        snapshot.release()
+
+    def test_structural_edits(self):
+        snapshot = self.model.snapshot()
+        self.down(3)
+        self.model.indent_current_node()
+        self.model.move_end(LateralDirection.RIGHT)
+        self.model.split_node()
+        self.down(1)
+        self.model.combine_nodes()
+        self.model.move_end(LateralDirection.LEFT)
+        self.model.split_field()
+        self.down(2)
+        self.model.toggle_current_node_collapsed()
+        self.assertNotEqual(list(RecordFormat.lines(self.root)), self.lines)
+        self.assertEqual(list(RecordFormat.lines(snapshot.root)), self.lines)
+        snapshot.release()
+
+    def test_spilled_after_snapshot(self):
+        self.root.toggle_collapsed()
+        self.lines = list(RecordFormat.lines(self.root))
+        snapshot = self.model.snapshot()
+        SpillManager(budget=0).enforce(self.root, set())
+        self.assertIsNotNone(self.root.child_loader)
+        self.assertIsNone(snapshot.root.child_loader)
+        self.assertEqual(list(RecordFormat.lines(snapshot.root)), self.lines)
+        # expanding reads them back from the spill file
+        self.root.toggle_collapsed()
+        self.root.child.replace_field(0, "changed")
+        self.assertEqual(list(RecordFormat.lines(snapshot.root)), self.lines)
+        snapshot.release()
+
+    def test_snapshots_taken_at_different_times(self):
+        first = self.model.snapshot()
+        self.model.insert("a")
+        lines = list(RecordFormat.lines(self.root))
+        second = self.model.snapshot()
+        self.model.insert("b")
+        self.assertEqual(list(RecordFormat.lines(first.root)), self.lines)
+        self.assertEqual(list(RecordFormat.lines(second.root)), lines)
+        first.release()
+        second.release()
+        self.model.insert("c")
+        self.assertEqual(first.nodes_copied, 0)
+
+    def test_read_on_another_thread(self):
+        snapshot = self.model.snapshot()
+        read = []
+        edited = threading.Event()
+
+        def save():
+            lines = RecordFormat.lines(snapshot.root)
+            read.append(next(lines))
+            edited.wait()
+            read.extend(lines)
+        thread = threading.Thread(target=save)
+        thread.start()
+        for line in range(10):
+            self.model.insert("edited ")
+            self.down(1)
+        edited.set()
+        thread.join()
+        self.assertEqual(read, self.lines)
+        snapshot.release()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+import unittest
+from nestingnote.spillManager import SpillManager
+from nestingnote.nestedlist import NestedList
+
+
+class TestSpillManager(unittest.TestCase):
+
+    @staticmethod
+    def build() -> NestedList:
+        """
+        one
+            a
+                b
+            c
+        two
+            d
+        three
+        """
+        root = NestedList(["one"])
+        a = root.insert_child(["a", "x"])
+        b = a.insert_child(["b"])
+        b.toggle_collapsed()
+        a.insert_sibling(["c"])
+        two = root.insert_sibling(["two"])
+        two.insert_child(["d"])
+        two.insert_sibling(["three"])
+        return root
+
+    def test_spill_and_load(self):
+        root = self.build()
+        target = str(root)
+        root.toggle_collapsed()
+        root.sibling.toggle_collapsed()
+        manager = SpillManager(budget=3)
+        manager.enforce(root, protected=set())
+        self.assertIsNotNone(root.child_loader)
+        self.assertIsNotNone(root.sibling.child_loader)
+        self.assertEqual(manager.resident_nodes, 3)
+        self.assertEqual(manager.spilled_nodes, 4)
+        self.assertEqual(root.count(), 3)
+        root.toggle_collapsed()
+        root.sibling.toggle_collapsed()
+        self.assertEqual(str(root), target)
+        self.assertTrue(root.child.child.collapsed)
+        self.assertEqual(manager.spilled_nodes, 0)
+
+    def test_least_recently_used(self):
+        root = self.build()
+        root.toggle_collapsed()
+        root.sibling.toggle_collapsed()
+        manager = SpillManager(budget=6)
+        manager.touch(root.sibling)
+        manager.touch(root)
+        manager.enforce(root, protected=set())
+        # only the least recently used subtree is needed to fit the budget
+        self.assertIsNone(root.child_loader)
+        self.assertIsNotNone(root.sibling.child_loader)
+        self.assertEqual(manager.resident_nodes, 6)
+
+    def test_protected(self):
+        root = self.build()
+        root.toggle_collapsed()
+        root.sibling.toggle_collapsed()
+        manager = SpillManager(budget=0)
+        manager.enforce(root, protected={id(root)})
+        self.assertIsNone(root.child_loader)
+        self.assertIsNotNone(root.sibling.child_loader)
+
+    def test_serialize_spilled(self):
+        root = self.build()
+        root.toggle_collapsed()
+        target = root.serialize()
+        manager = SpillManager(budget=0)
+        manager.enforce(root, protected=set())
+        self.assertEqual(root.serialize(), target)
+        self.assertIsNotNone(root.child_loader)
+
+    def test_respill(self):
+        root = self.build()
+        target = str(root)
+        root.child.toggle_collapsed()
+        manager = SpillManager(budget=0)
+        manager.enforce(root, protected=set())
+        self.assertEqual(manager.spilled_nodes, 1)
+        # spilling the outer node takes the inner spilled node with it
+        root.toggle_collapsed()
+        manager.enforce(root, protected=set())
+        self.assertEqual(manager.spilled_nodes, 3)
+        root.toggle_collapsed()
+        root.child.toggle_collapsed()
+        self.assertEqual(str(root), target)
+        self.assertEqual(manager.spilled_nodes, 0)
+
+    def test_file_stays_bounded(self):
+        root = NestedList(["root"])
+        for index in range(50):
+            root.insert_child(["child {}".format(index)])
+        target = str(root)
+        root.toggle_collapsed()
+        manager = SpillManager(budget=5)
+        largest = 0
+        for _ in range(500):
+            manager.enforce(root, protected=set())
+            self.assertIsNotNone(root.child_loader)
+            largest = max(largest, manager.spill_file_bytes)
+            # reading the children back leaves their bytes behind
+            self.assertIsNot(root.child, root.null)
+        # one spill writes over a kilobyte, 500 would take over half a megabyte
+        self.assertLess(largest, 1 << 17)
+        root.toggle_collapsed()
+        self.assertEqual(str(root), target)
+
+
+if __name__ == '__main__':
+    unittest.main()
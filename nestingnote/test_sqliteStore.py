@@ -0,0 +1,124 @@
+import unittest
+from nestingnote.sqliteStore import SqliteStore
+from nestingnote.nestedlist import NestedList
+import os
+import sqlite3
+import tempfile
+
+
+class TestSqliteStore(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.directory.name, 'test.nndb')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    @staticmethod
+    def build() -> NestedList:
+        root = NestedList(["one", "two", "three"])
+        child = root.insert_child(["child1", "child2"])
+        grandchild = child.insert_child(["gc1"])
+        grandchild.insert_sibling(["gc2", "gc2"])
+        sibling = root.insert_sibling()
+        sibling.insert_sibling(["sib2", "sib2"])
+        return root
+
+    def count_rows(self) -> int:
+        connection = sqlite3.connect(self.file_path)
+        count = connection.execute("SELECT COUNT(*) FROM nodes").fetchone()[0]
+        connection.close()
+        return count
+
+    def test_save_and_load(self):
+        root = self.build()
+        store = SqliteStore(self.file_path)
+        store.save(root)
+        store.close()
+        store = SqliteStore(self.file_path)
+        copy = store.load()
+        store.close()
+        self.assertEqual(str(root), str(copy))
+        self.assertEqual(root, copy)
+
+    def test_collapsed_children_deferred(self):
+        root = self.build()
+        root.child.toggle_collapsed()
+        store = SqliteStore(self.file_path)
+        store.save(root)
+        store.close()
+        store = SqliteStore(self.file_path)
+        copy = store.load()
+        child = copy.child
+        self.assertTrue(child.collapsed)
+        self.assertIsNotNone(child.child_loader)
+        self.assertTrue(child.has_child)
+        self.assertEqual(copy.count(), 4)
+        self.assertEqual(child.serialize()['child'], root.child.child.serialize())
+        self.assertIsNotNone(child.child_loader)
+        child.toggle_collapsed()
+        self.assertEqual(copy.count(), 6)
+        self.assertIsNone(child.child_loader)
+        root.child.toggle_collapsed()
+        self.assertEqual(str(root), str(copy))
+        store.close()
+
+    def test_incremental_save(self):
+        root = self.build()
+        store = SqliteStore(self.file_path)
+        store.save(root)
+        self.assertEqual(self.count_rows(), 6)
+        root.child.replace_field(0, "changed")
+        root.sibling.insert_sibling(["new"])
+        store.save(root)
+        self.assertEqual(self.count_rows(), 7)
+        # deleting a node removes it and its descendants
+        del root.child
+        store.save(root)
+        self.assertEqual(self.count_rows(), 4)
+        store.close()
+        store = SqliteStore(self.file_path)
+        copy = store.load()
+        store.close()
+        self.assertEqual(str(root), str(copy))
+
+    def test_indent_writes_only_around_subtree(self):
+        root = NestedList(["first"])
+        moved = root.insert_sibling(["moved"])
+        moved.insert_sibling(["after"])
+        for index in range(100):
+            child = moved.insert_child(["child {}".format(index)])
+            for _ in range(5):
+                child.insert_child(["grandchild"])
+        store = SqliteStore(self.file_path)
+        store.save(root)
+        self.assertEqual(self.count_rows(), 603)
+        moved.indent(root, children_kept=100)
+        store.save(root)
+        # the node the subtree moves under and its top node, not the subtree
+        self.assertLessEqual(store.rows_written, 3)
+        store.close()
+        store = SqliteStore(self.file_path)
+        copy = store.load()
+        store.close()
+        self.assertEqual(str(root), str(copy))
+        self.assertEqual(self.count_rows(), 603)
+
+    def test_save_keeps_unread_children(self):
+        root = self.build()
+        root.child.toggle_collapsed()
+        store = SqliteStore(self.file_path)
+        store.save(root)
+        store.close()
+        store = SqliteStore(self.file_path)
+        copy = store.load()
+        copy.replace_field(0, "changed")
+        store.save(copy)
+        self.assertIsNotNone(copy.child.child_loader)
+        store.close()
+        self.assertEqual(self.count_rows(), 6)
+
+
+if __name__ == '__main__':
+    unittest.main()
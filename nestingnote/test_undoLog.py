@@ -0,0 +1,165 @@
+import unittest
+from nestingnote.controller import Controller
+from nestingnote.model import Model
+from nestingnote.nestedlist import NestedList
+from nestingnote.testView import TestView
+from nestingnote.undoLog import UndoLog
+from nestingnote.key import KeyMap, Key
+from nestingnote.directions import LateralDirection, VerticalDirection
+
+
+class TestUndoLog(unittest.TestCase):
+
+    def setUp(self):
+        """
+        one
+            two
+            three
+        four | five
+        six
+        """
+        self.root = NestedList(["one"])
+        two = self.root.insert_child(["two"])
+        two.insert_sibling(["three"])
+        four = self.root.insert_sibling(["four", "five"])
+        four.insert_sibling(["six"])
+        self.controller = Controller(Model(TestView([]), root=self.root))
+        self.model = self.controller.model
+
+    def snapshot(self) -> list:
+        """
+        :return: the depth, fields and collapsed flag of every node, collapsed children included
+        """
+        nodes = []
+
+        def walk(node: NestedList, depth: int):
+            while node is not node.null:
+                nodes.append((depth, list(node.fields), node.collapsed))
+                walk(node.child, depth + 1)
+                node = node.sibling
+        walk(self.root, 0)
+        return nodes
+
+    def press(self, *keys):
+        for key in keys:
+            if isinstance(key, str):
+                key = ord(key)
+            elif isinstance(key, Key):
+                key = KeyMap.get_instance().value(key)
+            self.controller.handle_key(key)
+
+    def go_to(self, line: int, x: int = 0):
+        self.model.move_end(LateralDirection.LEFT)
+        for _ in range(self.model.cursor_position[0]):
+            self.model.move(VerticalDirection.UP)
+        for _ in range(line):
+            self.model.move(VerticalDirection.DOWN)
+        self.model.move_end(LateralDirection.LEFT)
+        self.model.move(LateralDirection.RIGHT, x)
+
+    def assert_undone(self, *keys):
+        """
+        Presses keys, then checks undo puts the document and cursor back and redo makes the edit again
+        """
+        before, cursor = self.snapshot(), self.model.cursor_position
+        self.press(*keys)
+        after, cursor_after = self.snapshot(), self.model.cursor_position
+        self.assertNotEqual(before, after)
+        self.press(Key.CTRL_U)
+        self.assertEqual(self.snapshot(), before)
+        self.assertEqual(self.model.cursor_position, cursor)
+        self.press(Key.CTRL_Y)
+        self.assertEqual(self.snapshot(), after)
+        self.assertEqual(self.model.cursor_position, cursor_after)
+
+    def test_text(self):
+        self.go_to(1, 6)
+        self.assert_undone('x')
+        self.assert_undone(Key.BACKSPACE)
+        self.go_to(0, 0)
+        self.assert_undone(Key.DELETE)
+
+    def test_fields(self):
+        self.go_to(3, 2)
+        self.assert_undone(Key.TAB)
+        self.go_to(3, 4)
+        self.assert_undone(Key.DELETE)
+        self.go_to(3, 6)
+        self.assert_undone(Key.BACKSPACE)
+
+    def test_nodes(self):
+        self.go_to(2, 4)
+        self.assert_undone(Key.TAB)
+        self.assert_undone(Key.SHIFT_TAB)
+        self.go_to(3, 0)
+        self.assert_undone(Key.TAB)
+        self.go_to(0, 0)
+        self.assert_undone(Key.CTRL_K)
+        self.go_to(3, 2)
+        self.assert_undone(Key.ENTER)
+        self.go_to(3, 0)
+        self.assert_undone(Key.BACKSPACE)
+
+    def test_unindent_with_younger_siblings(self):
+        # two's younger sibling three becomes its child
+        self.go_to(1, 4)
+        self.assert_undone(Key.SHIFT_TAB)
+
+    def test_combine_with_collapsed(self):
+        self.go_to(0, 0)
+        self.press(Key.CTRL_K)
+        self.go_to(1, 0)
+        self.assert_undone(Key.BACKSPACE)
+
+    def test_typing_undone_by_word(self):
+        self.go_to(4, 3)
+        self.press(*' big dog')
+        self.assertEqual(self.root.get_node(4).fields, ['six big dog'])
+        self.press(Key.CTRL_U)
+        self.assertEqual(self.root.get_node(4).fields, ['six big'])
+        self.press(Key.CTRL_U)
+        self.assertEqual(self.root.get_node(4).fields, ['six'])
+        self.press(Key.BACKSPACE, Key.BACKSPACE, Key.CTRL_U)
+        self.assertEqual(self.root.get_node(4).fields, ['six'])
+        self.press(Key.CTRL_Y)
+        self.assertEqual(self.root.get_node(4).fields, ['s'])
+
+    def test_edit_forgets_redo(self):
+        self.go_to(4, 3)
+        self.press('x', Key.CTRL_U, 'y', Key.CTRL_Y)
+        self.assertEqual(self.root.get_node(4).fields, ['sixy'])
+        self.press(Key.CTRL_U, Key.CTRL_U)
+        self.assertEqual(self.snapshot()[4], (0, ['six'], False))
+
+    def test_transaction(self):
+        self.go_to(4, 3)
+        with self.model.transaction():
+            self.press(*' one', Key.ENTER, *'two')
+        self.assertEqual(self.snapshot()[4:], [(0, ['six one'], False), (0, ['two'], False)])
+        self.press(Key.CTRL_U)
+        self.assertEqual(self.snapshot()[4:], [(0, ['six'], False)])
+        self.assertEqual(self.model.cursor_position, (4, 3))
+
+    def test_modified(self):
+        self.go_to(4, 3)
+        self.press('x', Key.CTRL_U)
+        self.assertTrue(self.model.modified)
+
+    def test_memory_budget(self):
+        node = self.root
+        for _ in range(100):
+            node = node.insert_sibling(["line"])
+        log = UndoLog(max_bytes=2000)
+        for index in range(100):
+            log.checkpoint((index, 0))
+            log.record(('toggle', (index,)))
+        self.assertLessEqual(log.bytes, 2000)
+        undone = 0
+        while log.undo(self.root) is not None:
+            undone += 1
+        self.assertGreater(undone, 0)
+        self.assertLess(undone, 100)
+
+
+if __name__ == '__main__':
+    unittest.main()
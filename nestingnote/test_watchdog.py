@@ -0,0 +1,51 @@
+import unittest
+from nestingnote.watchdog import Watchdog
+from nestingnote.model import Model
+from nestingnote.nestedlist import NestedList
+from nestingnote.testView import TestView
+import os
+import tempfile
+import time
+
+
+class TestWatchdog(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.log_path = os.path.join(self.directory.name, 'watchdog.log')
+        root = NestedList(["one"])
+        root.insert_sibling(["two"])
+        self.watchdog = Watchdog(Model(TestView([]), root=root), self.log_path, budget=0.05, max_samples=2)
+        self.watchdog.start()
+
+    def tearDown(self):
+        self.watchdog.stop()
+        self.directory.cleanup()
+
+    def slow_command(self):
+        time.sleep(0.2)
+
+    def test_stall(self):
+        self.watchdog.key_started(97)
+        self.slow_command()
+        self.watchdog.key_finished()
+        self.assertEqual(self.watchdog.stalls, 1)
+        with open(self.log_path) as log:
+            text = log.read()
+        self.assertIn('key 97 still running', text)
+        self.assertIn('(sample 2), cursor at line 1 column 1', text)
+        self.assertNotIn('(sample 3)', text)
+        self.assertIn('in slow_command', text)
+        self.assertRegex(text, 'key 97 finished after [0-9]+ ms, 2 lines')
+
+    def test_within_budget(self):
+        for key in range(10):
+            self.watchdog.key_started(key)
+            self.watchdog.key_finished()
+        time.sleep(0.1)
+        self.assertEqual(self.watchdog.stalls, 0)
+        self.assertFalse(os.path.exists(self.log_path))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import unittest
+from nestingnote.wrapLayout import WrapLayout
+from nestingnote.counters import OperationCounters
+from nestingnote.screenView import ScreenView
+from nestingnote.model import Model
+from nestingnote.nestedlist import NestedList
+from nestingnote.directions import VerticalDirection, LateralDirection
+
+
+class TestWrapLayout(unittest.TestCase):
+
+    def setUp(self):
+        self.counters = OperationCounters.get_instance()
+        self.counters.reset()
+
+    def test_breaks(self):
+        root = NestedList(["alpha beta gamma"])
+        child = root.insert_child(["the quick brown fox"])
+        layout = WrapLayout(12)
+        # breaks after the last space that fits
+        self.assertEqual(layout.rows(root), 2)
+        self.assertEqual(layout.locate(root, 10), (0, 10))
+        self.assertEqual(layout.locate(root, 11), (1, 0))
+        # the cursor can be past the last character
+        self.assertEqual(layout.locate(root, 16), (1, 5))
+        # continued rows are indented as far as the line
+        self.assertEqual(layout.rows(child), 4)
+        self.assertEqual(layout.locate(child, 10), (1, 6))
+        self.assertEqual(layout.line_x(child, 1, 6), 10)
+        # past the end of a row stays on it
+        self.assertEqual(layout.line_x(child, 1, 11), 13)
+        self.assertEqual(layout.line_x(child, 0, 0), 0)
+
+    def test_cached(self):
+        root = NestedList(["alpha beta gamma", "x"])
+        sibling = root.insert_sibling(["one", "two"])
+        layout = WrapLayout(12)
+        layout.rows(root)
+        layout.locate(root, 3)
+        layout.rows(sibling)
+        self.assertEqual(self.counters.line_wraps, 2)
+        root.insert(0, "a")
+        # the column of sibling's first field got wider, its padding stays on the first row
+        self.assertEqual(layout.rows(sibling), 2)
+        self.assertEqual(layout.locate(sibling, 21), (1, 0))
+        self.assertEqual(self.counters.line_wraps, 3)
+        layout.rows(root)
+        self.assertEqual(self.counters.line_wraps, 4)
+        layout.width = 40
+        self.assertEqual(layout.rows(root), 1)
+        self.assertEqual(self.counters.line_wraps, 5)
+
+    def test_model(self):
+        root = NestedList(["alpha beta gamma delta"])
+        root.insert_child(["the quick brown fox"])
+        root.insert_sibling(["end"])
+        view = ScreenView(rows=4, columns=12)
+        model = Model(view, root=root, soft_wrap=True)
+        model.display()
+        self.assertEqual(view.lines[:3], ["alpha beta  ", "gamma delta ", "    the     "])
+        for _ in range(3):
+            model.move(VerticalDirection.DOWN)
+        model.display()
+        self.assertEqual(model.cursor_position, (1, 8))
+        self.assertEqual(view.cursor, (3, 4))
+        model.move(VerticalDirection.DOWN)
+        model.display()
+        # scrolled down a row
+        self.assertEqual(view.lines, ["gamma delta ", "    the     ", "    quick   ", "    brown   "])
+        self.assertEqual(view.cursor, (3, 4))
+        model.page(VerticalDirection.DOWN)
+        model.display()
+        self.assertEqual(model.cursor_position, (2, 3))
+        model.page(VerticalDirection.UP)
+        model.display()
+        self.assertEqual(view.lines[0], "gamma delta ")
+        self.assertEqual(model.cursor_position, (1, 4))
+        model.move_end(LateralDirection.RIGHT)
+        model.display()
+        self.assertEqual(view.lines[0], "    the     ")
+        self.assertEqual(view.cursor, (3, 7))
+        # moving along the line doesn't wrap it again
+        self.counters.reset()
+        model.move(LateralDirection.LEFT)
+        model.display()
+        self.assertEqual(self.counters.line_wraps, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
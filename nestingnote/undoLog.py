@@ -0,0 +1,245 @@
+from nestingnote.nestedlist import NestedList
+from collections import deque
+from typing import List, Optional, Tuple
+import sys
+
+
+class UndoUnit(object):
+    """
+    Edits undone and redone together, with where the cursor was before and after them
+    """
+
+    def __init__(self, cursor: Tuple[int, int]):
+        # the edits that reverse the unit, in the order they were made
+        self.edits: List[tuple] = []
+        self.before = cursor
+        self.after = cursor
+        self.bytes = sys.getsizeof(self)
+
+
+class UndoLog(object):
+    """
+    The edits made to a document, each kept as the small edit that reverses it
+    An edit is a tuple of its kind, the path of the node it changes (see NestedList.get_path) and what it needs to
+    be undone, so undoing or redoing costs as much as the edit did rather than a copy of the document. Applying an
+    edit returns the edit that reverses it, which is how undone edits are redone.
+    Edits are grouped into units, one per key, except that typing or deleting a run of characters is one unit up
+    to the start of the next word. The oldest units are forgotten when the log grows past its budget in bytes.
+    """
+
+    def __init__(self, max_bytes: int = 1 << 20):
+        self.__max_bytes = max_bytes
+        self.__undo = deque()
+        self.__redo: List[UndoUnit] = []
+        self.__bytes = 0
+        # where the cursor was at the start of the key being handled
+        self.__cursor = (0, 0)
+        # whether the last unit is still taking the edits of the key being handled
+        self.__open = False
+        # whether typing can continue the last unit
+        self.__mergeable = False
+
+    @property
+    def bytes(self) -> int:
+        """
+        :return: memory taken by the units that can be undone and redone
+        """
+        return self.__bytes
+
+    @property
+    def can_undo(self) -> bool:
+        return len(self.__undo) > 0
+
+    @property
+    def can_redo(self) -> bool:
+        return len(self.__redo) > 0
+
+    def checkpoint(self, cursor: Tuple[int, int], merge: bool = True):
+        """
+        Called before each key, edits after it go in a new unit
+        :param cursor: where the cursor is, after the last key's edits and before the next key's
+        :param merge: whether typing after it can still continue the last unit
+        """
+        if self.__open:
+            self.__undo[-1].after = cursor
+            self.__open = False
+        self.__cursor = cursor
+        self.__mergeable = self.__mergeable and merge
+
+    def record(self, edit: tuple):
+        """
+        :param edit: reverses an edit just made to the document
+        """
+        if not self.__open:
+            if self.__mergeable and self.__merge(edit):
+                self.__open = True
+                return
+            self.__undo.append(UndoUnit(self.__cursor))
+            self.__bytes += self.__undo[-1].bytes
+            self.__open = True
+        self.__add(self.__undo[-1], edit)
+        self.__mergeable = edit[0] == 'text'
+        for unit in self.__redo:
+            self.__bytes -= unit.bytes
+        self.__redo = []
+        self.__forget()
+
+    def undo(self, root: NestedList) -> Optional[Tuple[int, int]]:
+        """
+        :return: where to put the cursor, None if there is nothing to undo
+        """
+        if not self.can_undo:
+            return None
+        unit = self.__undo.pop()
+        redo = UndoUnit(unit.before)
+        redo.after = unit.after
+        for edit in reversed(unit.edits):
+            self.__add(redo, self.apply(root, edit))
+        redo.edits.reverse()
+        self.__bytes += redo.bytes - unit.bytes
+        self.__redo.append(redo)
+        self.__open = self.__mergeable = False
+        return unit.before
+
+    def redo(self, root: NestedList) -> Optional[Tuple[int, int]]:
+        """
+        :return: where to put the cursor, None if there is nothing to redo
+        """
+        if not self.can_redo:
+            return None
+        unit = self.__redo.pop()
+        undo = UndoUnit(unit.before)
+        undo.after = unit.after
+        for edit in unit.edits:
+            self.__add(undo, self.apply(root, edit))
+        self.__bytes += undo.bytes - unit.bytes
+        self.__undo.append(undo)
+        self.__open = self.__mergeable = False
+        return unit.after
+
+    @classmethod
+    def apply(cls, root: NestedList, edit: tuple) -> tuple:
+        """
+        Makes edit to the document starting at root
+        :return: the edit that reverses it
+        """
+        kind, path = edit[0], edit[1]
+        node = root.get_node_at(path)
+        if kind == 'text':
+            _, _, field, start, old, new = edit
+            text = node.get_field(field)
+            assert text[start:start + len(old)] == old
+            node.replace_field(field, text[:start] + new + text[start + len(old):])
+            return 'text', path, field, start, new, old
+        if kind == 'split_field':
+            _, _, field, index = edit
+            node.split_field(node.get_field_start(field) + index)
+            return 'join_fields', path, field
+        if kind == 'join_fields':
+            field = edit[2]
+            index = len(node.get_field(field))
+            node.replace_field(field, node.get_field(field) + node.get_field(field + 1))
+            node.delete_field(field + 1)
+            return 'split_field', path, field, index
+        if kind == 'split':
+            field = edit[2]
+            node.split(node.get_field_start(field))
+            return 'join', path, field
+        if kind == 'join':
+            kept = edit[2]
+            node.sibling.combine(node, node)
+            if kept == 0:
+                # split leaves a node it took every field from with an empty one
+                node.delete_field(0)
+            return 'split', path, kept
+        if kind == 'combine':
+            previous_row = root.get_node_at(edit[2])
+            to_remove = node.sibling
+            reverse = 'uncombine', path, edit[2], to_remove.num_fields, to_remove.num_children, to_remove.collapsed
+            to_remove.combine(previous_row, node)
+            return reverse
+        if kind == 'uncombine':
+            _, _, previous_path, num_fields, num_children, collapsed = edit
+            cls.__set_collapsed(node.uncombine(root.get_node_at(previous_path), num_fields, num_children), collapsed)
+            return 'combine', path, previous_path
+        if kind == 'indent':
+            _, _, children_kept, collapsed = edit
+            prev_sibling = root.get_node_at(path[:-1] + (path[-1] - 1,))
+            index = prev_sibling.num_children
+            reverse = 'unindent', path[:-1] + (path[-1] - 1, index), node.collapsed
+            node.indent(prev_sibling, children_kept)
+            cls.__set_collapsed(cls.__child(prev_sibling, index), collapsed)
+            return reverse
+        if kind == 'unindent':
+            collapsed = edit[2]
+            parent = root.get_node_at(path[:-1])
+            new_path = path[:-2] + (path[-2] + 1,)
+            reverse = 'indent', new_path, node.num_children, node.collapsed
+            node.unindent(parent)
+            cls.__set_collapsed(parent.sibling, collapsed)
+            return reverse
+        if kind == 'toggle':
+            node.toggle_collapsed()
+            return edit
+        raise ValueError("unknown edit {}".format(kind))
+
+    # Private
+
+    @staticmethod
+    def __child(parent: NestedList, index: int) -> NestedList:
+        child = parent.child
+        for _ in range(index):
+            child = child.sibling
+        return child
+
+    @staticmethod
+    def __set_collapsed(node: NestedList, collapsed: bool):
+        if node.collapsed != collapsed:
+            node.toggle_collapsed()
+
+    def __add(self, unit: UndoUnit, edit: tuple):
+        size = self.__size(edit)
+        unit.edits.append(edit)
+        unit.bytes += size
+        self.__bytes += size
+
+    def __merge(self, edit: tuple) -> bool:
+        """
+        Adds a typed or deleted character to the run of them the last unit ends with
+        :return: whether it continued the run
+        """
+        unit = self.__undo[-1]
+        last = unit.edits[-1]
+        if edit[0] != 'text' or last[0] != 'text' or edit[1:3] != last[1:3]:
+            return False
+        _, path, field, start, old, new = edit
+        _, _, _, last_start, last_old, last_new = last
+        if new == '' and last_new == '' and start == last_start + len(last_old):
+            # typing, which a space after a word ends
+            if old[:1] == ' ' and last_old[-1:] != ' ':
+                return False
+            merged = 'text', path, field, last_start, last_old + old, ''
+        elif old == '' and last_old == '' and start + len(new) == last_start:
+            # deleting backwards
+            merged = 'text', path, field, start, '', new + last_new
+        elif old == '' and last_old == '' and start == last_start:
+            # deleting forwards
+            merged = 'text', path, field, start, '', last_new + new
+        else:
+            return False
+        size = self.__size(merged) - self.__size(last)
+        unit.edits[-1] = merged
+        unit.bytes += size
+        self.__bytes += size
+        return True
+
+    def __forget(self):
+        """
+        Drops the oldest units until the log is within its budget, keeping the last one
+        """
+        while self.__bytes > self.__max_bytes and len(self.__undo) > 1:
+            self.__bytes -= self.__undo.popleft().bytes
+
+    @staticmethod
+    def __size(edit: tuple) -> int:
+        return sys.getsizeof(edit) + sum(sys.getsizeof(part) for part in edit)
@@ -1,5 +1,6 @@
 from nestingnote.styles import Styles
 from abc import ABC, abstractmethod
+from typing import List, Optional, Tuple
 
 
 class View(ABC):
@@ -35,7 +36,66 @@ class View(ABC):
     def input_char(self) -> int:
         pass
 
+    @abstractmethod
+    def set_input_timeout(self, milliseconds: int):
+        """
+        :param milliseconds: how long input_char waits for a key before returning -1, negative to wait forever
+        """
+        pass
+
     @abstractmethod
     def refresh(self):
         pass
 
+    @property
+    def input_fds(self) -> List[int]:
+        """
+        :return: file descriptors that become readable when input_char has a key, empty if there are none to watch
+        """
+        return []
+
+    @property
+    def decode_seconds(self) -> Optional[float]:
+        """
+        :return: seconds the last key took to decode from when its first byte was read, None for views that are
+            given whole keys
+        """
+        return None
+
+    def update_size(self):
+        """
+        Called when the terminal has been resized, views that keep its size read it again
+        """
+        pass
+
+    def draw_line(self, y: int, runs: List[Tuple[str, Styles]]):
+        """
+        Draws runs of text one after the other from the start of row y
+        """
+        x = 0
+        for text, style in runs:
+            self.addstr(y, x, text, style)
+            x += len(text)
+
+    def begin_frame(self, top: int, changed: bool):
+        """
+        Called before a frame is drawn
+        Views that keep lines between frames can skip redrawing them, see is_line_current
+        :param top: index in the document of the line at the top of the screen
+        :param changed: whether lines may have changed since the last frame
+        """
+        self.clear()
+
+    def is_line_current(self, row: int) -> bool:
+        """
+        :return: whether the row of the screen still shows the right line from an earlier frame,
+            so drawing it can be skipped
+        """
+        return False
+
+    def end_frame(self):
+        """
+        Called after a frame is drawn
+        """
+        pass
+
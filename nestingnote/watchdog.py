@@ -0,0 +1,118 @@
+from nestingnote.model import Model
+import sys
+import threading
+import time
+import traceback
+
+
+class Watchdog(object):
+    """
+    Thread that logs the main thread's stack whenever handling a key takes longer than a budget
+    The main thread only records when each key starts and finishes, the stack is sampled from the watchdog thread,
+    so keys within the budget cost next to nothing. The document is only read on the main thread: a slow key logs
+    the line count once it has finished.
+    """
+
+    def __init__(self, model: Model, log_path: str, budget: float = 0.05, max_samples: int = 5):
+        """
+        :param budget: seconds a key may take before its stack is logged
+        :param max_samples: stacks logged per slow key, one each budget after the first
+        """
+        self.__model = model
+        self.__log_path = log_path
+        self.__budget = budget
+        self.__max_samples = max_samples
+        self.__condition = threading.Condition()
+        # keeps samples and the line that ends them in order, taken without holding the condition
+        self.__log_lock = threading.Lock()
+        self.__main_thread = threading.main_thread().ident
+        self.__thread = None
+        self.__stopped = False
+        # the key being handled, when it started and where the cursor was, None between keys
+        self.__key = None
+        self.__keys = 0
+        self.__started = None
+        self.__cursor = None
+        self.__samples = 0
+        # whether a stack of the key being handled was logged
+        self.__stalled = False
+        self.__stalls = 0
+
+    @property
+    def stalls(self) -> int:
+        """
+        :return: number of keys that went over the budget
+        """
+        return self.__stalls
+
+    def start(self):
+        self.__thread = threading.Thread(target=self.__run, name='nestingnote watchdog', daemon=True)
+        self.__thread.start()
+
+    def stop(self):
+        with self.__condition:
+            self.__stopped = True
+            self.__condition.notify()
+        if self.__thread is not None:
+            self.__thread.join()
+
+    def key_started(self, key: int):
+        with self.__condition:
+            self.__key = key
+            self.__keys += 1
+            self.__cursor = self.__model.cursor_position
+            self.__samples = 0
+            self.__stalled = False
+            self.__started = time.monotonic()
+            self.__condition.notify()
+
+    def key_finished(self):
+        with self.__condition:
+            stalled = self.__stalled
+            key, started = self.__key, self.__started
+            self.__started = None
+        if stalled:
+            with self.__log_lock:
+                self.__write('key {} finished after {:.0f} ms, {} lines\n\n'.format(
+                    key, (time.monotonic() - started) * 1000, self.__model.line_count))
+
+    def __run(self):
+        with self.__condition:
+            while not self.__stopped:
+                if self.__started is None or self.__samples >= self.__max_samples:
+                    self.__condition.wait()
+                    continue
+                remaining = self.__started + self.__budget * (self.__samples + 1) - time.monotonic()
+                if remaining > 0:
+                    self.__condition.wait(remaining)
+                    continue
+                self.__samples += 1
+                sample = (self.__keys, self.__key, self.__started, self.__samples, self.__cursor)
+                self.__condition.release()
+                try:
+                    self.__sample(*sample)
+                finally:
+                    self.__condition.acquire()
+
+    def __sample(self, serial: int, key: int, started: float, sample: int, cursor: tuple):
+        """
+        Logs the main thread's stack, unless the key finished while it was taken
+        """
+        with self.__log_lock:
+            frame = sys._current_frames().get(self.__main_thread)
+            stack = '' if frame is None else ''.join(traceback.format_stack(frame))
+            with self.__condition:
+                if self.__keys != serial or self.__started is None:
+                    return
+                # the line key_finished logs waits for this sample
+                if not self.__stalled:
+                    self.__stalled = True
+                    self.__stalls += 1
+            line, column = cursor
+            self.__write('{} key {} still running after {:.0f} ms (sample {}), cursor at line {} column {}\n{}'
+                         .format(time.strftime('%Y-%m-%d %H:%M:%S'), key, (time.monotonic() - started) * 1000,
+                                 sample, line + 1, column + 1, stack))
+
+    def __write(self, text: str):
+        with open(self.__log_path, 'a') as log:
+            log.write(text)
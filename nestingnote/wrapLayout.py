@@ -0,0 +1,116 @@
+from nestingnote.nestedlist import NestedList
+from nestingnote.renderList import RenderLine
+from nestingnote.styles import Styles
+from nestingnote.counters import OperationCounters
+from bisect import bisect_right
+from typing import List, Tuple
+import weakref
+
+
+class WrapLayout(object):
+    """
+    Where the lines of a document break when they are wrapped to the width of the screen
+    The breaks of a line are worked out the first time it's laid out and kept until its fields, its level, the width
+    of its columns or the width of the screen change. Lines break after the last run of spaces that starts on the row,
+    and the rows they continue on are indented as far as the line, unless that would leave less than half the screen.
+    """
+
+    def __init__(self, width: int):
+        self.__width = width
+        # id(node) -> [weak reference to node, state the breaks were found for, breaks, indent of continued rows]
+        self.__lines = {}
+
+    @property
+    def width(self) -> int:
+        return self.__width
+
+    @width.setter
+    def width(self, width: int):
+        if width != self.__width:
+            self.__width = width
+            self.__lines = {}
+
+    def rows(self, node: NestedList) -> int:
+        """
+        :return: screen rows node takes
+        """
+        return len(self.__layout(node)[0])
+
+    def locate(self, node: NestedList, x: int) -> Tuple[int, int]:
+        """
+        :param x: index in the line of node, as the cursor's x is without wrapping
+        :return: row of node and column of the screen x is shown at
+        """
+        breaks, hanging = self.__layout(node)
+        row = bisect_right(breaks, x) - 1
+        # within the spaces a row ends with, past the edge of the screen
+        return row, min(x - breaks[row] + (hanging if row > 0 else 0), self.__width - 1)
+
+    def line_x(self, node: NestedList, row: int, column: int) -> int:
+        """
+        Reverse of locate
+        :return: index in the line of node of the character closest to column on row
+        """
+        breaks, hanging = self.__layout(node)
+        row = max(0, min(row, len(breaks) - 1))
+        x = breaks[row] + max(0, column - (hanging if row > 0 else 0))
+        if row + 1 < len(breaks):
+            # stay on row rather than moving onto the next one
+            x = min(x, breaks[row + 1] - 1)
+        return x
+
+    def render(self, node: NestedList, line: RenderLine) -> List[List[Tuple[str, Styles]]]:
+        """
+        :param line: the whole line of node
+        :return: runs of each row of node
+        """
+        breaks, hanging = self.__layout(node)
+        rows = []
+        for row, start in enumerate(breaks):
+            end = breaks[row + 1] if row + 1 < len(breaks) else len(line)
+            indent = hanging if row > 0 else 0
+            # spaces a row ends with can run past the edge of the screen
+            runs = line.clip(start, min(end - start, self.__width - indent))
+            if indent > 0:
+                runs = [(' ' * indent, Styles.EVEN)] + runs
+            rows.append(runs)
+        return rows
+
+    # Private
+
+    def __layout(self, node: NestedList) -> Tuple[List[int], int]:
+        """
+        :return: index in the line of the start of each row of node, and the indent of its continued rows
+        """
+        state = (node.level, tuple(node.fields), tuple(node.get_padding_len(index)
+                                                       for index in range(node.num_fields - 1)))
+        key = id(node)
+        entry = self.__lines.get(key)
+        if entry is not None and entry[0]() is node and entry[1] == state:
+            return entry[2], entry[3]
+        OperationCounters.get_instance().line_wraps += 1
+        breaks, hanging = self.__find_breaks(node.indent_padding + ''.join(node.row_iter), len(node.indent_padding))
+        reference = weakref.ref(node, lambda dead, key=key: self.__forget(key, dead))
+        self.__lines[key] = [reference, state, breaks, hanging]
+        return breaks, hanging
+
+    def __forget(self, key: int, reference: weakref.ref):
+        entry = self.__lines.get(key)
+        if entry is not None and entry[0] is reference:
+            del self.__lines[key]
+
+    def __find_breaks(self, text: str, indent: int) -> Tuple[List[int], int]:
+        hanging = indent if indent < self.__width // 2 else 0
+        breaks = [0]
+        available = self.__width
+        # the cursor can be one past the last character
+        while len(text) + 1 - breaks[-1] > available:
+            end = breaks[-1] + available
+            space = text.rfind(' ', max(breaks[-1], indent), end)
+            start = end if space < 0 else space + 1
+            # the padding between fields stays on the row it starts on rather than making a blank row
+            while start < len(text) and text[start] == ' ':
+                start += 1
+            breaks.append(start)
+            available = self.__width - hanging
+        return breaks, hanging